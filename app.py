@@ -0,0 +1,439 @@
+# PyQt5 imports for GUI components
+from PyQt5.QtGui import QTextCursor, QFont, QPixmap, QFontMetrics, QColor
+from PyQt5 import QtCore, QtGui, QtWidgets
+from PyQt5.QtWidgets import QGraphicsEllipseItem, QGraphicsTextItem, QGraphicsScene, QGraphicsRectItem, QMessageBox, QFileDialog
+from PyQt5.QtGui import QPen, QBrush
+from PyQt5.QtCore import Qt, QPointF, QThread, pyqtSignal
+
+import os  # Environment settings
+import sys  # Import sys module for system-specific parameters and functions
+
+# Import custom modules
+from gui import Ui_MainWindow  # Import the GUI layout from gui.py (assumed to be generated from Qt Designer)
+from parser import Node  # Import the Node class from parser.py
+from incremental import IncrementalParser  # Re-parses only the statements an edit touched
+from scanner import Scanner  # Import the Qt-free lexer
+from instrumentation import Instrumentation  # Per-phase timings shown in the status bar
+
+
+# Define a class for drawing the syntax tree
+class SyntaxTreeDrawer:
+    def __init__(self, graphicsView, root_node, instrumentation=None):
+        # Initialize the drawer with the QGraphicsView and the root node of the tree
+        self.graphicsView = graphicsView  # The graphics view where the tree will be displayed
+        self.root_node = root_node  # The root node of the syntax tree
+        # Measures the layout and render phases of draw_tree()
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation(enabled=False)
+        self.scene = QGraphicsScene()  # Create a new graphics scene
+        self.graphicsView.setScene(self.scene)  # Set the scene to the graphics view
+        # Set spacing parameters for drawing the tree
+        self.vertical_spacing = 100  # Vertical spacing between nodes
+        self.horizontal_spacing = 70  # Horizontal spacing between nodes
+        self.text_padding = 10  # Padding around the text in nodes
+
+    def clear_scene(self):
+        """Clears the QGraphicsScene and ensures all items are removed."""
+        # Remove all items from the scene
+        for item in self.scene.items():
+            self.scene.removeItem(item)
+        self.scene.clear()  # Clear the scene
+
+    def display_message(self, message):
+        """Displays a message on the QGraphicsView."""
+        self.clear_scene()  # Properly clear the scene
+        text_item = QGraphicsTextItem(message)  # Create a text item with the message
+        text_item.setDefaultTextColor(Qt.red)  # Set text color to red
+        text_item.setFont(QFont("Arial", 16))  # Set font to Arial, size 16
+        text_item.setPos(10, 10)  # Position the text in the scene
+        self.scene.addItem(text_item)  # Add the text item to the scene
+        # Adjust the scene rectangle to fit the items
+        self.graphicsView.setSceneRect(self.scene.itemsBoundingRect())
+
+    def draw_tree(self):
+        """Draws the syntax tree on the QGraphicsScene."""
+        self.scene.clear()  # Clear any existing items in the scene
+        # Determine the positions of all nodes in the tree
+        positions = {}
+        with self.instrumentation.phase('layout', 'nodes') as measurement:
+            self._calculate_positions(self.root_node, 0, 0, positions)
+            measurement.count = len(positions)
+        with self.instrumentation.phase('render', 'nodes') as measurement:
+            # Draw the tree based on calculated positions
+            self._draw_tree(self.root_node, positions)
+            # Adjust the scene rectangle to fit the items
+            self.graphicsView.setSceneRect(self.scene.itemsBoundingRect())
+            measurement.count = len(positions)
+
+    def _calculate_positions(self, node, x, y, positions):
+        """
+        Calculates positions for a node and its sibling chain. Recurses into children
+        only; siblings are placed in a loop so long sequences take linear time.
+        """
+        total_width = 0  # Width of the whole sibling chain
+        while node:
+            # Calculate width required for children first
+            children_width = 0
+            for child in node.children:
+                # Calculate positions for child nodes
+                child_width = self._calculate_positions(child, x + children_width, y + self.vertical_spacing, positions)
+                children_width += child_width + self.horizontal_spacing  # Update total width
+
+            # Calculate position for the current node
+            node_width = max(children_width - self.horizontal_spacing, self.horizontal_spacing)
+            node_x = x + (children_width - node_width) // 2  # Center the node based on children
+            positions[node] = QPointF(node_x, y)  # Store the position of the current node
+
+            # The next sibling starts to the right of this node
+            total_width += node_width
+            x += node_width + self.horizontal_spacing + 10
+            node = node.sibling
+
+        return total_width  # Return the total width occupied by the node and its siblings
+
+    def _draw_tree(self, node, positions):
+        """Draws a node, its sibling chain and their connections; recurses into children only."""
+        while node:
+            node = self._draw_node(node, positions)
+
+    def _draw_node(self, node, positions):
+        """Draws one node with its subtree and returns its sibling, still to be drawn."""
+        # Retrieve the position of the current node
+        position = positions[node]
+        x, y = position.x(), position.y()
+
+        # Calculate size of the node based on text content
+        text_item = QGraphicsTextItem(node.name)  # Create a text item with the node's name
+        font_metrics = QFontMetrics(text_item.font())  # Get font metrics
+        text_width = font_metrics.horizontalAdvance(node.name)  # Width of the text
+        text_height = font_metrics.height()  # Height of the text
+        shape_width = text_width + self.text_padding * 2  # Total width including padding
+        shape_height = text_height + self.text_padding * 2  # Total height including padding
+
+        # Draw the current node based on its shape
+        if node.shape == "oval":
+            # Draw an ellipse (oval) for the node
+            node_item = QGraphicsEllipseItem(x - shape_width / 2, y - shape_height / 2,
+                                             shape_width, shape_height)
+        elif node.shape == "rectangle":
+            # Draw a rectangle for the node
+            node_item = QGraphicsRectItem(x - shape_width / 2, y - shape_height / 2,
+                                          shape_width, shape_height)
+        else:
+            raise ValueError(f"Unsupported shape: {node.shape}")  # Handle unexpected shapes
+
+        # Set appearance of the node
+        node_item.setBrush(QBrush(QColor(200, 230, 255)))  # Light blue background color for nodes
+        self.scene.addItem(node_item)  # Add the node to the scene
+
+        # Add text inside the node
+        text_item.setDefaultTextColor(Qt.black)  # Set text color to black
+        text_item.setPos(x - text_width / 2, y - text_height / 2)  # Position the text centered in the node
+        self.scene.addItem(text_item)  # Add the text item to the scene
+
+        # Draw connections to children
+        for child in node.children:
+            child_position = positions[child]
+            # Draw a line from current node to child node
+            self.scene.addLine(x, y + shape_height / 2,
+                               child_position.x(), child_position.y() - shape_height / 2,
+                               QPen(QColor(0, 128, 0), 2))  # Green edges with width 2
+            self._draw_tree(child, positions)  # Recursive call for children
+
+        # Draw connection to sibling
+        if node.sibling:
+            sibling_position = positions[node.sibling]
+            # Draw a line from current node to sibling node
+            self.scene.addLine(x + shape_width / 2, y,
+                               (sibling_position.x() - shape_width / 2) + 40, y,
+                               QPen(QColor(255, 69, 0), 2))  # Orange edges with width 2
+        return node.sibling  # Drawn next by the loop in _draw_tree
+
+class Cancelled(Exception):
+    """Raised inside a CompileWorker's task when the run was cancelled."""
+    pass
+
+
+class CompileWorker(QThread):
+    """
+    Runs task(progress) off the GUI thread. The task passes progress(done, total) to the
+    scanner or parser, which call it every few thousand lines or tokens; it emits the
+    percentage done and raises Cancelled once the GUI has requested an interruption.
+    Exactly one of succeeded (with the task's result), cancelled or failed is emitted.
+    """
+    progress = pyqtSignal(int)  # Percentage done
+    succeeded = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, task):
+        super().__init__()
+        self.task = task
+        self.percent = -1  # Last percentage emitted
+
+    def report(self, done, total):
+        if self.isInterruptionRequested():
+            raise Cancelled()
+        percent = done * 100 // total if total else 100
+        if percent != self.percent:
+            self.percent = percent
+            self.progress.emit(percent)
+
+    def run(self):
+        try:
+            result = self.task(self.report)
+        except Cancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.progress.emit(100)
+            self.succeeded.emit(result)
+
+
+# Define the main backend class for the application
+class Back_End_Class(QtWidgets.QWidget, Ui_MainWindow):
+    def __init__(self, main_window):
+        # Initialize the parent classes
+        QtWidgets.QWidget.__init__(self)
+        self.setupUi(main_window)  # Set up the UI elements from the generated GUI module
+        self.thread = {}  # Running CompileWorkers by operation, 'scan' or 'parse'
+        self.scanned_code = None  # Text of the last scan
+        self.incremental = None  # Tokens and tree of the last parse, updated in place on the next one
+        self.instrumentation = None  # Phase measurements of the last Scan or Parse
+        self.trace_memory = bool(os.environ.get('TINY_TRACE_MEMORY'))  # Also measure peak allocations (slower)
+        # Progress of the running Scan or Parse, shown at the right of the status bar
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.hide()
+        self.statusbar.addPermanentWidget(self.progress_bar)
+
+        # Connect buttons to their respective functions
+        self.scan.clicked.connect(self.Scan)
+        self.Browse.clicked.connect(self.browse_file)  # Connect the browse button to the browse function
+        self.parse.clicked.connect(self.parser)  # Connect the parse button to the parser function
+
+    def browse_file(self):
+        """Handles file selection and loads it into the input text area."""
+        options = QtWidgets.QFileDialog.Options()
+        # Open a file dialog to select a file
+        file_name, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            "Open Code File",
+            "",
+            "Text Files (*.txt);;All Files (*)",
+            options=options
+        )
+        if file_name:
+            # Check if the selected file has a .txt extension
+            if not file_name.lower().endswith('.txt'):
+                QMessageBox.warning(
+                    self,
+                    "File Type Error",
+                    "Please select a file with a .txt extension."
+                )
+                return  # Exit the method since the file is not a .txt file
+
+            try:
+                with open(file_name, 'r') as file:
+                    file_content = file.read()  # Read the content of the file
+                self.input.setPlainText(file_content)  # Set the content to the input text area
+                self.Browseline.setText(str(file_name))  # Display the file path
+            except Exception as e:
+                # Handle any errors that occur while opening the file
+                QMessageBox.critical(
+                    self,
+                    "File Error",
+                    f"An error occurred while opening the file:\n{e}"
+                )
+        else:
+            # Inform the user if no file was selected
+            QMessageBox.information(
+                self,
+                "No File Selected",
+                "No file was selected."
+            )
+
+    def Scan(self):
+        """Performs lexical analysis on the input code in the background; clicking again cancels it."""
+        if self._cancel('scan'):
+            return
+        user_input = self.input.toPlainText().splitlines()  # Get the input code as a list of lines
+        user_code = "\n".join(user_input)  # Join the lines back into a single string
+
+        # Check if the input code is empty
+        if not user_code.strip():
+            # Display an error message
+            QMessageBox.warning(
+                self,
+                "Input Error",
+                "No input provided. Please enter code in the input area or select a file."
+            )
+            return  # Exit the method early since there's nothing to scan
+
+        instrumentation = Instrumentation(self.trace_memory)
+
+        def scan(progress):
+            # Runs on the worker thread: scan, save the output file and format the token table
+            scanner = Scanner()
+            with instrumentation.phase('scan') as measurement:
+                scanner.scan_fast(user_code, progress)
+                measurement.count = len(scanner.tokens)
+            with instrumentation.phase('output') as measurement:
+                scanner.output()  # Save output to a file
+                measurement.count = len(scanner.tokens)
+
+            # Display tokens and errors in the QTextBrowser
+            output_content = []
+            output_content.append("Tokens:\n")
+            output_content.append(f"{'Line':<5} {'Token':<12} {'Type':<12}\n")
+            output_content.append(f"{'====':<5} {'====':<12} {'=====':<12}\n")
+            for line_number, token, token_type in scanner.tokens:
+                output_content.append(f"{line_number:<5} {token:<12} {token_type:<12}\n")
+
+            if scanner.errors:
+                output_content.append("\nErrors:\n")
+                for line_number, error in scanner.errors:
+                    output_content.append(f"Line {line_number}: {error}\n")
+            return scanner, output_content
+
+        def show(result):
+            # Back on the GUI thread once the scan is complete
+            self.scanner, output_content = result
+            self.scanned_code = user_code
+            # Join the content and display in the output text area
+            with instrumentation.phase('display', 'lines') as measurement:
+                self.output.setPlainText("".join(output_content))  # Assuming `output` is a QTextEdit in your UI
+                measurement.count = len(output_content)
+            self.instrumentation = instrumentation
+            self.statusbar.showMessage(instrumentation.summary())
+
+        self._start('scan', "Scanning", scan, show, self.scan)
+
+    def parser(self):
+        """Generates and displays the syntax tree, parsing in the background; clicking again cancels it."""
+        if self._cancel('parse'):
+            return
+        # Check if there are tokens available
+        if not hasattr(self, 'scanner') or not self.scanner.tokens:
+            QMessageBox.warning(
+                self,
+                "Parsing Error",
+                "No tokens available for parsing. Please perform scanning first."
+            )
+            return
+
+        if self.scanner.errors:
+            # If there are scanner errors, display an error message in the graphics view
+            drawer = SyntaxTreeDrawer(self.graphicsView, Node("no", "Rectangle"))
+            drawer.display_message(f"Scanner Error: {self.scanner.errors[0]}")
+            return
+
+        # Parse the scanned text. After the first parse only the statements around the lines
+        # changed since then are parsed again; errors are collected in one pass, not just the first
+        instrumentation = Instrumentation(self.trace_memory)
+        code = self.scanned_code
+        incremental = self.incremental
+        self.incremental = None  # The worker owns it now; a cancelled run leaves it unusable
+
+        def parse(progress):
+            # Runs on the worker thread
+            with instrumentation.phase('parse') as measurement:
+                if incremental is None:
+                    parser = IncrementalParser(code, progress)
+                else:
+                    parser = incremental
+                    parser.progress = progress
+                    parser.set_text(code)
+                measurement.count = parser.parsed_tokens
+            parser.progress = None
+            return parser
+
+        def show(parser):
+            # Back on the GUI thread: layout and rendering need the Qt scene
+            self.incremental = parser
+            # The parser recovers from syntax errors, so it always returns the (partial) tree
+            root = parser.program()
+            # Initialize the drawer with the graphics view and the parsed tree
+            drawer = SyntaxTreeDrawer(self.graphicsView, root, instrumentation)
+            # Check for parser errors
+            if not parser.errors:
+                # No errors, draw the syntax tree
+                drawer.draw_tree()
+            else:
+                # Display all error messages in the graphics view, one per line
+                drawer.display_message("\n".join(f"Error: {error}" for error in parser.errors))
+            # Show where the time went, e.g. "parse 2.0 ms (...) | layout 9.1 ms (...) | render 310.4 ms (...)"
+            self.instrumentation = instrumentation
+            summary = instrumentation.summary()
+            if parser.errors:
+                count = len(parser.errors)
+                summary = f"{count} syntax error{'s' if count > 1 else ''} | {summary}"
+            self.statusbar.showMessage(summary)
+
+        self._start('parse', "Parsing", parse, show, self.parse)
+
+    def _start(self, name, label, task, show, button):
+        """Runs task(progress) on a CompileWorker and hands its result to show() on the GUI thread."""
+        worker = CompileWorker(task)
+        self.thread[name] = worker
+        button_text = button.text()
+        button.setText("Cancel")  # Clicking the button again cancels the run
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.statusbar.showMessage(f"{label}...")
+        worker.progress.connect(self.progress_bar.setValue)
+        worker.succeeded.connect(show)
+        worker.cancelled.connect(lambda: self.statusbar.showMessage(f"{label} cancelled"))
+        worker.failed.connect(lambda message: self.statusbar.showMessage(f"{label} failed: {message}"))
+
+        def finish():
+            # The thread has stopped, whatever the outcome
+            del self.thread[name]
+            button.setText(button_text)
+            if not self.thread:
+                self.progress_bar.hide()
+            worker.deleteLater()
+
+        worker.finished.connect(finish)
+        worker.start()
+
+    def _cancel(self, name):
+        """Asks the running `name` worker to stop; returns False if none is running."""
+        worker = self.thread.get(name)
+        if worker is None:
+            return False
+        worker.requestInterruption()  # Honoured at the worker's next progress report
+        return True
+
+    def stop_workers(self):
+        """Cancels every running worker and waits until its thread has ended."""
+        workers = list(self.thread.values())
+        for worker in workers:
+            worker.requestInterruption()
+        for worker in workers:
+            worker.wait()  # Steps that report no progress, like writing the output file, still finish
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    """The main window; closing it stops a running Scan or Parse before its QThread is destroyed."""
+
+    def __init__(self):
+        super().__init__()
+        self.backend = Back_End_Class(self)  # Sets up the UI and handles its buttons
+
+    def closeEvent(self, event):
+        self.backend.stop_workers()
+        super().closeEvent(event)
+
+def main():
+    """Starts the GUI application."""
+    app = QtWidgets.QApplication(sys.argv)  # Create the main application
+    main_window = MainWindow()  # Create the main window, whose backend class sets up the UI
+    main_window.show()  # Show the main window
+    sys.exit(app.exec_())  # Start the event loop
+
+
+# Entry point of the application
+if __name__ == "__main__":
+    main()
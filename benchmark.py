@@ -0,0 +1,218 @@
+"""
+Benchmarks the compiler front end on generated (or given) TINY programs.
+
+Usage:
+    python benchmark.py [--lines N ...] [--seed S] [--depth D] [--expression-size K]
+                        [--comments P] [--invalid P] [-n RUNS] [--json FILE]
+                        [--compare FILE] [--draw-limit NODES] [--no-memory] [FILE ...]
+
+Every program is put through the phases separately: Scanner.scan, Parser.program,
+SyntaxTreeDrawer._calculate_positions (layout), SyntaxTreeDrawer.draw_tree (render)
+and Scanner.output. Each phase reports its best time over the runs, its throughput
+(tokens per second for scanning and output, nodes per second for the others) and,
+from one extra run under tracemalloc, its peak memory. Layout and render need PyQt5
+(they run on an offscreen platform) and are skipped without it, or when the tree has
+more than --draw-limit nodes. --json saves the results and --compare prints the change
+against an earlier results file.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from parser import Parser
+from program_generator import generate_program
+from scanner import Scanner
+
+PHASES = ('scan', 'parse', 'layout', 'render', 'output')
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def _drawing():
+    """Returns (QApplication, QGraphicsView, SyntaxTreeDrawer), or None without PyQt5."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication, QGraphicsView
+        from app import SyntaxTreeDrawer
+    except ImportError:
+        return None
+    application = QApplication.instance() or QApplication([])
+    return application, QGraphicsView, SyntaxTreeDrawer
+
+
+def _measure(work, runs, memory):
+    """Runs work() `runs` times; returns (best seconds, peak bytes of one traced run or None, last result)."""
+    best = None
+    result = None
+    for _ in range(runs):
+        result = None
+        gc.collect()
+        started = time.perf_counter()
+        result = work()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = work()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak, result
+
+
+def benchmark_program(text, runs=3, memory=True, draw_limit=20000):
+    """Times every phase on one program; returns a record with program statistics and phases."""
+    record = {'lines': text.count("\n"), 'bytes': len(text.encode()), 'phases': {}}
+    phases = record['phases']
+
+    def scan():
+        scanner = Scanner()
+        scanner.scan(text)
+        return scanner
+
+    seconds, peak, scanner = _measure(scan, runs, memory)
+    tokens = len(scanner.tokens)
+    record['tokens'] = tokens
+    record['scanner_errors'] = len(scanner.errors)
+    phases['scan'] = {'seconds': seconds, 'tokens_per_second': tokens / seconds if seconds else None, 'peak_bytes': peak}
+
+    def parse():
+        parser = Parser(scanner.tokens, recover=True)
+        return parser, parser.program()
+
+    seconds, peak, (parser, root) = _measure(parse, runs, memory)
+    nodes = len(parser.tree)
+    record['nodes'] = nodes
+    record['parser_errors'] = len(parser.errors)
+    phases['parse'] = {'seconds': seconds, 'nodes_per_second': nodes / seconds if seconds else None, 'peak_bytes': peak}
+
+    drawing = _drawing() if root is not None else None
+    if drawing is None:
+        reason = 'no tree' if root is None else 'PyQt5 is not installed'
+    elif nodes > draw_limit:
+        reason = f'more than {draw_limit} nodes'
+    else:
+        reason = None
+    if reason is None:
+        _, QGraphicsView, SyntaxTreeDrawer = drawing
+        view = QGraphicsView()
+        drawer = SyntaxTreeDrawer(view, root)
+
+        def layout():
+            positions = {}
+            drawer._calculate_positions(root, 0, 0, positions)
+            return positions
+
+        seconds, peak, _ = _measure(layout, runs, memory)
+        phases['layout'] = {'seconds': seconds, 'nodes_per_second': nodes / seconds if seconds else None,
+                            'peak_bytes': peak}
+        seconds, peak, _ = _measure(drawer.draw_tree, runs, memory)
+        phases['render'] = {'seconds': seconds, 'nodes_per_second': nodes / seconds if seconds else None,
+                            'peak_bytes': peak}
+        drawer.clear_scene()
+    else:
+        phases['layout'] = phases['render'] = {'skipped': reason}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tokens.txt')
+        seconds, peak, _ = _measure(lambda: scanner.output(path), runs, memory)
+        record['output_bytes'] = os.path.getsize(path)
+    phases['output'] = {'seconds': seconds, 'tokens_per_second': tokens / seconds if seconds else None,
+                        'peak_bytes': peak}
+    return record
+
+
+def _format(record):
+    lines = [f"{record['name']}: {record['lines']} lines, {record['tokens']} tokens, {record['nodes']} nodes"]
+    for phase in PHASES:
+        result = record['phases'][phase]
+        if 'skipped' in result:
+            lines.append(f"  {phase:<7} skipped ({result['skipped']})")
+            continue
+        if 'tokens_per_second' in result:
+            rate = f"{result['tokens_per_second'] / 1e6:7.2f} M tokens/s"
+        else:
+            rate = f"{result['nodes_per_second'] / 1e6:7.2f} M nodes/s "
+        peak = f"{result['peak_bytes'] / 2 ** 20:8.1f} MiB peak" if result['peak_bytes'] is not None else ''
+        lines.append(f"  {phase:<7} {result['seconds'] * 1000:10.1f} ms  {rate}  {peak}")
+    return "\n".join(lines)
+
+
+def _compare(records, path):
+    """Prints the time ratio of every phase against the same program in an earlier results file."""
+    with open(path) as file:
+        earlier = {record['name']: record for record in json.load(file)['programs']}
+    for record in records:
+        old = earlier.get(record['name'])
+        if old is None:
+            continue
+        changes = []
+        for phase in PHASES:
+            new_seconds = record['phases'][phase].get('seconds')
+            old_seconds = old['phases'].get(phase, {}).get('seconds')
+            if new_seconds and old_seconds:
+                changes.append(f"{phase} {old_seconds / new_seconds:.2f}x")
+        print(f"{record['name']} vs {path}: " + ", ".join(changes) + " (above 1x is faster)")
+
+
+def main(argv=None):
+    """Runs the benchmarks and prints, and optionally saves, the results."""
+    arg_parser = argparse.ArgumentParser(description="Benchmark scanning, parsing, drawing and output.")
+    arg_parser.add_argument('files', nargs='*', help="TINY programs to use instead of generated ones")
+    arg_parser.add_argument('--lines', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                            help="sizes of the generated programs")
+    arg_parser.add_argument('--seed', type=int, default=0, help="generator seed")
+    arg_parser.add_argument('--depth', type=int, default=3, help="deepest nesting of if/repeat blocks")
+    arg_parser.add_argument('--expression-size', type=int, default=3, help="average operators per expression")
+    arg_parser.add_argument('--comments', type=float, default=0.1, help="chance of a comment on a line")
+    arg_parser.add_argument('--invalid', type=float, default=0.0, help="chance of a syntax error in a statement")
+    arg_parser.add_argument('-n', '--runs', type=int, default=3, help="timed runs per phase; the best one counts")
+    arg_parser.add_argument('--draw-limit', type=int, default=20000, help="largest tree to lay out and render")
+    arg_parser.add_argument('--no-memory', action='store_true', help="skip the traced runs measuring peak memory")
+    arg_parser.add_argument('--json', metavar='FILE', help="save the results as JSON")
+    arg_parser.add_argument('--compare', metavar='FILE', help="compare with results saved by --json")
+    args = arg_parser.parse_args(argv)
+
+    if args.files:
+        programs = []
+        for path in args.files:
+            with open(path) as file:
+                programs.append((path, file.read()))
+    else:
+        options = dict(seed=args.seed, depth=args.depth, expression_size=args.expression_size,
+                       comments=args.comments, invalid=args.invalid)
+        programs = [(f"generated-{lines}", generate_program(lines=lines, **options)) for lines in args.lines]
+
+    records = []
+    for name, text in programs:
+        record = {'name': name}
+        record.update(benchmark_program(text, args.runs, not args.no_memory, args.draw_limit))
+        records.append(record)
+        print(_format(record))
+
+    if args.json:
+        results = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'options': {key: value for key, value in vars(args).items() if key not in ('json', 'compare')},
+            'programs': records,
+        }
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        _compare(records, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Headless batch compiler: scans and parses many TINY programs in a process pool.
+
+Usage:
+    python cli.py [-o OUTPUT_DIR] [-j WORKERS] [--fail-fast] [--trace EVENTS]
+                  [--cache DIR [--cache-size MB]] [--profile [--profile-memory]] PATH [PATH ...]
+
+Each PATH is a source file or a directory searched recursively for *.txt and *.tiny
+files. For every program the output directory receives <name>.tokens.txt (the scanner
+output), <name>.tree.txt (the syntax tree) and, when something went wrong,
+<name>.diagnostics.txt, which also lists the semantic warnings (see semantic.py) of programs
+that parsed; summary.json aggregates all of them. <name> is the program's path below its
+PATH with the extension kept (p.txt.tokens.txt), numbered when two programs would share it. The parser reports every
+syntax error of a program in one pass; --fail-fast stops at the first. With --trace the last
+EVENTS parser trace events of every program that fails to parse go to <name>.trace.txt.
+With --cache, scan and parse results are kept in DIR (see compile_cache.py) and unchanged
+programs skip both on later runs. With --profile every result in summary.json gets the
+timings of its phases (see instrumentation.py) and the totals per phase are printed.
+
+Exit codes: 0 when every program compiled, 1 when any program has scanner or parser
+errors, 2 when an input could not be read or no input was found.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compile_cache import CompileCache, compile_source
+from instrumentation import Instrumentation
+from scanner import Scanner
+from semantic import analyze
+from tracing import RingBufferSink, Tracer
+
+SOURCE_EXTENSIONS = ('.txt', '.tiny')  # Files picked up when a directory is given
+
+# Exit codes
+EXIT_OK = 0
+EXIT_ERRORS = 1
+EXIT_FAILURE = 2
+
+_caches = {}  # Open caches of this worker process, so their size estimates persist between files
+
+
+def collect_sources(paths):
+    """
+    Expands files and directories into (source path, output name) pairs. Output names keep
+    the source's extension, so p.txt and p.tiny do not share outputs, and a name that is
+    already taken, e.g. by a p.txt of another argument, gets a numeric suffix (p.txt.2).
+    """
+    sources = []
+    taken = set()
+    for path in paths:
+        if os.path.isdir(path):
+            found = []
+            for directory, subdirectories, files in os.walk(path):
+                subdirectories.sort()  # Visit directories in a stable order
+                for file_name in sorted(files):
+                    if file_name.lower().endswith(SOURCE_EXTENSIONS):
+                        source = os.path.join(directory, file_name)
+                        # Mirror the layout below the given directory in the output directory
+                        found.append((source, os.path.relpath(source, path)))
+        else:
+            found = [(path, os.path.basename(path))]
+        for source, name in found:
+            unique, index = name, 1
+            while os.path.normcase(unique) in taken:
+                index += 1
+                unique = f"{name}.{index}"
+            taken.add(os.path.normcase(unique))
+            sources.append((source, unique))
+    return sources
+
+
+def _open_cache(directory, max_bytes):
+    """Returns this process's CompileCache for a directory."""
+    cache = _caches.get(directory)
+    if cache is None:
+        cache = _caches[directory] = CompileCache(directory, max_bytes)
+    return cache
+
+
+def compile_file(source, output_base, trace_events=0, fail_fast=False, cache_dir=None, cache_bytes=None,
+                 profile=False, trace_memory=False):
+    """
+    Scans and parses one program, writes its outputs and returns a summary record.
+    When trace_events is set the parser records its last trace events for post-mortem use.
+    Unless fail_fast is set the parser recovers from syntax errors and reports all of them.
+    With cache_dir, results are looked up in and stored to a CompileCache there. With
+    profile the record gets the phase timings under 'phases', with peak allocations if
+    trace_memory is set too.
+    """
+    result = {
+        'file': source,
+        'output': output_base,
+        'status': 'ok',
+        'tokens': 0,
+        'scanner_errors': [],
+        'parser_errors': [],
+        'semantic_warnings': [],
+    }
+    started = time.perf_counter()
+    try:
+        with open(source, 'r', encoding='utf-8') as file:
+            code = file.read()
+    except (OSError, UnicodeDecodeError) as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+        return result
+
+    os.makedirs(os.path.dirname(output_base) or '.', exist_ok=True)
+
+    # Scan the program and parse it if the scanner accepted it, as the GUI does, or load both from the cache
+    sink = RingBufferSink(trace_events) if trace_events else None
+    cache = _open_cache(cache_dir, cache_bytes) if cache_dir else None
+    try:
+        instrumentation = Instrumentation(trace_memory, enabled=profile)
+        compiled = compile_source(code, cache, recover=not fail_fast, tracer=Tracer(sink) if sink else None,
+                                  instrumentation=instrumentation)
+    except Exception as e:
+        # Programs the compiler cannot handle at all
+        result['status'] = 'failed'
+        result['error'] = f"Compiler failure: {e!r}"
+        return result
+    result['cached'] = compiled.cached
+
+    # Save the token table in the scanner's output format
+    scanner = Scanner()
+    scanner.tokens, scanner.errors = compiled.tokens, compiled.scanner_errors
+    with instrumentation.phase('output') as measurement:
+        scanner.output(output_base + '.tokens.txt')
+        measurement.count = len(compiled.tokens)
+    result['tokens'] = len(compiled.tokens)
+    result['scanner_errors'] = [f"Line {line_number}: {error}" for line_number, error in compiled.scanner_errors]
+    result['parser_errors'] = compiled.parser_errors
+
+    if compiled.scanner_errors:
+        result['status'] = 'scanner-error'
+    elif compiled.parser_errors:
+        result['status'] = 'parser-error'
+        if sink:
+            with open(output_base + '.trace.txt', 'w') as file:
+                sink.dump(file)
+    else:
+        with instrumentation.phase('tree output', 'nodes') as measurement, open(output_base + '.tree.txt', 'w') as file:
+            file.write(str(compiled.root) if compiled.root else '')
+            measurement.count = len(compiled.tree)
+        # Warnings only; they do not change the status
+        result['semantic_warnings'] = analyze(compiled.root)[1]
+
+    if result['scanner_errors'] or result['parser_errors'] or result['semantic_warnings']:
+        with open(output_base + '.diagnostics.txt', 'w') as file:
+            for message in result['scanner_errors'] + result['parser_errors'] + result['semantic_warnings']:
+                file.write(f"{source}: {message}\n")
+
+    if profile:
+        result['phases'] = instrumentation.report()
+    result['seconds'] = round(time.perf_counter() - started, 6)
+    return result
+
+
+def _phase_totals(results):
+    """Sums the phase timings of all results into one line, e.g. "scan 1.20 s (3.1M tokens/s) | ..."."""
+    totals = {}  # Phase -> [wall seconds, count, unit]
+    for result in results:
+        for phase in result.get('phases', {}).get('phases', []):
+            total = totals.setdefault(phase['phase'], [0.0, 0, phase['unit']])
+            total[0] += phase['wall_seconds']
+            total[1] += phase['count'] or 0
+    parts = []
+    for name, (seconds, count, unit) in totals.items():
+        rate = f" ({count / seconds / 1e6:.1f}M {unit}/s)" if seconds > 0 and count else ""
+        parts.append(f"{name} {seconds:.2f} s{rate}")
+    return " | ".join(parts)
+
+
+def _compile_job(job):
+    """Unpacks a compile_file argument tuple for the process pool."""
+    return compile_file(*job)
+
+
+def main(argv=None):
+    """Runs the batch compiler and returns the process exit code."""
+    arg_parser = argparse.ArgumentParser(description="Scan and parse TINY programs in batch.")
+    arg_parser.add_argument('paths', nargs='+', help="source files or directories")
+    arg_parser.add_argument('-o', '--output-dir', default='tiny_output', help="where results are written")
+    arg_parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: CPU count)")
+    arg_parser.add_argument('--fail-fast', action='store_true', help="stop parsing each program at its first syntax error")
+    arg_parser.add_argument('--trace', type=int, default=0, metavar='EVENTS',
+                            help="keep the last EVENTS parser events and dump them for programs that fail to parse")
+    arg_parser.add_argument('--cache', metavar='DIR', help="reuse scan and parse results of unchanged programs from DIR")
+    arg_parser.add_argument('--cache-size', type=int, default=256, metavar='MB', help="size limit of the cache (default: 256)")
+    arg_parser.add_argument('--profile', action='store_true', help="record the time of every phase of every program")
+    arg_parser.add_argument('--profile-memory', action='store_true', help="with --profile, also record peak allocations")
+    args = arg_parser.parse_args(argv)
+
+    sources = collect_sources(args.paths)
+    missing = [source for source, _ in sources if not os.path.isfile(source)]
+    for source in missing:
+        print(f"{source}: no such file", file=sys.stderr)
+    sources = [(source, name) for source, name in sources if source not in missing]
+    if not sources:
+        print("No input files found.", file=sys.stderr)
+        return EXIT_FAILURE
+
+    jobs = [(source, os.path.join(args.output_dir, name), args.trace, args.fail_fast, args.cache,
+             args.cache_size * 1024 * 1024, args.profile, args.profile_memory) for source, name in sources]
+    workers = args.jobs or os.cpu_count() or 1
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Hand out files in batches so thousands of small programs do not cost one round trip each
+        results = list(pool.map(_compile_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    # Aggregate summary
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+        if result['status'] != 'ok':
+            messages = result['scanner_errors'] + result['parser_errors'] + [result.get('error', '')]
+            print(f"{result['file']}: {result['status']}: {next(m for m in messages if m)}")
+    summary = {
+        'files': len(results),
+        'statuses': counts,
+        'cache_hits': sum(1 for result in results if result.get('cached')),
+        'tokens': sum(result['tokens'] for result in results),
+        'missing': missing,
+        'seconds': round(time.perf_counter() - started, 6),
+        'results': results,
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    with open(os.path.join(args.output_dir, 'summary.json'), 'w') as file:
+        json.dump(summary, file, indent=2)
+    print(f"{len(results)} files: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+    if args.profile:
+        print("phases: " + _phase_totals(results))
+
+    if missing or counts.get('failed'):
+        return EXIT_FAILURE
+    if len(results) != counts.get('ok', 0):
+        return EXIT_ERRORS
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
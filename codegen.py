@@ -0,0 +1,199 @@
+"""
+Code generation from a TINY syntax tree to Tiny Machine assembly (see tm.py).
+
+The generated code follows the conventions of the classic TINY code generator:
+register 0 (ac) and 1 (ac1) are accumulators, register 5 (gp) points at the
+variables, which live at the bottom of data memory, and register 6 (mp) at the top
+of data memory, below which temporaries are spilled. The standard prelude loads mp
+from location 0. Unlike the classic generator, the left operand of an operator whose
+right operand is a variable or a constant is never saved, the first temporaries go
+to registers 2 to 4 before anything is spilled, and if/repeat conditions that are
+comparisons jump on the difference directly instead of first computing 1 or 0.
+Jumps are pc-relative and forward ones are backpatched once their target is known.
+"""
+from collections import namedtuple
+
+from parser import ASSIGN_NODE, CONST_NODE, ID_NODE, IF_NODE, NO_NODE, READ_NODE, REPEAT_NODE, WRITE_NODE
+from tm import DADDR_SIZE, PC, Instruction, format_assembly
+
+AC, AC1, GP, MP = 0, 1, 5, 6  # Accumulators, global pointer, memory pointer
+TEMPORARY_REGISTERS = (2, 3, 4)  # Hold the first temporaries before they are spilled below mp
+ARITHMETIC = {'+': 'ADD', '-': 'SUB', '*': 'MUL', '/': 'DIV', '<': 'SUB', '=': 'SUB'}
+# Jump taken when a condition is false, by what ac holds: a - b for '<' and '=', else the value
+JUMP_IF_FALSE = {'<': 'JGE', '=': 'JNE', None: 'JEQ'}
+
+# names lists the variables by address; data_size is the data memory the code needs
+TMCode = namedtuple('TMCode', ['instructions', 'names', 'data_size'])
+
+
+def generate_code(root):
+    """
+    Generates TM code for the NodeView returned by Parser.program() (or None for an
+    empty program). Like the parser, the generator keeps its work on an explicit stack.
+    """
+    instructions = []
+    names = []
+    addresses = {}
+    deepest_spill = 0
+
+    def emit(opcode, r, s, t, comment=''):
+        instructions.append(Instruction(opcode, r, s, t, comment))
+        return len(instructions) - 1
+
+    def patch(location, opcode, r, target, comment=''):
+        # A jump relative to the pc, which already points past the jump when it executes
+        instructions[location] = Instruction(opcode, r, PC, target - (location + 1), comment)
+
+    def address(name):
+        location = addresses.get(name)
+        if location is None:
+            location = addresses[name] = len(names)
+            names.append(name)
+        return location
+
+    emit('LD', MP, AC, 0, 'load maxaddress from location 0')
+    emit('ST', AC, AC, 0, 'clear location 0')
+    if root is None:
+        emit('HALT', 0, 0, 0)
+        return TMCode(instructions, names, DADDR_SIZE)
+    tree = root.tree
+    kinds, first_child, next_child, sibling = tree.kinds, tree.first_child, tree.next_child, tree.sibling
+
+    def load_leaf(node, register):
+        if kinds[node] == CONST_NODE:
+            emit('LDC', register, 0, int(tree.value(node)), 'load const')
+        else:
+            name = tree.value(node)
+            emit('LD', register, GP, address(name), f'load id value {name}')
+
+    def is_leaf(node):
+        return kinds[node] in (CONST_NODE, ID_NODE)
+
+    # Work items, done in order: ('chain', statement) generates a statement and its siblings;
+    # ('exp', node, depth, condition) an expression into ac, where depth counts the temporaries
+    # in use and a comparison used as a condition leaves a - b in ac rather than 1 or 0;
+    # ('save', depth) keeps ac as temporary number `depth`; ('op', node, depth, condition)
+    # combines a saved left operand (or, at depth None, a right leaf loaded into ac1) with ac.
+    # Jump locations travel in one-element lists: ('hole', cell) reserves a jump to be
+    # backpatched, ('else', cell, condition) and ('end', cell) patch the jumps of an if,
+    # ('label', cell) records a loop start and ('loop', cell, condition) jumps back to it
+    work = [('chain', root.index)]
+    while work:
+        item = work.pop()
+        action = item[0]
+        if action == 'exp':
+            node, depth, condition = item[1], item[2], item[3]
+            if is_leaf(node):
+                load_leaf(node, AC)
+                continue
+            left = first_child[node]
+            right = next_child[left]
+            if is_leaf(right):
+                work.append(('op', node, None, condition))
+                work.append(('exp', left, depth, False))
+            else:
+                work.append(('op', node, depth, condition))
+                work.append(('exp', right, depth + 1, False))
+                work.append(('save', depth))
+                work.append(('exp', left, depth, False))
+        elif action == 'save':
+            depth = item[1]
+            if depth < len(TEMPORARY_REGISTERS):
+                emit('LDA', TEMPORARY_REGISTERS[depth], AC, 0, 'op: keep left')
+            else:
+                spill = depth - len(TEMPORARY_REGISTERS)
+                deepest_spill = max(deepest_spill, spill + 1)
+                emit('ST', AC, MP, -spill, 'op: push left')
+        elif action == 'op':
+            node, depth, condition = item[1], item[2], item[3]
+            operator = tree.value(node)
+            opcode = ARITHMETIC[operator]
+            if depth is None:
+                load_leaf(next_child[first_child[node]], AC1)
+                emit(opcode, AC, AC, AC1, f'op {operator}')
+            elif depth < len(TEMPORARY_REGISTERS):
+                emit(opcode, AC, TEMPORARY_REGISTERS[depth], AC, f'op {operator}')
+            else:
+                emit('LD', AC1, MP, -(depth - len(TEMPORARY_REGISTERS)), 'op: load left')
+                emit(opcode, AC, AC1, AC, f'op {operator}')
+            if operator in ('<', '=') and not condition:
+                # Turn a - b into 1 or 0
+                emit('JLT' if operator == '<' else 'JEQ', AC, PC, 2, 'br if true')
+                emit('LDC', AC, 0, 0, 'false case')
+                emit('LDA', PC, PC, 1, 'unconditional jmp')
+                emit('LDC', AC, 0, 1, 'true case')
+        elif action == 'chain':
+            node = item[1]
+            if node == NO_NODE:
+                continue
+            work.append(('chain', sibling[node]))
+            kind = kinds[node]
+            if kind == ASSIGN_NODE:
+                work.append(('store', node))
+                work.append(('exp', first_child[node], 0, False))
+            elif kind == READ_NODE:
+                name = tree.value(node)
+                emit('IN', AC, 0, 0, 'read integer value')
+                emit('ST', AC, GP, address(name), f'read: store value {name}')
+            elif kind == WRITE_NODE:
+                work.append(('write',))
+                work.append(('exp', first_child[node], 0, False))
+            elif kind == IF_NODE:
+                test = first_child[node]
+                then_part = next_child[test]
+                else_part = next_child[then_part] if then_part != NO_NODE else NO_NODE
+                to_else, to_end = [None], [None]
+                condition = _comparison(tree, test)
+                if else_part != NO_NODE:
+                    work.append(('end', to_end))
+                    work.append(('chain', else_part))
+                    work.append(('else', to_else, condition))
+                    work.append(('hole', to_end))
+                else:
+                    work.append(('else', to_else, condition))
+                work.append(('chain', then_part))
+                work.append(('hole', to_else))
+                work.append(('exp', test, 0, True))
+            elif kind == REPEAT_NODE:
+                body = first_child[node]
+                test = next_child[body]
+                start = [None]
+                work.append(('loop', start, _comparison(tree, test)))
+                work.append(('exp', test, 0, True))
+                work.append(('chain', body))
+                work.append(('label', start))
+        elif action == 'store':
+            name = tree.value(item[1])
+            emit('ST', AC, GP, address(name), f'assign: store value {name}')
+        elif action == 'write':
+            emit('OUT', AC, 0, 0, 'write ac')
+        elif action == 'hole':
+            item[1][0] = emit('HALT', 0, 0, 0, 'jump: backpatched')
+        elif action == 'else':
+            patch(item[1][0], JUMP_IF_FALSE[item[2]], AC, len(instructions), 'if: jmp to else')
+        elif action == 'end':
+            # The jump over the else part is unconditional: pc = pc + d
+            location = item[1][0]
+            instructions[location] = Instruction('LDA', PC, PC, len(instructions) - (location + 1), 'jmp to end')
+        elif action == 'label':
+            item[1][0] = len(instructions)
+        else:  # 'loop'
+            location = emit('HALT', 0, 0, 0)
+            patch(location, JUMP_IF_FALSE[item[2]], AC, item[1][0], 'repeat: jmp back to body')
+    emit('HALT', 0, 0, 0)
+    data_size = max(DADDR_SIZE, len(names) + deepest_spill + 1)
+    return TMCode(instructions, names, data_size)
+
+
+def _comparison(tree, node):
+    """The operator of a condition that is a comparison, else None."""
+    if tree.kinds[node] not in (CONST_NODE, ID_NODE):
+        operator = tree.value(node)
+        if operator in ('<', '='):
+            return operator
+    return None
+
+
+def assembly(root, title='TINY Compilation to TM Code'):
+    """Generates TM code for a parsed program and returns it as assembly text."""
+    return format_assembly(generate_code(root).instructions, title)
@@ -0,0 +1,278 @@
+"""
+Persistent on-disk cache of scan and parse results.
+
+Entries are keyed by a SHA-256 of the source text, the parse mode and the compiler version,
+a fingerprint of the modules the results depend on (scanner.py, parser.py, tracing.py and
+this one) and the Python build, so changing the compiler invalidates every entry. Each
+entry is one file holding the token stream, the scanner and parser errors and the
+SyntaxTree columns, marshalled and zlib-compressed after a short header; entries end up
+smaller than a fifth of the uncompressed columns.
+
+Several processes may share one cache directory: entries are written to a temporary file
+and renamed into place, so readers only ever see complete entries, and a damaged entry is
+treated as a miss. A hit refreshes the entry's modification time; once the cache grows past
+its size limit the least recently used entries are evicted.
+"""
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from collections import namedtuple
+
+import parser
+import scanner
+import tracing
+from instrumentation import Instrumentation
+from parser import Parser, ParserError, SyntaxTree
+from scanner import KIND_CODES, TOKEN_KINDS, Scanner
+
+
+# Sources whose changes can change a cached result: the scanner, the parser, the tracing
+# hooks the parser installs and this module, which decides what an entry holds
+COMPILER_SOURCES = (scanner.__file__, parser.__file__, tracing.__file__, __file__)
+
+
+def _compiler_version():
+    """Fingerprints the compiler sources and the Python build."""
+    digest = hashlib.sha256(f"{sys.version}|{sys.byteorder}|{marshal.version}".encode())
+    for path in COMPILER_SOURCES:
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+COMPILER_VERSION = _compiler_version()
+MAGIC = b'TINYCC1\n'  # Header of every entry file
+TEMP_PREFIX = '.tmp-'  # Entries being written; never read
+STALE_TEMP_SECONDS = 3600  # Temporary files older than this were left by a crashed writer
+
+# Everything a compile produced. tokens are (line_number, token, token_type) tuples; tree and
+# root are None when scanner errors kept the parser from running, and root is also None when
+# no statement could be parsed. cached tells whether the result came from the cache.
+CompileResult = namedtuple('CompileResult', ['tokens', 'scanner_errors', 'parser_errors', 'tree', 'root', 'cached'])
+
+
+def compile_source(source, cache=None, recover=True, tracer=None, instrumentation=None):
+    """
+    Scans and parses `source` like the GUI and the batch compiler do (the parser only
+    runs when the scanner found no errors) and returns a CompileResult. With a cache, a
+    hit skips scanning and parsing entirely and a miss stores the new result. A tracer
+    needs a real parse, so it bypasses cache lookups. An Instrumentation records the
+    'cache', 'scan' and 'parse' phases.
+    """
+    if instrumentation is None:
+        instrumentation = Instrumentation(enabled=False)
+    if cache is not None and tracer is None:
+        with instrumentation.phase('cache') as measurement:
+            result = cache.get(source, recover)
+            measurement.count = len(result.tokens) if result is not None else 0
+        if result is not None:
+            return result
+
+    lexer = Scanner()
+    with instrumentation.phase('scan') as measurement:
+        lexer.scan_fast(source)
+        measurement.count = len(lexer.tokens)
+    parser_errors = []
+    tree = root = None
+    if not lexer.errors:
+        with instrumentation.phase('parse') as measurement:
+            syntax = Parser(lexer.tokens, tracer, recover=recover)
+            try:
+                root = syntax.program()
+            except ParserError:
+                pass  # Fail-fast mode; the error is in syntax.errors
+            measurement.count = len(lexer.tokens)
+        parser_errors = list(syntax.errors)
+        tree = syntax.tree
+    result = CompileResult(lexer.tokens, list(lexer.errors), parser_errors, tree, root, False)
+
+    if cache is not None:
+        cache.put(source, recover, result)
+    return result
+
+
+def encode_result(result):
+    """Serializes a CompileResult into the bytes of a cache entry."""
+    lexeme_codes = {}  # Interned lexemes
+    lines = array('I')
+    kinds = array('B')
+    lexemes = array('I')
+    for line_number, token, token_type in result.tokens:
+        code = lexeme_codes.get(token)
+        if code is None:
+            code = lexeme_codes[token] = len(lexeme_codes)
+        lines.append(line_number)
+        kinds.append(KIND_CODES[token_type])
+        lexemes.append(code)
+
+    tree = result.tree
+    if tree is not None:
+        tree_fields = (tree.kinds.tobytes(), tree.values.tobytes(), tree.lines.tobytes(),
+                       tree.first_child.tobytes(), tree.next_child.tobytes(), tree.sibling.tobytes(),
+                       tree.names, result.root.index if result.root is not None else -1)
+    else:
+        tree_fields = None
+    payload = marshal.dumps((
+        lines.tobytes(), kinds.tobytes(), lexemes.tobytes(), list(lexeme_codes),
+        [tuple(error) for error in result.scanner_errors], result.parser_errors, tree_fields,
+    ))
+    return MAGIC + zlib.compress(payload, 1)  # The fastest level already removes most of the array padding
+
+
+def decode_result(data):
+    """Rebuilds a CompileResult from the bytes of a cache entry; raises ValueError if they are damaged."""
+    if not data.startswith(MAGIC):
+        raise ValueError("not a compile cache entry")
+    try:
+        (line_bytes, kind_bytes, lexeme_bytes, names, scanner_errors, parser_errors,
+         tree_fields) = marshal.loads(zlib.decompress(data[len(MAGIC):]))
+    except (zlib.error, EOFError, TypeError) as e:
+        raise ValueError(f"damaged compile cache entry: {e}") from e
+
+    lines, kinds, lexemes = array('I'), array('B'), array('I')
+    lines.frombytes(line_bytes)
+    kinds.frombytes(kind_bytes)
+    lexemes.frombytes(lexeme_bytes)
+    tokens = [(line_number, names[code], TOKEN_KINDS[kind])
+              for line_number, kind, code in zip(lines, kinds, lexemes)]
+
+    tree = root = None
+    if tree_fields is not None:
+        tree = SyntaxTree()
+        columns = (tree.kinds, tree.values, tree.lines, tree.first_child, tree.next_child, tree.sibling)
+        for column, column_bytes in zip(columns, tree_fields):
+            column.frombytes(column_bytes)
+        tree.names = tree_fields[6]
+        tree.name_codes = {name: code for code, name in enumerate(tree.names)}
+        if tree_fields[7] >= 0:
+            root = tree.node(tree_fields[7])
+    return CompileResult(tokens, scanner_errors, parser_errors, tree, root, True)
+
+
+class CompileCache:
+    """A size-bounded directory of compile results shared safely between processes."""
+
+    RESCAN_INTERVAL = 256  # Puts between re-measuring the directory, to notice other processes' entries
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # Estimated total size of the entries, measured on the first put
+        self._puts = 0
+
+    def key(self, source, recover):
+        """Returns the entry key of a source text compiled in the given mode."""
+        digest = hashlib.sha256(f"{COMPILER_VERSION}|{'recover' if recover else 'fail-fast'}|".encode())
+        digest.update(source.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        # Entries are spread over 256 subdirectories to keep each directory small
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, source, recover=True):
+        """Returns the cached CompileResult of `source`, or None on a miss."""
+        path = self._path(self.key(source, recover))
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            result = decode_result(data)
+        except (ValueError, IndexError, KeyError, TypeError):
+            # A damaged entry (e.g. after a crash) is dropped and recompiled
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # Mark the entry as recently used
+        except OSError:
+            pass  # Evicted by another process meanwhile; the result is still good
+        self.hits += 1
+        return result
+
+    def put(self, source, recover, result):
+        """Stores a CompileResult atomically, evicting old entries if the cache is too big."""
+        data = encode_result(result)
+        path = self._path(self.key(source, recover))
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            descriptor, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=os.path.dirname(path))
+        except OSError:
+            return  # A cache that cannot be written only costs speed
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, path)  # Atomic: readers see the old entry, no entry or the new one
+        except OSError:
+            self._remove(temp_path)
+            return
+
+        self._puts += 1
+        if self._size is None or self._puts % self.RESCAN_INTERVAL == 0:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_bytes=None):
+        """
+        Removes least recently used entries until the cache holds at most target_bytes,
+        by default 90% of max_bytes so that evictions do not run on every put.
+        """
+        if target_bytes is None:
+            target_bytes = self.max_bytes * 9 // 10
+        entries = sorted(self._entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= target_bytes:
+                break
+            self._remove(path)
+            size -= entry_size
+        self._size = size
+
+    def clear(self):
+        """Removes every entry."""
+        self.evict(0)
+
+    def _entries(self):
+        """Returns (modification time, size, path) of every entry; removes stale temporary files."""
+        entries = []
+        now = time.time()
+        try:
+            subdirectories = [entry.path for entry in os.scandir(self.directory) if entry.is_dir()]
+        except OSError:
+            return entries
+        for subdirectory in subdirectories:
+            try:
+                files = list(os.scandir(subdirectory))
+            except OSError:
+                continue
+            for entry in files:
+                try:
+                    status = entry.stat()
+                except OSError:
+                    continue  # Removed by another process
+                if entry.name.startswith(TEMP_PREFIX):
+                    if now - status.st_mtime > STALE_TEMP_SECONDS:
+                        self._remove(entry.path)
+                    continue
+                entries.append((status.st_mtime, status.st_size, entry.path))
+        return entries
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Already removed by another process
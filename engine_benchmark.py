@@ -0,0 +1,177 @@
+"""
+Compares the speed of the ways to run a TINY program against a plain tree walk.
+
+Usage:
+    python engine_benchmark.py [-n RUNS] [--size N] [FILE ...]
+
+Each program (built-in loop-heavy ones by default, or the given files) is run by
+walk(), a straightforward recursive evaluator over the syntax tree that serves as the
+reference, by the bytecode VM (vm.py), by the Tiny Machine simulator running generated
+code (codegen.py, tm.py) and as Python (pycompiler.py). Every engine has to produce
+the reference's output; the report gives the best time of each and its speedup.
+"""
+import argparse
+import io
+import sys
+import time
+
+import pycompiler
+import vm
+from codegen import generate_code
+from parser import ASSIGN_NODE, CONST_NODE, ID_NODE, IF_NODE, NO_NODE, READ_NODE, WRITE_NODE, Parser
+from scanner import Scanner
+from tm import TM
+
+# Loop-heavy programs reading one size parameter
+PROGRAMS = {
+    'sum of squares': (
+        "read n; s := 0;\n"
+        "repeat s := s + n * n; n := n - 1 until n = 0;\n"
+        "write s"
+    ),
+    'nested loops': (
+        "read n; s := 0; i := n;\n"
+        "repeat j := n;\n"
+        "  repeat if j < i then s := s + i * j / 3 else s := s - 1 end; j := j - 1 until j = 0;\n"
+        "  i := i - 1\n"
+        "until i = 0;\n"
+        "write s"
+    ),
+    'collatz': (
+        "read n; longest := 0;\n"
+        "repeat x := n; length := 0;\n"
+        "  repeat if x - x / 2 * 2 = 0 then x := x / 2 else x := 3 * x + 1 end; length := length + 1 until x = 1;\n"
+        "  if longest < length then longest := length end; n := n - 1\n"
+        "until n = 1;\n"
+        "write longest"
+    ),
+}
+SIZES = {'sum of squares': 200000, 'nested loops': 300, 'collatz': 3000}
+
+
+def walk(root, input, output):
+    """The reference: evaluates the syntax tree directly, statement by statement."""
+    tree = root.tree
+    kinds, first_child, next_child, sibling = tree.kinds, tree.first_child, tree.next_child, tree.sibling
+    variables = {}
+    values = iter(input)
+
+    def evaluate(node):
+        kind = kinds[node]
+        if kind == ID_NODE:
+            return variables.get(tree.value(node), 0)
+        if kind == CONST_NODE:
+            return int(tree.value(node))
+        left = first_child[node]
+        a = evaluate(left)
+        b = evaluate(next_child[left])
+        operator = tree.value(node)
+        if operator == '+':
+            return a + b
+        if operator == '-':
+            return a - b
+        if operator == '*':
+            return a * b
+        if operator == '/':
+            return vm.divide(a, b)
+        if operator == '<':
+            return 1 if a < b else 0
+        return 1 if a == b else 0
+
+    def execute(node):
+        while node != NO_NODE:
+            kind = kinds[node]
+            if kind == ASSIGN_NODE:
+                variables[tree.value(node)] = evaluate(first_child[node])
+            elif kind == READ_NODE:
+                variables[tree.value(node)] = int(next(values))
+            elif kind == WRITE_NODE:
+                output.write(f"{evaluate(first_child[node])}\n")
+            elif kind == IF_NODE:
+                test = first_child[node]
+                then_part = next_child[test]
+                if evaluate(test):
+                    execute(then_part)
+                elif then_part != NO_NODE and next_child[then_part] != NO_NODE:
+                    execute(next_child[then_part])
+            else:  # Repeat
+                body = first_child[node]
+                test = next_child[body]
+                while True:
+                    execute(body)
+                    if evaluate(test):
+                        break
+            node = sibling[node]
+
+    execute(root.index)
+    return variables
+
+
+def _run_tm(root, input, output):
+    code = generate_code(root)
+    TM(code.instructions, code.data_size).run(input, output)
+
+
+ENGINES = {
+    'tree walk': walk,
+    'vm': lambda root, input, output: vm.run(root, input, output),
+    'tm': _run_tm,
+    'python': pycompiler.run,
+}
+
+
+def benchmark(root, input, runs):
+    """Returns {engine: best seconds}; raises AssertionError if an engine disagrees with the walk."""
+    timings = {}
+    expected = None
+    for name, engine in ENGINES.items():
+        best = None
+        for _ in range(runs):
+            output = io.StringIO()
+            started = time.perf_counter()
+            engine(root, list(input), output)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        if expected is None:
+            expected = output.getvalue()
+        elif output.getvalue() != expected:
+            raise AssertionError(f"{name} wrote {output.getvalue()!r}, the tree walk {expected!r}")
+        timings[name] = best
+    return timings
+
+
+def _parse(text):
+    scanner = Scanner()
+    scanner.scan(text)
+    if scanner.errors:
+        raise SystemExit(f"scanner errors: {scanner.errors}")
+    return Parser(scanner.tokens).program()
+
+
+def main(argv=None):
+    """Prints the time of every engine on every program."""
+    arg_parser = argparse.ArgumentParser(description="Compare the TINY execution engines.")
+    arg_parser.add_argument('files', nargs='*', help="TINY programs (default: built-in benchmarks)")
+    arg_parser.add_argument('-n', '--runs', type=int, default=3, help="runs per engine; the best one counts")
+    arg_parser.add_argument('--size', type=int, default=None, help="value read by the built-in programs")
+    arg_parser.add_argument('--input', default='', help="space-separated input values for FILE programs")
+    args = arg_parser.parse_args(argv)
+
+    if args.files:
+        programs = []
+        for path in args.files:
+            with open(path) as file:
+                programs.append((path, file.read(), args.input.split()))
+    else:
+        programs = [(name, text, [args.size or SIZES[name]]) for name, text in PROGRAMS.items()]
+    for name, text, input in programs:
+        timings = benchmark(_parse(text), input, args.runs)
+        reference = timings['tree walk']
+        print(f"{name}:")
+        for engine, seconds in timings.items():
+            print(f"  {engine:<10} {seconds * 1000:9.1f} ms  {reference / seconds:5.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
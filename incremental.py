@@ -0,0 +1,276 @@
+"""
+Incremental re-parsing of an edited program.
+
+IncrementalParser keeps the scanner checkpoints, the tokens and the syntax tree of one
+text. After a line edit the scanner rescans only the changed lines (Scanner.update), and
+only the statements around them are parsed again. The edit is located in the program's
+statement sequence, descending into an if/repeat body while the edit lies strictly inside
+it. The statements the edit touches, plus one untouched neighbour on each side, are then
+re-parsed into the same arena and spliced into the sibling chain in place of the old ones.
+The neighbours make the tokens on both sides of the re-parsed range unchanged ones, so an
+error-free result is exactly the tree a full parse would build.
+
+A program with syntax errors before or after the edit is parsed in full, because an error
+can change how much of the program a block swallows. So is the whole text once replaced
+nodes make up half of the arena.
+
+Full scans and parses report to an optional progress(done, total) callback, the scan
+covering the first half of the total and the parse the second. An exception raised by the
+callback abandons the work and leaves the IncrementalParser unusable.
+"""
+from array import array
+from bisect import bisect_left
+
+from parser import IF_NODE, NO_NODE, REPEAT_NODE, Parser
+from scanner import PROGRESS_INTERVAL, LineEdit, Scanner
+
+
+def line_edit(old_lines, new_lines):
+    """Returns the LineEdit turning one list of lines into another, or None if they are equal."""
+    if old_lines == new_lines:
+        return None
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0  # Unchanged lines at the start
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0  # Unchanged lines at the end, not overlapping the prefix
+    while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+    # Every line keeps its newline, so blank lines at the end of the text survive splitlines()
+    text = "".join(line + "\n" for line in new_lines[prefix:len(new_lines) - suffix])
+    return LineEdit(prefix + 1, len(old_lines) - suffix, text)
+
+
+class IncrementalParser:
+    """Keeps the tokens and the syntax tree of one text up to date across line edits."""
+
+    def __init__(self, text, progress=None):
+        self.progress = progress  # Called with (done, total) during full scans and parses
+        self.scanner = Scanner()
+        self.scanner.scan(text, self._scan_progress if progress is not None else None)
+        self.tree = None  # SyntaxTree of the text; None while the scanner reports errors
+        self.root = NO_NODE  # First statement of the program
+        self.errors = []  # Syntax errors of the text
+        self.parsed_tokens = 0  # Tokens the last parse or update had to parse
+        self.garbage = 0  # Arena nodes no longer reachable from the root
+        self._parse_all()
+
+    def program(self):
+        """Returns a NodeView of the first statement, or None without a tree."""
+        if self.tree is None or self.root == NO_NODE:
+            return None
+        return self.tree.node(self.root)
+
+    def set_text(self, text):
+        """Replaces the whole text, re-parsing only what differs from the current one."""
+        edit = line_edit(self.scanner.lines, text.splitlines())
+        if edit is not None:
+            self.update(edit)
+
+    def update(self, edit):
+        """Applies a LineEdit to the text and brings the tokens and the tree up to date."""
+        kept_line = self.scanner.update(edit)
+        if self.scanner.errors or self.tree is None or self.errors or self.root == NO_NODE:
+            self._parse_all()
+            return
+        first_line, last_line, text = edit
+        delta = len(text.splitlines()) - (last_line - first_line + 1)  # Change in the number of lines
+        # Old lines first_line .. end_line - 1 were rescanned; the tokens of later lines only moved
+        if kept_line is not None:
+            end_line = kept_line - delta
+        else:
+            end_line = len(self.scanner.lines) - delta + 1
+
+        tree = self.tree
+        tokens = self.scanner.tokens
+        lines, sibling, first_child, next_child = tree.lines, tree.sibling, tree.first_child, tree.next_child
+        last_lines = self.last_lines
+
+        # Walk down to the innermost statement sequence holding the whole edit
+        parent = NO_NODE  # Block whose body is that sequence, NO_NODE for the program
+        head = self.root
+        body_start, body_stop = 0, len(tokens)  # Token range of that sequence
+        while True:
+            previous = before = NO_NODE  # Last statement ending before the edit, and the one before it
+            node = head
+            while node != NO_NODE and last_lines[node] < first_line:
+                previous, before = before, node
+                node = sibling[node]
+            touched = node  # First statement the edit touches, if any
+            last_touched = NO_NODE
+            while node != NO_NODE and lines[node] < end_line:
+                last_touched = node
+                node = sibling[node]
+            after = node  # First statement starting after the edit
+            if touched != NO_NODE and touched == last_touched and tree.kinds[touched] in (IF_NODE, REPEAT_NODE):
+                body = self._body_around(touched, first_line, end_line, delta)
+                if body is not None:
+                    parent = touched
+                    head, body_start, body_stop = body
+                    continue
+            break
+
+        # Re-parse from the statement before the edit through the one after it
+        first = before if before != NO_NODE else head
+        if after != NO_NODE:
+            last = after
+        else:
+            last = last_touched if last_touched != NO_NODE else before
+        if before == NO_NODE:
+            start = body_start
+        else:
+            start = bisect_left(tokens, (lines[first],)) + self.first_offsets[first]
+        if after == NO_NODE:
+            stop = body_stop
+        else:
+            stop = bisect_left(tokens, (last_lines[last] + delta,)) + self.last_offsets[last] + 1
+        replaced = self._count(first, last)
+
+        if delta:
+            # Renumber the nodes after the edit; the one pass over the tree left, and only for edits adding or removing lines
+            tree.lines = array('I', [line + delta if line >= end_line else line for line in lines])
+            self.last_lines = array('I', [line + delta if line >= end_line else line for line in last_lines])
+
+        parser = Parser(tokens[start:stop], recover=True, spans=True, tree=tree)
+        new_first = parser.stmt_sequence(to_end=True)
+        if parser.errors or new_first is None:
+            self._parse_all()  # Let a full parse report the errors as it would after a fresh scan
+            return
+        new_last = new_first
+        while sibling[new_last] != NO_NODE:
+            new_last = sibling[new_last]
+
+        # Splice the new statements into the chain in place of first .. last
+        sibling[new_last] = sibling[last]
+        if previous != NO_NODE:
+            sibling[previous] = new_first
+        elif parent == NO_NODE:
+            self.root = new_first
+        else:
+            # The run began the body, which is a child of the block
+            next_child[new_first] = next_child[first]
+            if first_child[parent] == first:
+                first_child[parent] = new_first
+            else:
+                child = first_child[parent]
+                while next_child[child] != first:
+                    child = next_child[child]
+                next_child[child] = new_first
+        self._record_spans(parser.spans, start)
+        self.parsed_tokens = stop - start
+        self.garbage += replaced
+        if self.garbage * 2 > len(tree):
+            self._parse_all()  # Compact the arena
+
+    def _parse_all(self):
+        """Parses the whole token stream into a new tree."""
+        self.garbage = 0
+        self.first_offsets = array('I')  # Position of each statement's first token among the tokens of its line
+        self.last_lines = array('I')  # Line of each statement's last token
+        self.last_offsets = array('I')  # Position of each statement's last token among the tokens of its line
+        if self.scanner.errors:
+            self.tree = None
+            self.root = NO_NODE
+            self.errors = []
+            self.parsed_tokens = 0
+            return
+        tokens = self.scanner.tokens
+        if self.progress is not None:
+            tokens = self._reporting(tokens)
+        parser = Parser(tokens, recover=True, spans=True)
+        head = parser.stmt_sequence(to_end=True)
+        self.tree = parser.tree
+        self.root = head if head is not None else NO_NODE
+        self.errors = parser.errors
+        self.parsed_tokens = len(self.scanner.tokens)
+        self._record_spans(parser.spans, 0)
+
+    def _scan_progress(self, done, total):
+        self.progress(done, total * 2)
+
+    def _reporting(self, tokens):
+        """Yields the tokens, reporting every PROGRESS_INTERVAL of them as the second half of the work."""
+        total = len(tokens)
+        for position in range(0, total, PROGRESS_INTERVAL):
+            self.progress(total + position, total * 2)
+            yield from tokens[position:position + PROGRESS_INTERVAL]
+
+    def _record_spans(self, spans, base):
+        """
+        Stores the statement spans of a parser that started at token `base` as line and
+        offset-in-line pairs, which stay valid when edits elsewhere move the tokens.
+        """
+        tokens = self.scanner.tokens
+        padding = array('I', [0]) * (len(self.tree) - len(self.last_lines))
+        for column in (self.first_offsets, self.last_lines, self.last_offsets):
+            column.extend(padding)
+        line_starts = {}  # Line -> index of its first token
+        for node, first, last in spans:
+            first += base
+            last += base
+            line = tokens[first][0]
+            line_start = line_starts.get(line)
+            if line_start is None:
+                line_start = line_starts[line] = bisect_left(tokens, (line,))
+            self.first_offsets[node] = first - line_start
+            line = tokens[last][0]
+            line_start = line_starts.get(line)
+            if line_start is None:
+                line_start = line_starts[line] = bisect_left(tokens, (line,))
+            self.last_lines[node] = line
+            self.last_offsets[node] = last - line_start
+
+    def _body_around(self, block, first_line, end_line, delta):
+        """
+        Looks for a body of `block` holding all of the old lines first_line .. end_line - 1
+        while the block's keywords and condition stay untouched. Returns the body's first
+        statement and its token range in the edited text, or None.
+        """
+        tree = self.tree
+        tokens = self.scanner.tokens
+        is_if = tree.kinds[block] == IF_NODE
+        children = tree.children(block)
+        bodies = children[1:] if is_if else children[:1]
+        for number, body in enumerate(bodies):
+            # The body has to start after its opening keyword, on an unchanged line
+            if tree.lines[body] < first_line:
+                start = bisect_left(tokens, (tree.lines[body],)) + self.first_offsets[body]
+            elif tree.lines[body] == first_line and self.first_offsets[body] == 0:
+                start = bisect_left(tokens, (first_line,))  # The keyword is on an earlier line
+            else:
+                continue
+            tail = body
+            while tree.sibling[tail] != NO_NODE:
+                tail = tree.sibling[tail]
+            # ... and end before its closing keyword
+            if self.last_lines[tail] >= end_line:
+                stop = bisect_left(tokens, (self.last_lines[tail] + delta,)) + self.last_offsets[tail] + 1
+            elif is_if and number == len(bodies) - 1 and self.last_lines[block] >= end_line:
+                # The last body of an if ends right before the block's final 'end'
+                stop = bisect_left(tokens, (self.last_lines[block] + delta,)) + self.last_offsets[block]
+            else:
+                continue
+            return body, start, stop
+        return None
+
+    def _count(self, first, last):
+        """Counts the nodes of the statements first .. last of a sequence and of their subtrees."""
+        sibling, first_child, next_child = self.tree.sibling, self.tree.first_child, self.tree.next_child
+        stack = [first]
+        node = first
+        while node != last:
+            node = sibling[node]
+            stack.append(node)
+        count = 0
+        while stack:
+            node = stack.pop()
+            count += 1
+            child = first_child[node]
+            while child != NO_NODE:
+                # A child may start a body, whose statements are chained through sibling
+                statement = child
+                while statement != NO_NODE:
+                    stack.append(statement)
+                    statement = sibling[statement]
+                child = next_child[child]
+        return count
@@ -0,0 +1,131 @@
+"""
+Per-phase performance instrumentation of the compiler pipeline.
+
+An Instrumentation records one PhaseMeasurement per `with instrumentation.phase(name):`
+block: wall time, CPU time of the calling thread, the number of items the phase handled
+(tokens or nodes, set by the caller) and, when trace_memory is on, the peak memory
+allocated during the phase according to tracemalloc. The GUI shows summary() in its
+status bar and the batch compiler stores report() in summary.json, so a slow run can be
+pinned on scanning, parsing, the tree layout, the Qt rendering or the file output.
+"""
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class PhaseMeasurement:
+    """Measurements of one run of a phase."""
+
+    def __init__(self, name, unit):
+        self.name = name  # Phase name, e.g. 'scan'
+        self.unit = unit  # What count counts, e.g. 'tokens'
+        self.count = None  # Items handled, set inside the phase
+        self.wall = 0.0  # Seconds
+        self.cpu = 0.0  # CPU seconds of the thread that ran the phase
+        self.peak_bytes = None  # Peak allocation above the start of the phase, with tracemalloc
+
+    @property
+    def throughput(self):
+        """Items per wall-clock second, or None."""
+        if self.count is None or self.wall <= 0:
+            return None
+        return self.count / self.wall
+
+    def as_dict(self):
+        return {
+            'phase': self.name,
+            'wall_seconds': self.wall,
+            'cpu_seconds': self.cpu,
+            'count': self.count,
+            'unit': self.unit,
+            'throughput': self.throughput,
+            'peak_bytes': self.peak_bytes,
+        }
+
+    def __repr__(self):
+        return f"PhaseMeasurement({self.name!r}, wall={self.wall:.6f}, cpu={self.cpu:.6f}, count={self.count})"
+
+
+class Instrumentation:
+    """Collects the measurements of the phases of one run; a disabled one records nothing."""
+
+    def __init__(self, trace_memory=False, enabled=True):
+        self.trace_memory = trace_memory  # Whether to measure peak allocations (slows the phases down)
+        self.enabled = enabled
+        self.phases = []  # PhaseMeasurements in the order the phases finished
+
+    @contextmanager
+    def phase(self, name, unit='tokens'):
+        """Measures the block as phase `name`; the block may set count on the yielded measurement."""
+        measurement = PhaseMeasurement(name, unit)
+        if not self.enabled:
+            yield measurement
+            return
+        started_tracing = False
+        if self.trace_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                started_tracing = True
+            baseline = tracemalloc.get_traced_memory()[0]
+        cpu = time.thread_time()
+        wall = time.perf_counter()
+        try:
+            yield measurement
+        finally:
+            measurement.wall = time.perf_counter() - wall
+            measurement.cpu = time.thread_time() - cpu
+            if self.trace_memory:
+                measurement.peak_bytes = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.phases.append(measurement)
+
+    def __getitem__(self, name):
+        """Returns the last measurement of a phase; raises KeyError if it never ran."""
+        for measurement in reversed(self.phases):
+            if measurement.name == name:
+                return measurement
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        return any(measurement.name == name for measurement in self.phases)
+
+    def report(self):
+        """Returns the measurements as a JSON-ready dict."""
+        return {
+            'phases': [measurement.as_dict() for measurement in self.phases],
+            'wall_seconds': sum(measurement.wall for measurement in self.phases),
+            'cpu_seconds': sum(measurement.cpu for measurement in self.phases),
+        }
+
+    def to_json(self, indent=2):
+        """Returns report() as JSON text."""
+        return json.dumps(self.report(), indent=indent)
+
+    def summary(self):
+        """Returns a one-line summary, e.g. "scan 12.1 ms (820k tokens/s) | parse 15.0 ms (...)"."""
+        parts = []
+        for measurement in self.phases:
+            text = f"{measurement.name} {measurement.wall * 1000:.1f} ms"
+            details = []
+            throughput = measurement.throughput
+            if throughput is not None:
+                details.append(f"{_metric(throughput)} {measurement.unit}/s")
+            if measurement.peak_bytes is not None:
+                details.append(f"{measurement.peak_bytes / 2 ** 20:.1f} MiB peak")
+            if details:
+                text += f" ({', '.join(details)})"
+            parts.append(text)
+        return " | ".join(parts)
+
+
+def _metric(value):
+    """Formats a rate with a k/M suffix."""
+    if value >= 1e6:
+        return f"{value / 1e6:.1f}M"
+    if value >= 1e3:
+        return f"{value / 1e3:.0f}k"
+    return f"{value:.0f}"
@@ -0,0 +1,343 @@
+"""
+Optimization passes over the syntax tree.
+
+optimize() sits between Parser.program() and any consumer (the bytecode compiler,
+the drawer, the printers). It rewrites the SyntaxTree in place and runs its passes
+until none of them changes anything more:
+
+- fold_constants evaluates operators whose operands are both constants;
+- simplify_algebra removes identities such as x + 0, x * 1 and x - x;
+- eliminate_dead_code drops the branch an if with a constant condition never takes,
+  and unrolls a repeat whose until condition is constant-true, which runs its body once.
+
+Every pass returns a list of the changes it made, e.g. "line 3: folded 2 * 4 to 8".
+Division by zero is TINY's only runtime error, so no rewrite removes a division whose
+divisor might be zero: such operators are never folded and never dropped.
+"""
+import operator
+
+from parser import CONST_NODE, IF_NODE, NO_NODE, OP_NODE, REPEAT_NODE
+from vm import divide
+
+# Semantics of the operators, shared with the VM
+OPERATIONS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': divide,
+    '<': lambda left, right: 1 if left < right else 0,
+    '=': lambda left, right: 1 if left == right else 0,
+}
+
+
+def optimize(root, passes=None, max_rounds=10):
+    """
+    Runs the passes over the tree of `root` (a NodeView from Parser.program()) until
+    a round changes nothing. Returns the possibly new root, None if no statement is
+    left, and a dict mapping each pass name to the list of its changes.
+    """
+    passes = passes if passes is not None else PASSES
+    report = {optimization.__name__: [] for optimization in passes}
+    for _ in range(max_rounds):
+        changed = False
+        for optimization in passes:
+            if root is None:
+                break
+            root, changes = optimization(root)
+            report[optimization.__name__].extend(changes)
+            changed = changed or bool(changes)
+        if not changed:
+            break
+    return root, report
+
+
+def fold_constants(root):
+    """Replaces each operator applied to two constants by the constant it computes."""
+    tree = root.tree
+    kinds, first_child, next_child = tree.kinds, tree.first_child, tree.next_child
+    changes = []
+    for node in _expression_nodes(tree, root.index):
+        if kinds[node] != OP_NODE:
+            continue
+        left = first_child[node]
+        right = next_child[left]
+        if kinds[left] != CONST_NODE or kinds[right] != CONST_NODE:
+            continue
+        operator_name = tree.value(node)
+        left_value, right_value = int(tree.value(left)), int(tree.value(right))
+        if operator_name == '/' and right_value == 0:
+            continue  # Left for the runtime error
+        value = OPERATIONS[operator_name](left_value, right_value)
+        changes.append(f"line {tree.lines[node]}: folded {left_value} {operator_name} {right_value} to {value}")
+        _make_constant(tree, node, value)
+    return root, _in_source_order(changes)
+
+
+def simplify_algebra(root):
+    """Removes identities: x + 0, 0 + x, x - 0, x * 1, 1 * x and x / 1 become x; x * 0, 0 * x and
+    x - x become 0; x = x becomes 1 and x < x becomes 0."""
+    tree = root.tree
+    kinds, first_child, next_child = tree.kinds, tree.first_child, tree.next_child
+    changes = []
+    for node in _expression_nodes(tree, root.index):
+        if kinds[node] != OP_NODE:
+            continue
+        left = first_child[node]
+        right = next_child[left]
+        operator_name = tree.value(node)
+        left_constant = int(tree.value(left)) if kinds[left] == CONST_NODE else None
+        right_constant = int(tree.value(right)) if kinds[right] == CONST_NODE else None
+        keep = value = None  # The operand the operator reduces to, or the constant it is
+        if operator_name == '+':
+            keep = left if right_constant == 0 else right if left_constant == 0 else None
+        elif operator_name == '-':
+            if right_constant == 0:
+                keep = left
+            elif _is_safe(tree, left) and _same(tree, left, right):
+                value = 0
+        elif operator_name == '*':
+            if right_constant == 1:
+                keep = left
+            elif left_constant == 1:
+                keep = right
+            elif (right_constant == 0 and _is_safe(tree, left)) or (left_constant == 0 and _is_safe(tree, right)):
+                value = 0
+        elif operator_name == '/':
+            keep = left if right_constant == 1 else None
+        elif _is_safe(tree, left) and _same(tree, left, right):
+            value = 1 if operator_name == '=' else 0
+
+        if keep is not None:
+            changes.append(f"line {tree.lines[node]}: simplified {_describe(tree, node)} to {_describe(tree, keep)}")
+            # The operator node takes the kept operand's place; its position among its siblings stays
+            kinds[node] = kinds[keep]
+            tree.values[node] = tree.values[keep]
+            first_child[node] = first_child[keep]
+        elif value is not None:
+            changes.append(f"line {tree.lines[node]}: simplified {_describe(tree, node)} to {value}")
+            _make_constant(tree, node, value)
+    return root, _in_source_order(changes)
+
+
+def eliminate_dead_code(root):
+    """
+    Replaces an if whose condition is constant by the branch it takes and a repeat
+    whose until condition is constant-true by its body. Emptied sequences are handled
+    where the tree allows it: an empty else part is dropped, an if left with only an
+    else part gets the negated condition, and an if left with no statements at all
+    disappears when its condition cannot fail. Otherwise the sequence is kept as it was.
+    """
+    tree = root.tree
+    kinds, first_child, next_child, sibling = tree.kinds, tree.first_child, tree.next_child, tree.sibling
+    changes = []
+
+    # Every sequence as (block owning it or NO_NODE for the program, body number), outer ones first
+    sequences = [(NO_NODE, 0)]
+    stack = [root.index]
+    while stack:
+        node = stack.pop()
+        while node != NO_NODE:
+            for number, body in enumerate(_bodies(tree, node)):
+                sequences.append((node, number))
+                stack.append(body)
+            node = sibling[node]
+
+    # Rewrite inner sequences first, so an outer one sees its blocks' final bodies
+    removable = {}  # Ifs whose statements all vanished -> changes to report once their sequence drops them
+    new_root = root.index
+    for owner, number in reversed(sequences):
+        head = new_root if owner == NO_NODE else _bodies(tree, owner)[number]
+        statements = []
+        sequence_changes = []  # Reported only if the sequence can be rewritten
+        node = head
+        while node != NO_NODE:
+            kind = kinds[node]
+            if node in removable:
+                sequence_changes.extend(removable[node])
+                sequence_changes.append(f"line {tree.lines[node]}: removed an if without statements")
+            elif kind == IF_NODE and kinds[first_child[node]] == CONST_NODE:
+                bodies = _bodies(tree, node)
+                taken = 0 if int(tree.value(first_child[node])) != 0 else 1
+                if taken < len(bodies):
+                    branch = ('then', 'else')[taken]
+                    sequence_changes.append(f"line {tree.lines[node]}: if with a constant condition always takes its {branch} part")
+                    statements.extend(_chain(tree, bodies[taken]))
+                else:
+                    sequence_changes.append(f"line {tree.lines[node]}: removed an if whose condition is always false")
+            elif kind == REPEAT_NODE and _until_is_true(tree, node):
+                sequence_changes.append(f"line {tree.lines[node]}: repeat with a constant-true until runs once")
+                statements.extend(_chain(tree, first_child[node]))
+            else:
+                statements.append(node)
+            node = sibling[node]
+        if not sequence_changes:
+            continue
+
+        if statements:
+            for statement, following in zip(statements, statements[1:]):
+                sibling[statement] = following
+            sibling[statements[-1]] = NO_NODE
+            new_head = statements[0]
+        else:
+            new_head = NO_NODE
+        if owner == NO_NODE:
+            new_root = new_head
+            changes.extend(sequence_changes)
+            continue
+        if new_head != NO_NODE:
+            _set_body(tree, owner, number, new_head)
+        elif kinds[owner] == IF_NODE and number == 1:
+            _set_body(tree, owner, 1, NO_NODE)  # Drop the empty else part
+        elif kinds[owner] == IF_NODE and len(_bodies(tree, owner)) == 2:
+            # if c then <nothing> else S end  becomes  if c = 0 then S end
+            condition = first_child[owner]
+            else_part = _bodies(tree, owner)[1]
+            line = tree.lines[owner]
+            negated = tree.add(OP_NODE, '=', line)
+            zero = tree.add(CONST_NODE, '0', line)
+            first_child[negated] = condition
+            next_child[condition] = zero
+            first_child[owner] = negated
+            next_child[negated] = else_part
+            sequence_changes.append(f"line {line}: negated the condition of an if with an empty then part")
+        elif kinds[owner] == IF_NODE and _is_safe(tree, first_child[owner]):
+            removable[owner] = sequence_changes  # The enclosing sequence drops it, or keeps it unchanged
+            continue
+        else:
+            continue  # The tree has no empty sequences; this one stays as it was
+        changes.extend(sequence_changes)
+    return (tree.node(new_root) if new_root != NO_NODE else None), _in_source_order(changes)
+
+
+PASSES = (fold_constants, simplify_algebra, eliminate_dead_code)
+
+
+def _in_source_order(changes):
+    """Sorts "line N: ..." change descriptions by line, keeping the order within a line."""
+    return sorted(changes, key=lambda change: int(change[5:change.index(':')]))
+
+
+def _expression_nodes(tree, root):
+    """Returns every expression node below the statements of a program, children before parents."""
+    kinds, first_child, next_child, sibling = tree.kinds, tree.first_child, tree.next_child, tree.sibling
+    order = []
+    statements = [root]
+    while statements:
+        node = statements.pop()
+        while node != NO_NODE:
+            child = first_child[node]
+            while child != NO_NODE:
+                if kinds[child] >= OP_NODE:
+                    # An expression: list it and its operands parents first, reversed below
+                    stack = [child]
+                    while stack:
+                        expression = stack.pop()
+                        order.append(expression)
+                        operand = first_child[expression]
+                        while operand != NO_NODE:
+                            stack.append(operand)
+                            operand = next_child[operand]
+                else:
+                    statements.append(child)  # A body
+                child = next_child[child]
+            node = sibling[node]
+    order.reverse()
+    return order
+
+
+def _bodies(tree, node):
+    """Returns the first statement of each body of a block: then and else parts, or the repeat body."""
+    children = tree.children(node)
+    if tree.kinds[node] == IF_NODE:
+        return children[1:]
+    if tree.kinds[node] == REPEAT_NODE:
+        return children[:1]
+    return []
+
+
+def _set_body(tree, node, number, body):
+    """Replaces (or with NO_NODE removes) a body of a block; other children keep their order."""
+    children = tree.children(node)
+    position = number + 1 if tree.kinds[node] == IF_NODE else number
+    if body == NO_NODE:
+        del children[position:]
+    else:
+        children[position] = body
+    tree.first_child[node] = children[0]
+    for child, following in zip(children, children[1:]):
+        tree.next_child[child] = following
+    tree.next_child[children[-1]] = NO_NODE
+
+
+def _chain(tree, head):
+    """Returns the statements of a sequence as a list."""
+    statements = []
+    while head != NO_NODE:
+        statements.append(head)
+        head = tree.sibling[head]
+    return statements
+
+
+def _until_is_true(tree, node):
+    condition = tree.next_child[tree.first_child[node]]
+    return tree.kinds[condition] == CONST_NODE and int(tree.value(condition)) != 0
+
+
+def _make_constant(tree, node, value):
+    """Turns an expression node into a constant leaf."""
+    tree.kinds[node] = CONST_NODE
+    tree.values[node] = tree.intern(str(value))
+    tree.first_child[node] = NO_NODE
+
+
+def _is_safe(tree, node):
+    """Tells whether an expression contains no division that could fail, so it may be dropped."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if tree.kinds[node] == OP_NODE:
+            left = tree.first_child[node]
+            right = tree.next_child[left]
+            if tree.value(node) == '/' and not (tree.kinds[right] == CONST_NODE and int(tree.value(right)) != 0):
+                return False
+            stack.append(left)
+            stack.append(right)
+    return True
+
+
+def _same(tree, first, second):
+    """Tells whether two expressions are structurally equal."""
+    pairs = [(first, second)]
+    while pairs:
+        first, second = pairs.pop()
+        if tree.kinds[first] != tree.kinds[second] or tree.values[first] != tree.values[second]:
+            return False
+        first, second = tree.first_child[first], tree.first_child[second]
+        while first != NO_NODE and second != NO_NODE:
+            pairs.append((first, second))
+            first, second = tree.next_child[first], tree.next_child[second]
+        if first != second:
+            return False  # Different numbers of operands
+    return True
+
+
+def _describe(tree, node, limit=40):
+    """Renders an expression as infix text for reports, cut short past `limit` characters."""
+    parts = []
+    length = 0
+    stack = [node]
+    while stack and length <= limit + 2:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif tree.kinds[item] == OP_NODE:
+            left = tree.first_child[item]
+            stack.extend((')', tree.next_child[left], f" {tree.value(item)} ", left, '('))
+            continue
+        else:
+            parts.append(tree.value(item))
+        length += len(parts[-1])
+    text = "".join(parts)
+    if tree.kinds[node] == OP_NODE:
+        text = text[1:-1] if not stack else text[1:]  # No parentheses around the whole expression
+    return text if len(text) <= limit else text[:limit - 3] + "..."
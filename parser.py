@@ -1,3 +1,9 @@
+from array import array
+from itertools import chain
+
+from tracing import ERRORS, RULES, TOKENS, instrument_parser
+
+
 class Node:
     """A class to represent a node in the syntax tree."""
 
@@ -28,18 +34,212 @@ class Node:
 
     def __str__(self, level=0):
         """
-        Recursively create a string representation of the tree structure,
-        including siblings, for printing purposes.
+        Create a string representation of the tree structure, including siblings,
+        for printing purposes. Uses an explicit stack, so long statement sequences
+        cost linear time and no recursion.
         """
-        ret = "  " * level + f"{self.name}\n"  # Indentation based on the level
-        for child in self.children:
-            ret += child.__str__(level + 1)  # Recurse for child nodes
+        lines = []
+        stack = [(self, level)]
+        while stack:
+            node, depth = stack.pop()
+            lines.append("  " * depth + f"{node.name}\n")  # Indentation based on the level
+            # Siblings stay at the same level and come after all of this node's children
+            if node.sibling:
+                stack.append((node.sibling, depth))
+            for child in reversed(node.children):
+                stack.append((child, depth + 1))
+        return "".join(lines)
+
+# Node kinds of the compact syntax tree, with the label and shape each one is shown with;
+# {} in a label stands for the node's operator, number or identifier
+NODE_KINDS = ('if', 'repeat', 'assign', 'read', 'write', 'op', 'const', 'id')
+IF_NODE, REPEAT_NODE, ASSIGN_NODE, READ_NODE, WRITE_NODE, OP_NODE, CONST_NODE, ID_NODE = range(len(NODE_KINDS))
+NODE_LABELS = ('if', 'repeat', 'assign(id({}))', 'read(id({}))', 'write', 'op({})', 'const({})', 'id({})')
+NODE_SHAPES = ('rectangle',) * 5 + ('oval',) * 3
+NO_NODE = -1  # Marks a missing child or sibling link
+
+
+class SyntaxTree:
+    """
+    A whole syntax tree stored column-wise in parallel arrays, 21 bytes per node (see
+    nbytes()) instead of a Python object with a dict and a children list. Nodes are integer
+    indexes; operators, numbers and identifiers are interned in a name table. A
+    node's children are chained through next_child, while sibling links the
+    statements of a sequence, exactly like Node.children and Node.sibling.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')  # Node kind codes (indexes into NODE_KINDS)
+        self.values = array('I')  # Name-table index of the node's operator, number or identifier
+        self.lines = array('I')  # Source line of the token the node was made from (0 if unknown)
+        self.first_child = array('i')  # First child of each node, or NO_NODE
+        self.next_child = array('i')  # Next child of the same parent, or NO_NODE
+        self.sibling = array('i')  # Next statement of the same sequence, or NO_NODE
+        self.names = []  # Interned operators, numbers and identifiers
+        self.name_codes = {}  # Name -> index in self.names
+
+    def add(self, kind, value='', line=None):
+        """Appends a node without links and returns its index."""
+        code = self.name_codes.get(value)
+        if code is None:
+            code = self.name_codes[value] = len(self.names)
+            self.names.append(value)
+        self.kinds.append(kind)
+        self.values.append(code)
+        self.lines.append(line or 0)
+        self.first_child.append(NO_NODE)
+        self.next_child.append(NO_NODE)
+        self.sibling.append(NO_NODE)
+        return len(self.kinds) - 1
+
+    def intern(self, value):
+        """Returns the name-table index of an operator, number or identifier, adding it if new."""
+        code = self.name_codes.get(value)
+        if code is None:
+            code = self.name_codes[value] = len(self.names)
+            self.names.append(value)
+        return code
+
+    def add_child(self, parent, child):
+        """Appends `child` to the children of `parent`; nodes have at most three children."""
+        node = self.first_child[parent]
+        if node == NO_NODE:
+            self.first_child[parent] = child
+            return
+        while self.next_child[node] != NO_NODE:
+            node = self.next_child[node]
+        self.next_child[node] = child
+
+    def children(self, index):
+        """Returns the indexes of a node's children, in order."""
+        children = []
+        child = self.first_child[index]
+        while child != NO_NODE:
+            children.append(child)
+            child = self.next_child[child]
+        return children
+
+    def label(self, index):
+        """Returns the name a Node would have, e.g. "assign(id(x))" or "op(+)"."""
+        return NODE_LABELS[self.kinds[index]].format(self.names[self.values[index]])
+
+    def value(self, index):
+        """Returns the operator, number or identifier of a node ('' for if, repeat and write)."""
+        return self.names[self.values[index]]
+
+    def node(self, index):
+        """Returns a Node-compatible view of a node."""
+        return NodeView(self, index)
+
+    def format(self, index, level=0):
+        """Renders a node, its subtree and its sibling chain like Node.__str__."""
+        # Plain lists index faster than arrays, which box every element they return
+        kinds, values, names = self.kinds.tolist(), self.values.tolist(), self.names
+        first_child, next_child, sibling = self.first_child.tolist(), self.next_child.tolist(), self.sibling.tolist()
+        labels = {}  # value << 3 | kind -> label line, formatted once
+        indents = [""]  # Indentation of each level
+        lines = []
+        stack = [index, level]  # Flat (node, depth) pairs still to render
+        while stack:
+            depth = stack.pop()
+            node = stack.pop()
+            key = values[node] << 3 | kinds[node]
+            label = labels.get(key)
+            if label is None:
+                label = labels[key] = NODE_LABELS[kinds[node]].format(names[values[node]]) + "\n"
+            if depth >= len(indents):
+                indents.extend("  " * extra for extra in range(len(indents), depth + 1))
+            lines.append(indents[depth] + label)
+            # Siblings stay at the same level and come after all of this node's children
+            if sibling[node] != NO_NODE:
+                stack += (sibling[node], depth)
+            child = first_child[node]
+            if child != NO_NODE:
+                depth += 1
+                if next_child[child] == NO_NODE:
+                    stack += (child, depth)
+                else:
+                    children = []
+                    while child != NO_NODE:
+                        children += (depth, child)
+                        child = next_child[child]
+                    children.reverse()  # Pairs come out as (child, depth), last child first
+                    stack += children
+        return "".join(lines)
+
+    def nbytes(self):
+        """Returns the memory used by the node arrays, in bytes."""
+        return sum(column.itemsize * len(column) for column in (
+            self.kinds, self.values, self.lines, self.first_child, self.next_child, self.sibling))
+
+    def __len__(self):
+        return len(self.kinds)
+
+
+class NodeView:
+    """
+    A lightweight handle on one node of a SyntaxTree with the interface of Node, so the
+    drawer and other Node consumers work unchanged. Views are created on demand and
+    compare equal when they refer to the same node.
+    """
+
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def name(self):
+        return self.tree.label(self.index)
+
+    @property
+    def shape(self):
+        return NODE_SHAPES[self.tree.kinds[self.index]]
+
+    @property
+    def kind(self):
+        return NODE_KINDS[self.tree.kinds[self.index]]
+
+    @property
+    def value(self):
+        return self.tree.value(self.index)
+
+    @property
+    def line(self):
+        return self.tree.lines[self.index]
+
+    @property
+    def children(self):
+        tree = self.tree
+        return [NodeView(tree, child) for child in tree.children(self.index)]
+
+    @property
+    def sibling(self):
+        sibling = self.tree.sibling[self.index]
+        return NodeView(self.tree, sibling) if sibling != NO_NODE else None
+
+    def add_child(self, child):
+        """Add a child node (a view of the same tree) to the current node."""
+        self.tree.add_child(self.index, child.index)
+
+    def add_sibling(self, sibling_node):
+        """Add a sibling node (a view of the same tree) at the end of the current node's chain."""
+        sibling = self.tree.sibling
+        current = self.index
+        while sibling[current] != NO_NODE:
+            current = sibling[current]
+        sibling[current] = sibling_node.index
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and self.tree is other.tree and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
 
-        # Include siblings at the same level
-        if self.sibling:
-            ret += self.sibling.__str__(level)
+    def __str__(self, level=0):
+        return self.tree.format(self.index, level)
 
-        return ret
 
 operators = [')', '(', ';', '<', '=', '/', ':=', '*', '-', '+']  # List of operator tokens
 
@@ -48,56 +248,101 @@ class ParserError(Exception):
     pass
 
 class Parser:
-    """A recursive descent parser for the given grammar."""
+    """
+    A parser for the given grammar. Nested blocks and parenthesized expressions are
+    handled with explicit stacks, so deeply nested programs never hit the recursion limit.
+    """
+
+    # Grammar methods reported as rules when tracing; stmt_sequence() reports the if_stmt,
+    # repeat_stmt and nested stmt_sequence rules of the blocks it opens and closes itself
+    TRACED_RULES = ('program', 'stmt_sequence', 'assign_stmt', 'read_stmt', 'write_stmt', 'exp')
+
+    BLOCK_END = frozenset(('end', 'else', 'until'))  # Tokens that end a statement sequence
+    SYNC_TOKENS = BLOCK_END | {';'}  # Tokens where parsing resumes after an error when recovering
+    CLOSED_BY = {'end': ('if', 'else'), 'else': ('if',), 'until': ('repeat',)}  # Open blocks each token can end
 
-    def __init__(self, tokens_list):
-        """Initialize the parser with a list of tokens."""
-        self.tokens_list = tokens_list  # The list of tokens to parse
-        self.current_token_index = 0  # Index of the current token in the list
-        self.current_token = None  # The current token
+    # Binding strength of the binary operators: comparisons bind loosest, then add, then multiply
+    PRECEDENCE = {'<': 1, '=': 1, '+': 2, '-': 2, '*': 3, '/': 3}
+
+    def __init__(self, tokens, tracer=None, recover=False, spans=False, tree=None):
+        """
+        Initialize the parser with any iterable of (line_number, token, token_type) tuples,
+        such as Scanner.tokens or the Scanner.iter_tokens() generator. Tokens are pulled one
+        at a time, so the parser only ever holds the current one. Plain (token, token_type)
+        pairs are accepted too; errors then carry no line numbers. An optional
+        tracing.Tracer receives structured events; without one the parser carries no
+        tracing hooks at all.
+
+        By default parsing stops at the first syntax error with a ParserError. With
+        recover=True every error is collected in self.errors and program() returns
+        the partial tree it could build.
+
+        With spans=True the parser counts the tokens it pulls and records, for every
+        statement, the positions of its first and last token in self.spans as
+        (node, first, last) triples; the incremental parser relies on them. Nodes go
+        into `tree` when one is given, so several parsers can fill one arena.
+        """
+        tokens = iter(tokens)
+        first = next(tokens, None)
+        if first is not None and len(first) == 2:
+            tokens = ((None, token, token_type) for token, token_type in chain((first,), tokens))
+        elif first is not None:
+            tokens = chain((first,), tokens)
+        self.tokens = tokens  # Iterator over the remaining tokens
+        self.current_token = None  # The current (token, token_type) pair
+        self.line_number = None  # Line of the current token, or of the last one at the end of input
+        self.recover = recover  # Whether to resynchronize after syntax errors instead of stopping
+        self.tree = tree if tree is not None else SyntaxTree()  # Arena receiving every node of the syntax tree
+        self.position = -1  # Position of the current token in the stream; only counted with spans
+        self.spans = [] if spans else None  # (statement node, first token, last token) triples
+        if spans:
+            self.advance = self._counting_advance
+        self.tracer = tracer
+        if tracer is not None:
+            instrument_parser(self, tracer)
         self.advance()  # Initialize with the first token
         self.errors = []  # List to store error messages
 
     def advance(self):
-        """Advance to the next token in the tokens list."""
-        if self.current_token_index < len(self.tokens_list):
-            self.current_token = self.tokens_list[self.current_token_index]
-            self.current_token_index += 1
-            print(f"Advanced to token: {self.current_token}")
+        """Advance to the next token pulled from the token iterator."""
+        token = next(self.tokens, None)
+        if token is not None:
+            self.line_number, token_value, token_type = token
+            self.current_token = (token_value, token_type)
         else:
             self.current_token = None  # No more tokens; end of token stream
-            print("End of token stream reached.")
 
-    def error(self, message):
-        """Handle an error by appending an error message and raising an exception."""
-        error_message = f"Syntax Error: {message}"
-        print(error_message)
+    def _counting_advance(self):
+        """advance() that also keeps self.position, installed when recording spans."""
+        self.position += 1
+        Parser.advance(self)
+
+    def error(self, message, resumable=False):
+        """
+        Handle an error by appending an error message and raising an exception.
+        A resumable error only raises when not recovering; the caller then resumes itself.
+        """
+        if self.line_number is not None:
+            error_message = f"Syntax Error at line {self.line_number}: {message}"
+        else:
+            error_message = f"Syntax Error: {message}"
+        if self.tracer is not None and self.tracer.level >= ERRORS:
+            self.tracer.emit('error', token=self.current_token, detail=error_message)
         self.errors.append(error_message)  # Record the error
-        raise ParserError(error_message)  # Raise a ParserError to halt parsing
+        if not (resumable and self.recover):
+            raise ParserError(error_message)  # Raise a ParserError to halt parsing (or to resynchronize)
 
     def match(self, expected):
         """
         Match the current token with an expected value or type.
-        If matched, advance to the next token and return a Node.
+        If matched, advance to the next token and return the matched token's value;
+        the callers build the tree nodes they need.
         """
-        print(f"Matching token: {self.current_token} with expected: {expected}")
         if self.current_token:
             token_value, token_type = self.current_token
             if expected == token_type or expected == token_value:
-                matched_token = self.current_token  # Save the matched token
                 self.advance()  # Move to the next token
-
-                # Create and return a Node based on the token type
-                if expected == "NUMBER":
-                    return Node(f"const({matched_token[0]})", "oval")
-                elif expected == "REPEAT":
-                    return Node("repeat", "rectangle")
-                elif expected in operators:
-                    return Node(f"op({matched_token[0]})", "oval")
-                elif expected == "IDENTIFIER":
-                    return Node(f"id({matched_token[0]})", "oval")
-                else:
-                    return Node(matched_token[0], "oval")  # Default case
+                return token_value
         # If no match, raise an error
         self.error(f"Expected {expected}, found {self.current_token}")
 
@@ -116,165 +361,300 @@ class Parser:
             self.match(';')  # Consume the semicolon
 
     def program(self):
-        """Parse the program starting point according to the grammar."""
-        print("Parsing program.")
-        program_node = self.stmt_sequence()  # Parse a sequence of statements
-        if self.current_token:
-            # If there are unexpected tokens after parsing
-            self.error("Unexpected token after program. Found: " + str(self.current_token))
-        return program_node  # Return the root node of the syntax tree
-
-    def stmt_sequence(self):
-        """Parse a sequence of statements."""
-        print("Parsing stmt-sequence.")
-        stmt_seq_node = self.statement()  # Parse the first statement
-
-        while self.current_token:
-            # Check for a semicolon between statements
-            if self.current_token[0] == ';':
-                print("Found semicolon in stmt-sequence.")
-                self.match(';')  # Consume the semicolon
-                stmt_seq_node.add_sibling(self.statement())  # Parse the next statement and add it as a sibling
-            elif self.current_token[0] in {'end', 'else', 'until'}:
-                # If the current token is a block-ending token, stop parsing the sequence
-                print("End of stmt-sequence due to block-ending token.")
-                break
-            else:
-                # If the token isn't a semicolon or block-ending token, it's an error
-                self.error(f"Syntax error, unexpected token: {self.current_token}")
-
-        return stmt_seq_node  # Return the node representing the statement sequence
-
-    def statement(self):
-        """Parse a single statement."""
-        print(f"Parsing statement. Current token: {self.current_token}")
-        if self.current_token[1] == 'IF':
-            return self.if_stmt()
-        elif self.current_token[1] == 'REPEAT':
-            return self.repeat_stmt()
-        elif self.current_token[1] == 'IDENTIFIER':
-            return self.assign_stmt()
-        elif self.current_token[1] == 'READ':
-            return self.read_stmt()
-        elif self.current_token[1] == 'WRITE':
-            return self.write_stmt()
+        """
+        Parse the program starting point according to the grammar. Returns a NodeView of
+        the first statement in self.tree, or None when no statement could be parsed.
+        """
+        head = self.stmt_sequence(to_end=True)  # Parse a sequence of statements up to the end of input
+        return self.tree.node(head) if head is not None else None
+
+    def stmt_sequence(self, to_end=False):
+        """
+        Parse a sequence of statements, including every nested if/repeat block, and
+        return the tree index of its first statement.
+        Open blocks are kept on an explicit stack instead of the call stack, so the
+        nesting depth is only limited by memory. The sequence stops at a block-ending
+        token, unless to_end is set: then such a token is an error.
+
+        When recovering, a syntax error drops the statement it occurred in and parsing
+        resumes at the next ';', 'end', 'until' or 'else'. A missing 'end' or 'until'
+        closes the innermost block when the token found ends an enclosing one, and
+        a stray block-ending token is skipped.
+        """
+        tree = self.tree
+        sibling = tree.sibling
+        spans = self.spans
+        # Rules entered for the open blocks, innermost last, when tracing rules
+        rules = [] if self.tracer is not None and self.tracer.level >= RULES else None
+        # Open blocks: [node, 'if', 'else' or 'repeat', head and tail of the enclosing sequence, first token]
+        blocks = []
+        head = tail = None  # First and last statement of the innermost sequence
+        expect_statement = True  # Whether a statement starts at the current token
+
+        while True:
+            try:
+                if expect_statement:
+                    # Parse the start of a statement
+                    token = self.current_token
+                    token_type = token[1] if token else None
+                    start = self.position
+                    if token_type == 'IF':
+                        if_node = tree.add(IF_NODE, line=self.line_number)  # Create an 'if' node
+                        # Open the block first, so a broken condition still keeps its body when recovering
+                        blocks.append([if_node, 'if', head, tail, start])
+                        head = tail = None
+                        if rules is not None:
+                            self._enter_rule(rules, 'if_stmt')
+                        self.match('IF')  # Match the 'if' keyword
+                        tree.add_child(if_node, self.exp())  # Parse the condition expression and add it as a child
+                        self.match('THEN')  # Match the 'then' keyword; the 'then' part follows as a new sequence
+                        if rules is not None:
+                            self._enter_rule(rules, 'stmt_sequence')
+                        continue
+                    elif token_type == 'REPEAT':
+                        repeat_node = tree.add(REPEAT_NODE, line=self.line_number)  # Create a 'repeat' node
+                        if rules is not None:
+                            self._enter_rule(rules, 'repeat_stmt')
+                        self.match('REPEAT')  # Match the 'repeat' keyword
+                        blocks.append([repeat_node, 'repeat', head, tail, start])  # Open the block for its body
+                        head = tail = None
+                        if rules is not None:
+                            self._enter_rule(rules, 'stmt_sequence')
+                        continue
+                    elif token_type == 'IDENTIFIER':
+                        statement = self.assign_stmt()
+                    elif token_type == 'READ':
+                        statement = self.read_stmt()
+                    elif token_type == 'WRITE':
+                        statement = self.write_stmt()
+                    else:
+                        self.error("Invalid statement type or missing keyword")
+
+                    # Append the finished statement to the innermost sequence, keeping its tail so this stays O(1)
+                    if head is None:
+                        head = statement
+                    else:
+                        sibling[tail] = statement
+                    tail = statement
+                    expect_statement = False
+                    if spans is not None:
+                        spans.append((statement, start, self.position - 1))
+
+                token = self.current_token
+                if token and token[0] == ';':
+                    self.match(';')  # Consume the semicolon; the next statement follows
+                    expect_statement = True
+                    continue
+                if token and token[0] not in self.BLOCK_END:
+                    # If the token isn't a semicolon or block-ending token, it's an error
+                    self.error(f"Syntax error, unexpected token: {token}")
+
+                # The sequence is over: it is the whole result or the body of the innermost block
+                if not blocks:
+                    if token is None or not to_end:
+                        return head
+                    # If there are unexpected tokens after parsing
+                    self.error("Unexpected token after program. Found: " + str(token), resumable=True)
+                    expect_statement = self._skip_token()
+                    continue
+                block = blocks[-1]
+                if block[1] == 'if' and token and token[0] == 'else':
+                    # Handle the optional 'else' part as another sequence of the same block
+                    if rules and rules[-1] == 'stmt_sequence':
+                        self._exit_rule(rules)
+                    self.match('ELSE')  # Match the 'else' keyword
+                    if head is not None:
+                        tree.add_child(block[0], head)
+                    block[1] = 'else'
+                    head = tail = None
+                    expect_statement = True
+                    if rules is not None:
+                        self._enter_rule(rules, 'stmt_sequence')
+                    continue
+
+                closing = 'until' if block[1] == 'repeat' else 'end'
+                if token is None or token[0] != closing:
+                    if token is None:
+                        self.error(f"Expected {closing.upper()}, found None", resumable=True)
+                    elif closing == 'until':
+                        # If 'until' is missing after the repeat statements
+                        self.error("Expected 'UNTIL' after repeat statement.", resumable=True)
+                    else:
+                        # If 'end' is missing after the 'if' statement
+                        self.error("Expected 'END' after 'if' statement.", resumable=True)
+                    # Recovering: close the block here if the token belongs to an enclosing block
+                    if token is None or any(open_block[1] in self.CLOSED_BY[token[0]] for open_block in blocks[:-1]):
+                        head, tail = self._close_block(blocks.pop(), head)
+                        if rules is not None:
+                            self._exit_block_rules(rules, 'error')
+                    else:
+                        expect_statement = self._skip_token()
+                    continue
+
+                if rules and rules[-1] == 'stmt_sequence':
+                    self._exit_rule(rules)  # Not entered when the condition of an if failed
+                self.match(closing.upper())  # Match the 'until' or 'end' keyword
+                # The closed block is a finished statement of the enclosing sequence
+                block = blocks.pop()
+                head, tail = self._close_block(block, head)
+                if closing == 'until':
+                    tree.add_child(tail, self.exp())  # Parse the condition expression
+                if rules is not None:
+                    self._exit_block_rules(rules)
+                if spans is not None:
+                    spans.append((tail, block[4], self.position - 1))
+            except ParserError:
+                if not self.recover:
+                    while rules:
+                        self._exit_rule(rules, 'error')  # The error leaves every open block
+                    raise
+                if rules and len(rules) - rules.count('stmt_sequence') > len(blocks):
+                    self._exit_block_rules(rules, 'error')  # The condition after 'until' failed
+                # Panic mode: skip ahead to a token the sequence can continue from
+                while self.current_token and self.current_token[0] not in self.SYNC_TOKENS:
+                    self.advance()
+                expect_statement = False
+
+    def _enter_rule(self, rules, rule):
+        """Reports entering a rule of a block, as the traced grammar methods do."""
+        self.tracer.emit('enter', rule, self.current_token)
+        self.tracer.depth += 1
+        rules.append(rule)
+
+    def _exit_rule(self, rules, detail=None):
+        """Reports leaving the innermost entered block rule."""
+        self.tracer.depth -= 1
+        self.tracer.emit('exit', rules.pop(), self.current_token, detail)
+
+    def _exit_block_rules(self, rules, detail=None):
+        """Reports leaving the innermost block: its open sequence, if any, and its if_stmt or repeat_stmt."""
+        if rules[-1] == 'stmt_sequence':
+            self._exit_rule(rules, detail)
+        self._exit_rule(rules, detail)
+
+    def _close_block(self, block, body):
+        """
+        Adds the finished body to a block's node and appends the node to the enclosing
+        sequence; returns the new (head, tail) of that sequence.
+        """
+        block_node, _, head, tail, _ = block
+        if body is not None:
+            self.tree.add_child(block_node, body)
+        if head is None:
+            head = block_node
         else:
-            self.error("Invalid statement type or missing keyword")
-
-    def if_stmt(self):
-        """Parse an if-statement."""
-        print("Parsing if-stmt.")
-        if_node = Node("if", "rectangle")  # Create an 'if' node
-        self.match('IF')  # Match the 'if' keyword
-        if_node.add_child(self.exp())  # Parse the condition expression and add it as a child
-        self.match('THEN')  # Match the 'then' keyword
-        if_node.add_child(self.stmt_sequence())  # Parse the 'then' part statements
-
-        if self.current_token and self.current_token[0] == 'else':
-            # Handle the optional 'else' part
-            print("Found ELSE in if-stmt.")
-            self.match('ELSE')  # Match the 'else' keyword
-            if_node.add_child(self.stmt_sequence())  # Parse the 'else' part statements
-
-        if self.current_token and self.current_token[0] != 'end':
-            # If 'end' is missing after the 'if' statement
-            self.error("Expected 'END' after 'if' statement.")
-        self.match('END')  # Match the 'end' keyword
-        return if_node  # Return the 'if' node
-
-    def repeat_stmt(self):
-        """Parse a repeat-statement."""
-        print("Parsing repeat-stmt.")
-        repeat_node = self.match('REPEAT')  # Match the 'repeat' keyword and create a node
-        repeat_node.add_child(self.stmt_sequence())  # Parse the statements inside the repeat
-        if self.current_token and self.current_token[0] != 'until':
-            # If 'until' is missing after the repeat statements
-            self.error("Expected 'UNTIL' after repeat statement.")
-        self.match('UNTIL')  # Match the 'until' keyword
-        repeat_node.add_child(self.exp())  # Parse the condition expression
-        return repeat_node  # Return the 'repeat' node
+            self.tree.sibling[tail] = block_node
+        return head, block_node
+
+    def _skip_token(self):
+        """Skips a stray token while recovering; returns whether a statement starts after it."""
+        self.advance()
+        return self.current_token is not None and self.current_token[0] not in self.SYNC_TOKENS
 
     def assign_stmt(self):
         """Parse an assignment-statement."""
-        print("Parsing assign-stmt.")
-        temp_node = self.match('IDENTIFIER')  # Match an identifier (variable name)
-        assign_node = Node(f"assign({temp_node.name})", "rectangle")  # Create an 'assign' node
+        line_number = self.line_number
+        name = self.match('IDENTIFIER')  # Match an identifier (variable name)
+        assign_node = self.tree.add(ASSIGN_NODE, name, line_number)  # Create an 'assign' node
         self.match(':=')  # Match the assignment operator ':='
-        assign_node.add_child(self.exp())  # Parse the expression being assigned
+        self.tree.add_child(assign_node, self.exp())  # Parse the expression being assigned
         return assign_node  # Return the 'assign' node
 
     def read_stmt(self):
         """Parse a read-statement."""
-        print("Parsing read-stmt.")
+        line_number = self.line_number
         self.match('READ')  # Match the 'read' keyword
-        temp_node = self.match('IDENTIFIER')  # Match the identifier to read into
-        read_node = Node(f"read({temp_node.name})", "rectangle")  # Create a 'read' node
-        return read_node  # Return the 'read' node
+        name = self.match('IDENTIFIER')  # Match the identifier to read into
+        return self.tree.add(READ_NODE, name, line_number)  # Create and return a 'read' node
 
     def write_stmt(self):
         """Parse a write-statement."""
-        print("Parsing write-stmt.")
-        write_node = Node("write", "rectangle")  # Create a 'write' node
+        write_node = self.tree.add(WRITE_NODE, line=self.line_number)  # Create a 'write' node
         self.match('WRITE')  # Match the 'write' keyword
-        write_node.add_child(self.exp())  # Parse the expression to be written
+        self.tree.add_child(write_node, self.exp())  # Parse the expression to be written
         return write_node  # Return the 'write' node
 
     def exp(self):
-        """Parse an expression."""
-        print("Parsing exp.")
-        temp_node = self.simple_exp()  # Parse a simple expression
-        if self.current_token and self.current_token[0] in ['<', '=']:
-            # If there's a comparison operator, create a new node
-            print(f"Found comparison operator: {self.current_token[0]}")
-            new_temp = self.match(self.current_token[0])  # Match the operator
-            new_temp.add_child(temp_node)  # Add left operand
-            new_temp.add_child(self.simple_exp())  # Parse and add right operand
-            temp_node = new_temp  # Update the temporary node
-        return temp_node  # Return the expression node
-
-    def simple_exp(self):
-        """Parse a simple expression consisting of terms and add operators."""
-        print("Parsing simple-exp.")
-        temp_node = self.term()  # Parse the first term
-        while self.current_token and self.current_token[0] in ['+', '-']:
-            # While there are add operators, create new nodes
-            print(f"Found addop: {self.current_token[0]}")
-            new_temp = self.match(self.current_token[0])  # Match the '+' or '-' operator
-            new_temp.add_child(temp_node)  # Add left operand
-            new_temp.add_child(self.term())  # Parse and add right operand
-            temp_node = new_temp  # Update the temporary node
-        return temp_node  # Return the simple expression node
-
-    def term(self):
-        """Parse a term consisting of factors and multiply operators."""
-        print("Parsing term.")
-        temp_node = self.factor()  # Parse the first factor
-        while self.current_token and self.current_token[0] in ['*', '/']:
-            # While there are multiply operators, create new nodes
-            print(f"Found mulop: {self.current_token[0]}")
-            new_temp = self.match(self.current_token[0])  # Match the '*' or '/' operator
-            new_temp.add_child(temp_node)  # Add left operand
-            new_temp.add_child(self.factor())  # Parse and add right operand
-            temp_node = new_temp  # Update the temporary node
-        return temp_node  # Return the term node
-
-    def factor(self):
-        """Parse a factor, which could be a number, an identifier, or an expression in parentheses."""
-        print(f"Parsing factor. Current token: {self.current_token}")
-        if self.current_token:
-            token_value, token_type = self.current_token
-            if token_type == "NUMBER":
-                return self.match("NUMBER")  # Match and return a number node
-            elif token_type == "IDENTIFIER":
-                return self.match("IDENTIFIER")  # Match and return an identifier node
-            elif token_value == "(":
-                # Handle expressions in parentheses
-                self.match("(")  # Match the opening parenthesis
-                expr_node = self.exp()  # Parse the inner expression
-                self.match(")")  # Match the closing parenthesis
-                return expr_node  # Return the expression node
+        """
+        Parse an expression by precedence climbing:
+        exp -> simple-exp [comparison-op simple-exp], simple-exp -> term {addop term},
+        term -> factor {mulop factor}, factor -> (exp) | number | identifier.
+        A parenthesis saves the enclosing expression on an explicit stack instead of
+        recursing, so the nesting depth is only limited by memory. Returns the tree index
+        of the expression's root node. Tokens consumed without match() are still reported
+        as 'match' events when tracing tokens.
+        """
+        precedence = self.PRECEDENCE
+        advance = self.advance
+        add = self.tree.add
+        first_child = self.tree.first_child
+        next_child = self.tree.next_child
+        frames = []  # Enclosing parenthesized expressions: (operands, operators, compared)
+        operands = []  # Operand nodes of the innermost expression
+        operators = []  # Pending (operator node, precedence) pairs of the innermost expression
+        compared = False  # Whether the innermost expression already has its comparison
+        tracer = self.tracer
+        trace = tracer.emit if tracer is not None and tracer.level >= TOKENS else None
+
+        while True:
+            # Parse a factor
+            token = self.current_token
+            token_type = token[1] if token else None
+            # The token is already known to fit, so build its node directly instead of through match()
+            if token_type == "IDENTIFIER":
+                if trace is not None:
+                    trace('match', token=token, detail="IDENTIFIER")
+                operands.append(add(ID_NODE, token[0], self.line_number))  # Push an identifier node
+                advance()
+            elif token_type == "NUMBER":
+                if trace is not None:
+                    trace('match', token=token, detail="NUMBER")
+                operands.append(add(CONST_NODE, token[0], self.line_number))  # Push a number node
+                advance()
+            elif token and token[0] == "(":
+                # Start an expression in parentheses, saving the enclosing one
+                if trace is not None:
+                    trace('match', token=token, detail="(")
+                advance()  # Consume the opening parenthesis
+                frames.append((operands, operators, compared))
+                operands, operators, compared = [], [], False
+                continue
             else:
-                # Invalid factor
                 self.error("Invalid factor")
-        # If current token is None or invalid
-        self.error("Invalid factor")
\ No newline at end of file
+
+            while True:
+                token = self.current_token
+                level = precedence.get(token[0]) if token else None
+                # An expression has at most one comparison; a second one ends it
+                if level is not None and not (level == 1 and compared):
+                    break
+
+                # The innermost expression is complete: apply its pending operators
+                while operators:
+                    operator_node = operators.pop()[0]
+                    right = operands.pop()
+                    left = operands.pop()
+                    first_child[operator_node] = left  # Add left operand
+                    next_child[left] = right  # Add right operand
+                    operands.append(operator_node)
+                if not frames:
+                    return operands[0]  # Return the expression node
+                self.match(")")  # Match the closing parenthesis
+                expr_node = operands[0]
+                operands, operators, compared = frames.pop()
+                operands.append(expr_node)  # The parenthesized expression is a factor of the enclosing one
+
+            # Operators bind left to right: apply pending ones that bind at least as tightly
+            while operators and operators[-1][1] >= level:
+                operator_node = operators.pop()[0]
+                right = operands.pop()
+                left = operands.pop()
+                first_child[operator_node] = left  # Add left operand
+                next_child[left] = right  # Add right operand
+                operands.append(operator_node)
+            if level == 1:
+                compared = True
+            if trace is not None:
+                trace('match', token=token, detail=token[0])
+            operators.append((add(OP_NODE, token[0], self.line_number), level))  # Create the operator node
+            advance()  # Consume the operator
@@ -0,0 +1,218 @@
+"""
+Seeded generator of synthetic TINY programs, for benchmarks and stress tests.
+
+Usage:
+    python program_generator.py [-o FILE] [--lines N] [--seed S] [--depth D]
+                                [--expression-size K] [--comments P] [--invalid P]
+
+Programs are streamed line by line, so even 10M-line programs never sit in memory.
+Every statement takes one line; if and repeat blocks nest up to `depth` levels, and
+expressions have about `expression_size` operators. `comments` is the chance that a
+line carries a comment (every tenth of them a comment block spanning lines). With
+`invalid` above 0 that share of statements gets a syntax error: a missing ';', '=' for
+':=', a missing operand or a missing 'then'. The scanner stops at the first lexical
+error, so errors are syntactic only. The same arguments always give the same program.
+"""
+import argparse
+import random
+import sys
+
+KEYWORDS = frozenset(('if', 'then', 'else', 'end', 'repeat', 'until', 'read', 'write'))
+COMMENT_WORDS = ('compute', 'the', 'next', 'value', 'loop', 'counter', 'check', 'result', 'sum', 'update')
+
+
+class ProgramGenerator:
+    """Generates one program; lines() yields its lines."""
+
+    def __init__(self, seed=0, lines=1000, depth=3, expression_size=3, comments=0.1, invalid=0.0, variables=40):
+        self.random = random.Random(seed)
+        self.line_count = lines  # Lines to generate (the last statement may add a few)
+        self.depth = depth  # Deepest nesting of if/repeat blocks
+        self.expression_size = expression_size  # Average operators per expression
+        self.comments = comments  # Chance of a comment on a line
+        self.invalid = invalid  # Chance of a syntax error in a statement
+        self.names = self._make_names(variables)
+
+    def _make_names(self, count):
+        # Letters only: the scanner splits "x1" into an identifier and a number
+        names = []
+        seen = set(KEYWORDS)
+        while len(names) < count:
+            name = ''.join(self.random.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(self.random.randint(1, 6)))
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+        return names
+
+    def _factor(self, operators):
+        # A number, a variable or, while operators remain, a parenthesized expression
+        chance = self.random.random()
+        if operators > 1 and chance < 0.2:
+            return f"({self._arithmetic(operators // 2)})", operators // 2
+        if chance < 0.55:
+            return self.random.choice(self.names), 0
+        return str(self.random.randint(0, 999)), 0
+
+    def _arithmetic(self, operators):
+        """An expression of additions, subtractions, multiplications and divisions."""
+        text, used = self._factor(operators)
+        while used < operators:
+            operand, inner = self._factor(operators - used)
+            text = f"{text} {self.random.choice('+-*/')} {operand}"
+            used += inner + 1
+        return text
+
+    def _expression(self):
+        return self._arithmetic(self.random.randint(0, self.expression_size * 2))
+
+    def _condition(self):
+        operators = self.random.randint(0, self.expression_size)
+        return f"{self._arithmetic(operators // 2)} {self.random.choice('<=')} {self._arithmetic(operators - operators // 2)}"
+
+    def _simple_statement(self):
+        chance = self.random.random()
+        if chance < 0.7:
+            return f"{self.random.choice(self.names)} := {self._expression()}"
+        if chance < 0.85:
+            return f"read {self.random.choice(self.names)}"
+        return f"write {self._expression()}"
+
+    def _corrupt(self, line):
+        """Introduces one syntax error into a statement line."""
+        chance = self.random.random()
+        if ':=' in line and chance < 0.4:
+            return line.replace(':=', '=', 1)
+        if line.lstrip().startswith('if ') and chance < 0.7:
+            return line.replace(' then', '', 1)
+        if chance < 0.8:
+            return line + ' +'  # Missing operand
+        return line + ' ' + self.random.choice(self.names)  # Missing ';' before the next statement
+
+    def _comment(self):
+        words = ' '.join(self.random.choice(COMMENT_WORDS) for _ in range(self.random.randint(1, 6)))
+        if self.random.random() < 0.1:
+            return f"{{ {words}\n  {words} }}"  # A comment block spanning two lines
+        return f"{{ {words} }}"
+
+    def lines(self):
+        """Yields the lines of the program, without newlines."""
+        emitted = 0
+        pending = None  # Last line of the previous top-level statement, which gets ';' if another follows
+        while emitted < self.line_count or pending is None:
+            statement = self._statement_lines()
+            if pending is not None:
+                yield self._finish_line(pending, ';')
+            for line in statement[:-1]:
+                yield self._finish_line(line, '')
+            pending = statement[-1]
+            emitted += len(statement)
+        yield self._finish_line(pending, '')
+
+    def _finish_line(self, line, separator):
+        code, comment = line
+        text = code + separator
+        if comment:
+            text += ' ' + comment
+        return text
+
+    def _statement_lines(self):
+        """
+        Returns the lines of one top-level statement as [code, comment] pairs, the last
+        one still without its separator. Blocks are built with an explicit stack of open
+        bodies, each counting the statements it still needs.
+        """
+        random_ = self.random
+        lines = []
+        bodies = []  # [kind, statements left]: kind is 'then', 'else' or 'repeat'
+
+        def add(code):
+            if self.invalid and random_.random() < self.invalid:
+                code = self._corrupt(code)
+            lines.append([code, self._comment() if random_.random() < self.comments else ''])
+
+        def separate():
+            # A statement just ended; more in the same body need a ';' after it
+            if bodies and bodies[-1][1] > 0:
+                lines[-1][0] += ';'
+
+        def start_statement():
+            level = len(bodies)
+            chance = random_.random()
+            indent = '  ' * level
+            if level < self.depth and chance < 0.12:
+                add(f"{indent}if {self._condition()} then")
+                bodies.append(['then', random_.randint(1, 4)])
+            elif level < self.depth and chance < 0.2:
+                add(f"{indent}repeat")
+                bodies.append(['repeat', random_.randint(1, 4)])
+            else:
+                add(indent + self._simple_statement())
+                separate()
+
+        start_statement()
+        while bodies:
+            body = bodies[-1]
+            if body[1] > 0:
+                body[1] -= 1
+                start_statement()
+                continue
+            # Close the body
+            bodies.pop()
+            indent = '  ' * len(bodies)
+            if body[0] == 'then' and random_.random() < 0.4:
+                lines.append([f"{indent}else", ''])
+                bodies.append(['else', random_.randint(1, 4)])
+                continue
+            if body[0] == 'repeat':
+                add(f"{indent}until {self._condition()}")
+            else:
+                lines.append([f"{indent}end", ''])
+            separate()
+        return lines
+
+
+def generate_lines(**options):
+    """Yields the lines of a program; the keyword options are those of ProgramGenerator."""
+    return ProgramGenerator(**options).lines()
+
+
+def generate_program(**options):
+    """Returns a whole program as one string."""
+    return "\n".join(generate_lines(**options)) + "\n"
+
+
+def write_program(path, **options):
+    """Streams a program to a file and returns the number of lines written."""
+    count = 0
+    with open(path, 'w') as file:
+        for line in generate_lines(**options):
+            file.write(line)
+            file.write("\n")
+            count += line.count("\n") + 1
+    return count
+
+
+def main(argv=None):
+    """Writes one generated program to a file or stdout."""
+    arg_parser = argparse.ArgumentParser(description="Generate a synthetic TINY program.")
+    arg_parser.add_argument('-o', '--output', help="file to write (default: stdout)")
+    arg_parser.add_argument('--lines', type=int, default=1000, help="approximate number of lines")
+    arg_parser.add_argument('--seed', type=int, default=0, help="random seed")
+    arg_parser.add_argument('--depth', type=int, default=3, help="deepest nesting of if/repeat blocks")
+    arg_parser.add_argument('--expression-size', type=int, default=3, help="average operators per expression")
+    arg_parser.add_argument('--comments', type=float, default=0.1, help="chance of a comment on a line")
+    arg_parser.add_argument('--invalid', type=float, default=0.0, help="chance of a syntax error in a statement")
+    args = arg_parser.parse_args(argv)
+
+    options = dict(seed=args.seed, lines=args.lines, depth=args.depth, expression_size=args.expression_size,
+                   comments=args.comments, invalid=args.invalid)
+    if args.output:
+        write_program(args.output, **options)
+    else:
+        for line in generate_lines(**options):
+            sys.stdout.write(line + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Translation of TINY programs to Python, so CPython's own eval loop runs them.
+
+translate() turns a parsed program into the source of one Python function whose
+variables are fast locals (every TINY variable `x` becomes the local `v_x`, starting
+at 0). `repeat ... until c` becomes `while True: ... if c: break`, read and write call
+the function's `read` and `write` arguments, and division calls vm.divide, so the
+results match the VM exactly. Expressions nested deeper than CPython's compiler likes
+are split into temporaries (`t_1`, ...). compile_program() compiles the source once
+and keeps the code object in a small cache keyed by a hash of the source, so compiling
+the same program again costs only the translation.
+
+CPython refuses functions with more than 20 nested loops or more than 99 levels of
+indentation. The function body takes one level, every if or repeat block one more and
+the `break` ending a repeat one more still, so translate() raises TranslationError for
+programs nesting `repeat` more than 20 deep and for blocks nested more than 98 deep (97
+when the innermost one is a repeat).
+"""
+import hashlib
+import sys
+from collections import OrderedDict
+
+from parser import ASSIGN_NODE, CONST_NODE, ID_NODE, IF_NODE, NO_NODE, READ_NODE, REPEAT_NODE, WRITE_NODE
+from vm import VMError, divide
+
+FUNCTION_NAME = 'tiny_program'
+MAX_EXPRESSION_DEPTH = 50  # Deeper subexpressions are assigned to temporaries first
+CACHE_SIZE = 128  # Code objects kept by compile_program()
+MAX_NESTED_LOOPS = 20  # CPython's limit of statically nested blocks in one function
+MAX_INDENT = 99  # CPython's limit of indentation levels
+
+# Precedence of the Python form of each operator; comparisons are wrapped into 1 or 0, and
+# division is a call, so both are atoms inside a larger expression
+ATOM = 3
+PYTHON_OPERATORS = {'+': ('+', 1), '-': ('-', 1), '*': ('*', 2), '<': ('<', 0), '=': ('==', 0)}
+
+_code_cache = OrderedDict()  # Source hash -> code object, least recently used first
+
+
+class TranslationError(Exception):
+    """Raised for programs nested too deeply for CPython to compile their translation."""
+    pass
+
+
+def _check_nesting(tree, root):
+    """Raises TranslationError if the translation of a program would exceed CPython's nesting limits."""
+    kinds, first_child, next_child, sibling = tree.kinds, tree.first_child, tree.next_child, tree.sibling
+    # (statement, enclosing blocks, enclosing repeats); a statement at depth d is indented d + 1
+    stack = [(root, 0, 0)]
+    while stack:
+        node, depth, loops = stack.pop()
+        while node != NO_NODE:
+            kind = kinds[node]
+            if kind == IF_NODE:
+                # The body is indented depth + 2
+                if depth + 2 > MAX_INDENT:
+                    raise TranslationError(f"Line {tree.lines[node]}: if and repeat blocks are nested too deeply "
+                                           f"for the Python translation ({MAX_INDENT} levels of indentation at most)")
+                then_part = next_child[first_child[node]]
+                if then_part != NO_NODE:
+                    stack.append((then_part, depth + 1, loops))
+                    stack.append((next_child[then_part], depth + 1, loops))
+            elif kind == REPEAT_NODE:
+                # The break ending the loop is indented depth + 3
+                if loops + 1 > MAX_NESTED_LOOPS:
+                    raise TranslationError(f"Line {tree.lines[node]}: repeat loops are nested more than "
+                                           f"{MAX_NESTED_LOOPS} deep, which the Python translation cannot run")
+                if depth + 3 > MAX_INDENT:
+                    raise TranslationError(f"Line {tree.lines[node]}: if and repeat blocks are nested too deeply "
+                                           f"for the Python translation ({MAX_INDENT} levels of indentation at most)")
+                stack.append((first_child[node], depth + 1, loops + 1))
+            node = sibling[node]
+
+
+def translate(root, counted=False):
+    """
+    Returns the Python source of a function running the NodeView returned by
+    Parser.program(), and the TINY line of each of its lines (0 for none). With
+    `counted`, every repeat iteration takes one unit of the function's `budget`.
+    Raises TranslationError for programs nested too deeply for CPython.
+    """
+    names = {}  # TINY name -> local name, in order of first use
+    lines = []
+    body = []
+    temporaries = 0
+
+    def put(text, indent, line):
+        body.append('    ' * indent + text)
+        lines.append(line)
+
+    def local(name):
+        python_name = names.get(name)
+        if python_name is None:
+            python_name = names[name] = f'v_{name}'
+        return python_name
+
+    def expression(node, indent, condition=False):
+        # Post-order over the expression with an explicit stack; results hold (text, precedence, depth)
+        nonlocal temporaries
+        line = tree.lines[node]
+        results = []
+        stack = [(node, False)]
+        while stack:
+            node, visited = stack.pop()
+            kind = kinds[node]
+            if kind == ID_NODE:
+                results.append((local(tree.value(node)), ATOM, 0))
+                continue
+            if kind == CONST_NODE:
+                results.append((tree.value(node), ATOM, 0))
+                continue
+            left = first_child[node]
+            if not visited:
+                stack.append((node, True))
+                stack.append((next_child[left], False))
+                stack.append((left, False))
+                continue
+            right_text, right_precedence, right_depth = results.pop()
+            left_text, left_precedence, left_depth = results.pop()
+            depth = max(left_depth, right_depth) + 1
+            operator = tree.value(node)
+            if operator == '/':
+                text, precedence = f'divide({left_text}, {right_text})', ATOM
+            else:
+                python_operator, precedence = PYTHON_OPERATORS[operator]
+                if left_precedence < precedence:
+                    left_text = f'({left_text})'
+                if right_precedence <= precedence:
+                    right_text = f'({right_text})'  # Operators are left-associative
+                text = f'{left_text} {python_operator} {right_text}'
+                if precedence == 0 and not (condition and not stack):
+                    # A comparison's value is 1 or 0, except where it is the whole condition
+                    text, precedence = f'(1 if {text} else 0)', ATOM
+            if depth > MAX_EXPRESSION_DEPTH and stack:
+                temporaries += 1
+                temporary = f't_{temporaries}'
+                put(f'{temporary} = {text}', indent, line)
+                text, precedence, depth = temporary, ATOM, 0
+            results.append((text, precedence, depth))
+        return results[0][0]
+
+    if root is not None:
+        tree = root.tree
+        _check_nesting(tree, root.index)
+        kinds, first_child, next_child, sibling = tree.kinds, tree.first_child, tree.next_child, tree.sibling
+        # Work items, done in order: ('chain', statement, indent) translates a statement and its
+        # siblings, ('body', head, indent) a block body (which may be empty), ('line', text,
+        # indent, line) puts a line and ('until', repeat, indent) ends a loop
+        work = [('chain', root.index, 1)]
+        while work:
+            item = work.pop()
+            action = item[0]
+            if action == 'body':
+                if item[1] == NO_NODE:
+                    put('pass', item[2], 0)
+                else:
+                    work.append(('chain', item[1], item[2]))
+                continue
+            if action == 'line':
+                put(item[1], item[2], item[3])
+                continue
+            if action == 'until':
+                node, indent = item[1], item[2]
+                test = next_child[first_child[node]]
+                put(f'if {expression(test, indent, True)}:', indent, tree.lines[test])
+                put('break', indent + 1, tree.lines[test])
+                continue
+            node, indent = item[1], item[2]
+            if node == NO_NODE:
+                continue
+            work.append(('chain', sibling[node], indent))
+            kind = kinds[node]
+            line = tree.lines[node]
+            if kind == ASSIGN_NODE:
+                value = expression(first_child[node], indent)
+                put(f'{local(tree.value(node))} = {value}', indent, line)
+            elif kind == READ_NODE:
+                put(f'{local(tree.value(node))} = read()', indent, line)
+            elif kind == WRITE_NODE:
+                put(f'write({expression(first_child[node], indent)})', indent, line)
+            elif kind == IF_NODE:
+                test = first_child[node]
+                then_part = next_child[test]
+                else_part = next_child[then_part] if then_part != NO_NODE else NO_NODE
+                put(f'if {expression(test, indent, True)}:', indent, line)
+                if else_part != NO_NODE:
+                    work.append(('body', else_part, indent + 1))
+                    work.append(('line', 'else:', indent, line))
+                work.append(('body', then_part, indent + 1))
+            elif kind == REPEAT_NODE:
+                put('while True:', indent, line)
+                if counted:
+                    put('budget -= 1', indent + 1, line)
+                    put('if budget < 0:', indent + 1, line)
+                    put(f'exhausted({line})', indent + 2, line)
+                work.append(('until', node, indent + 1))
+                work.append(('body', first_child[node], indent + 1))
+
+    header = [f'def {FUNCTION_NAME}(read, write, divide, exhausted, budget):']
+    header.extend(f'    {python_name} = 0' for python_name in names.values())
+    header.extend(f'    t_{number} = 0' for number in range(1, temporaries + 1))
+    variables = ', '.join(f'{name!r}: {python_name}' for name, python_name in names.items())
+    source = header + body + [f'    return {{{variables}}}']
+    lines = [0] * len(header) + lines + [0]
+    return "\n".join(source) + "\n", lines
+
+
+def _compile(source):
+    """Compiles function source to a code object, reusing the cached one for the same source."""
+    key = hashlib.sha256(source.encode()).hexdigest()
+    code = _code_cache.get(key)
+    if code is not None:
+        _code_cache.move_to_end(key)
+        return code
+    code = compile(source, f'<{FUNCTION_NAME}>', 'exec')
+    _code_cache[key] = code
+    if len(_code_cache) > CACHE_SIZE:
+        _code_cache.popitem(last=False)
+    return code
+
+
+class PythonProgram:
+    """A TINY program compiled to a Python function."""
+
+    def __init__(self, source, lines, counted):
+        self.source = source  # Python source of the function
+        self.lines = lines  # TINY line of each source line, for runtime errors
+        self.counted = counted  # Whether the function can enforce a budget
+        namespace = {}
+        exec(_compile(source), namespace)
+        self.function = namespace[FUNCTION_NAME]
+
+    def run(self, input=None, output=None, budget=None):
+        """
+        Runs the program with reads from the iterable `input` (stdin by default) and
+        writes to the file-like `output` (stdout by default), and returns the final
+        values of its variables. Raises VMError for the VM's runtime errors; with a
+        budget (which needs a `counted` program) a program still looping after that
+        many repeat iterations raises VMError as well.
+        """
+        if budget is not None and not self.counted:
+            raise ValueError("a budget needs a program compiled with counted=True")
+        next_input = iter(input if input is not None else sys.stdin).__next__
+        write_text = (output if output is not None else sys.stdout).write
+
+        def read():
+            return int(next_input())
+
+        def write(value):
+            write_text(f"{value}\n")
+
+        def exhausted(line):
+            raise VMError(f"Repeat budget of {budget} exhausted at line {line}")
+
+        try:
+            return self.function(read, write, divide, exhausted, budget if budget is not None else 0)
+        except ZeroDivisionError as e:
+            raise VMError(f"Runtime Error at line {self._line(e)}: division by zero") from None
+        except StopIteration as e:
+            raise VMError(f"Runtime Error at line {self._line(e)}: no more input for read") from None
+        except ValueError as e:
+            raise VMError(f"Runtime Error at line {self._line(e)}: invalid input: {e}") from None
+
+    def _line(self, error):
+        # The innermost frame of the generated function in the traceback
+        line = 0
+        traceback = error.__traceback__
+        while traceback is not None:
+            if traceback.tb_frame.f_code.co_name == FUNCTION_NAME:
+                line = self.lines[traceback.tb_lineno - 1]
+            traceback = traceback.tb_next
+        return line
+
+
+def compile_program(root, counted=False):
+    """Translates and compiles the NodeView returned by Parser.program() into a PythonProgram."""
+    source, lines = translate(root, counted)
+    return PythonProgram(source, lines, counted)
+
+
+def run(root, input=None, output=None, budget=None):
+    """Compiles and runs a parsed program; returns the final values of its variables."""
+    return compile_program(root, counted=budget is not None).run(input, output, budget)
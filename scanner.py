@@ -1,418 +1,624 @@
-# PyQt5 imports for GUI components
-from PyQt5.QtGui import QTextCursor, QFont, QPixmap, QFontMetrics, QColor
-from PyQt5 import QtCore, QtGui, QtWidgets
-from PyQt5.QtWidgets import QGraphicsEllipseItem, QGraphicsTextItem, QGraphicsScene, QGraphicsRectItem, QMessageBox, QFileDialog
-from PyQt5.QtGui import QPen, QBrush
-from PyQt5.QtCore import Qt, QPointF
-
+# Qt-free lexer for the TINY language; the GUI lives in app.py and is loaded only when it starts
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+import mmap  # Import mmap module for scanning mapped files
+import os
+import re  # Import re module for the regular-expression fast path
+from itertools import repeat
 import sys  # Import sys module for system-specific parameters and functions
 
-# Import custom modules
-from gui import Ui_MainWindow  # Import the GUI layout from gui.py (assumed to be generated from Qt Designer)
-from parser import Parser, ParserError, Node  # Import Parser, ParserError, and Node classes from parser.py
-
-
-# Define a class for drawing the syntax tree
-class SyntaxTreeDrawer:
-    def __init__(self, graphicsView, root_node):
-        # Initialize the drawer with the QGraphicsView and the root node of the tree
-        self.graphicsView = graphicsView  # The graphics view where the tree will be displayed
-        self.root_node = root_node  # The root node of the syntax tree
-        self.scene = QGraphicsScene()  # Create a new graphics scene
-        self.graphicsView.setScene(self.scene)  # Set the scene to the graphics view
-        # Set spacing parameters for drawing the tree
-        self.vertical_spacing = 100  # Vertical spacing between nodes
-        self.horizontal_spacing = 70  # Horizontal spacing between nodes
-        self.text_padding = 10  # Padding around the text in nodes
-
-    def clear_scene(self):
-        """Clears the QGraphicsScene and ensures all items are removed."""
-        # Remove all items from the scene
-        for item in self.scene.items():
-            self.scene.removeItem(item)
-        self.scene.clear()  # Clear the scene
-
-    def display_message(self, message):
-        """Displays a message on the QGraphicsView."""
-        self.clear_scene()  # Properly clear the scene
-        text_item = QGraphicsTextItem(message)  # Create a text item with the message
-        text_item.setDefaultTextColor(Qt.red)  # Set text color to red
-        text_item.setFont(QFont("Arial", 16))  # Set font to Arial, size 16
-        text_item.setPos(10, 10)  # Position the text in the scene
-        self.scene.addItem(text_item)  # Add the text item to the scene
-        # Adjust the scene rectangle to fit the items
-        self.graphicsView.setSceneRect(self.scene.itemsBoundingRect())
-
-    def draw_tree(self):
-        """Draws the syntax tree on the QGraphicsScene."""
-        self.scene.clear()  # Clear any existing items in the scene
-        # Determine the positions of all nodes in the tree
-        positions = {}
-        self._calculate_positions(self.root_node, 0, 0, positions)
-        # Draw the tree based on calculated positions
-        self._draw_tree(self.root_node, positions)
-        # Adjust the scene rectangle to fit the items
-        self.graphicsView.setSceneRect(self.scene.itemsBoundingRect())
-
-    def _calculate_positions(self, node, x, y, positions):
-        """Recursively calculates positions for each node in the tree."""
-        if not node:
-            return 0  # No width contribution for empty nodes
-
-        # Calculate width required for children first
-        children_width = 0
-        child_positions = []
-        for child in node.children:
-            # Calculate positions for child nodes
-            child_width = self._calculate_positions(child, x + children_width, y + self.vertical_spacing, positions)
-            child_positions.append((child, x + children_width))
-            children_width += child_width + self.horizontal_spacing  # Update total width
-
-        # Calculate position for the current node
-        node_width = max(children_width - self.horizontal_spacing, self.horizontal_spacing)
-        node_x = x + (children_width - node_width) // 2  # Center the node based on children
-        positions[node] = QPointF(node_x, y)  # Store the position of the current node
-
-        # Adjust sibling positions
-        if node.sibling:
-            # Calculate positions for sibling nodes
-            sibling_width = self._calculate_positions(node.sibling, x + node_width + self.horizontal_spacing + 10, y, positions)
-            node_width += sibling_width  # Update the width to include sibling
-
-        return node_width  # Return the total width occupied by this node and its siblings
-
-    def _draw_tree(self, node, positions):
-        """Recursively draws each node and its connections on the scene."""
-        if not node:
-            return  # Base case: do nothing for empty nodes
-
-        # Retrieve the position of the current node
-        position = positions[node]
-        x, y = position.x(), position.y()
-
-        # Calculate size of the node based on text content
-        text_item = QGraphicsTextItem(node.name)  # Create a text item with the node's name
-        font_metrics = QFontMetrics(text_item.font())  # Get font metrics
-        text_width = font_metrics.horizontalAdvance(node.name)  # Width of the text
-        text_height = font_metrics.height()  # Height of the text
-        shape_width = text_width + self.text_padding * 2  # Total width including padding
-        shape_height = text_height + self.text_padding * 2  # Total height including padding
-
-        # Draw the current node based on its shape
-        if node.shape == "oval":
-            # Draw an ellipse (oval) for the node
-            node_item = QGraphicsEllipseItem(x - shape_width / 2, y - shape_height / 2,
-                                             shape_width, shape_height)
-        elif node.shape == "rectangle":
-            # Draw a rectangle for the node
-            node_item = QGraphicsRectItem(x - shape_width / 2, y - shape_height / 2,
-                                          shape_width, shape_height)
-        else:
-            raise ValueError(f"Unsupported shape: {node.shape}")  # Handle unexpected shapes
-
-        # Set appearance of the node
-        node_item.setBrush(QBrush(QColor(200, 230, 255)))  # Light blue background color for nodes
-        self.scene.addItem(node_item)  # Add the node to the scene
-
-        # Add text inside the node
-        text_item.setDefaultTextColor(Qt.black)  # Set text color to black
-        text_item.setPos(x - text_width / 2, y - text_height / 2)  # Position the text centered in the node
-        self.scene.addItem(text_item)  # Add the text item to the scene
-
-        # Draw connections to children
-        for child in node.children:
-            child_position = positions[child]
-            # Draw a line from current node to child node
-            self.scene.addLine(x, y + shape_height / 2,
-                               child_position.x(), child_position.y() - shape_height / 2,
-                               QPen(QColor(0, 128, 0), 2))  # Green edges with width 2
-            self._draw_tree(child, positions)  # Recursive call for children
-
-        # Draw connection to sibling
-        if node.sibling:
-            sibling_position = positions[node.sibling]
-            # Draw a line from current node to sibling node
-            self.scene.addLine(x + shape_width / 2, y,
-                               (sibling_position.x() - shape_width / 2) + 40, y,
-                               QPen(QColor(255, 69, 0), 2))  # Orange edges with width 2
-            self._draw_tree(node.sibling, positions)  # Recursive call for sibling
-
-# Define the main backend class for the application
-class Back_End_Class(QtWidgets.QWidget, Ui_MainWindow):
-    def __init__(self):
-        # Initialize the parent classes
-        QtWidgets.QWidget.__init__(self)
-        self.setupUi(MainWindow)  # Set up the UI elements from the generated GUI module
-        self.thread = {}  # Placeholder for threading, if used
-
-        # Connect buttons to their respective functions
-        self.scan.clicked.connect(self.Scan)
-        self.Browse.clicked.connect(self.browse_file)  # Connect the browse button to the browse function
-        self.parse.clicked.connect(self.parser)  # Connect the parse button to the parser function
-
-    def browse_file(self):
-        """Handles file selection and loads it into the input text area."""
-        options = QtWidgets.QFileDialog.Options()
-        # Open a file dialog to select a file
-        file_name, _ = QtWidgets.QFileDialog.getOpenFileName(
-            self,
-            "Open Code File",
-            "",
-            "Text Files (*.txt);;All Files (*)",
-            options=options
-        )
-        if file_name:
-            # Check if the selected file has a .txt extension
-            if not file_name.lower().endswith('.txt'):
-                QMessageBox.warning(
-                    self,
-                    "File Type Error",
-                    "Please select a file with a .txt extension."
-                )
-                return  # Exit the method since the file is not a .txt file
 
-            try:
-                with open(file_name, 'r') as file:
-                    file_content = file.read()  # Read the content of the file
-                self.input.setPlainText(file_content)  # Set the content to the input text area
-                self.Browseline.setText(str(file_name))  # Display the file path
-            except Exception as e:
-                # Handle any errors that occur while opening the file
-                QMessageBox.critical(
-                    self,
-                    "File Error",
-                    f"An error occurred while opening the file:\n{e}"
-                )
-        else:
-            # Inform the user if no file was selected
-            QMessageBox.information(
-                self,
-                "No File Selected",
-                "No file was selected."
-            )
-
-    def Scan(self):
-        """Performs lexical analysis on the input code."""
-        user_input = self.input.toPlainText().splitlines()  # Get the input code as a list of lines
-        user_code = "\n".join(user_input)  # Join the lines back into a single string
-
-        # Check if the input code is empty
-        if not user_code.strip():
-            # Display an error message
-            QMessageBox.warning(
-                self,
-                "Input Error",
-                "No input provided. Please enter code in the input area or select a file."
-            )
-            return  # Exit the method early since there's nothing to scan
-
-        # Initialize scanner and perform scanning
-        self.scanner = Scanner()
-        self.scanner.scan(user_code)
-        self.scanner.output()  # Save output to a file
-
-        # Display tokens and errors in the QTextBrowser
-        output_content = []
-        output_content.append("Tokens:\n")
-        output_content.append(f"{'Line':<5} {'Token':<12} {'Type':<12}\n")
-        output_content.append(f"{'====':<5} {'====':<12} {'=====':<12}\n")
-        for line_number, token, token_type in self.scanner.tokens:
-            output_content.append(f"{line_number:<5} {token:<12} {token_type:<12}\n")
-
-        if self.scanner.errors:
-            output_content.append("\nErrors:\n")
-            for line_number, error in self.scanner.errors:
-                output_content.append(f"Line {line_number}: {error}\n")
-
-        # Join the content and display in the output text area
-        self.output.setPlainText("".join(output_content))  # Assuming `output` is a QTextEdit in your UI
-
-    def parser(self):
-        """Generates and displays the syntax tree."""
-        # Check if there are tokens available
-        if not hasattr(self, 'scanner') or not self.scanner.tokens:
-            QMessageBox.warning(
-                self,
-                "Parsing Error",
-                "No tokens available for parsing. Please perform scanning first."
-            )
-            return
+# List of keywords used in the language
+keywords = ['read', 'if', 'then', 'repeat', 'until', 'write', 'end']
 
-        # Prepare the global tokens list for the parser
-        globall_tokens_list = [(token, token_type) for _, token, token_type in self.scanner.tokens]
-        print(self.scanner.tokens)  # Print the tokens for debugging
+global_tokens_list = []  # Initialize a global list for tokens
 
-        if self.scanner.errors:
-            # If there are scanner errors, display an error message in the graphics view
-            drawer = SyntaxTreeDrawer(self.graphicsView, Node("no", "Rectangle"))
-            drawer.display_message(f"Scanner Error: {self.scanner.errors[0]}")
-        else:
-            # Initialize the parser with the list of tokens
-            parser = Parser(globall_tokens_list)
-            try:
-                # Parse the program and obtain the root of the syntax tree
-                root = parser.program()
-                # Initialize the drawer with the graphics view and the parsed tree
-                drawer = SyntaxTreeDrawer(self.graphicsView, root)
-                # Check for parser errors
-                if not parser.errors:
-                    # No errors, draw the syntax tree
-                    drawer.draw_tree()
+# Scanner states (rows of the transition table)
+START, IN_ASSIGN, IN_NUM, IN_ID, IN_COMMENT = range(5)
+STATE_NAMES = ('START', 'IN_ASSIGN', 'IN_NUM', 'IN_ID', 'IN_COMMENT')
+
+# Character classes (columns of the transition table); CH_EOL is fed once at the end of every line
+(CH_LETTER, CH_DIGIT, CH_SPACE, CH_COLON, CH_EQUAL, CH_SYMBOL,
+ CH_LBRACE, CH_RBRACE, CH_OTHER, CH_EOL) = range(10)
+
+# Actions performed on a transition
+(ACT_NONE,            # Consume the character (skip it or extend the current token)
+ ACT_BEGIN,           # Mark the start of an identifier or number
+ ACT_EMIT_ID,         # Emit the identifier/keyword ending before this character
+ ACT_EMIT_NUM,        # Emit the number ending before this character
+ ACT_SYMBOL,          # Emit a single-character operator
+ ACT_ASSIGN,          # Emit ':='
+ ACT_OPEN_COMMENT,    # Enter a '{ ... }' comment
+ ACT_CLOSE_COMMENT,   # Leave a comment
+ ACT_INVALID,         # Invalid character
+ ACT_DANGLING_COLON,  # ':' at the end of a line
+ ACT_BAD_ASSIGN,      # ':' not followed by '='
+ ACT_NESTED_COMMENT   # '{' inside a comment
+ ) = range(12)
+
+SYMBOL_CHARS = '+-*/=<;()'  # Single-character operator symbols
+PROGRESS_INTERVAL = 4096  # Lines between calls of a progress callback
+
+
+def char_class(c):
+    """Returns the character class of a single character."""
+    if c == '{':
+        return CH_LBRACE
+    if c == '}':
+        return CH_RBRACE
+    if c == ':':
+        return CH_COLON
+    if c == '=':
+        return CH_EQUAL
+    if c in SYMBOL_CHARS:
+        return CH_SYMBOL
+    if c.isdigit():
+        return CH_DIGIT
+    if c.isalpha():
+        return CH_LETTER
+    if c == ' ':
+        return CH_SPACE
+    return CH_OTHER
+
+
+# Precomputed class of every ASCII character; other characters are classified on first sight and cached
+CHAR_CLASSES = {chr(code): char_class(chr(code)) for code in range(128)}
+
+
+def _build_transition_table():
+    """Builds TRANSITIONS[state][char_class] -> (next_state, action)."""
+    table = []
+    for state in range(len(STATE_NAMES)):
+        row = []
+        for cls in range(CH_EOL + 1):
+            if state == IN_COMMENT:
+                if cls == CH_RBRACE:
+                    entry = (START, ACT_CLOSE_COMMENT)
+                elif cls == CH_LBRACE:
+                    entry = (IN_COMMENT, ACT_NESTED_COMMENT)
+                else:
+                    entry = (IN_COMMENT, ACT_NONE)  # Everything else is part of the comment
+            elif state == IN_ASSIGN:
+                if cls == CH_EQUAL:
+                    entry = (START, ACT_ASSIGN)
+                elif cls == CH_EOL:
+                    entry = (START, ACT_DANGLING_COLON)
                 else:
-                    # Display the first error message in the graphics view
-                    drawer.display_message(f"Error: {parser.errors[0]}")
+                    entry = (START, ACT_BAD_ASSIGN)
+            elif state == IN_NUM and cls == CH_DIGIT:
+                entry = (IN_NUM, ACT_NONE)
+            elif state == IN_ID and cls == CH_LETTER:
+                entry = (IN_ID, ACT_NONE)
+            elif state == IN_NUM:
+                entry = (START, ACT_EMIT_NUM)
+            elif state == IN_ID:
+                entry = (START, ACT_EMIT_ID)
+            # START state
+            elif cls == CH_LBRACE:
+                entry = (IN_COMMENT, ACT_OPEN_COMMENT)
+            elif cls == CH_COLON:
+                entry = (IN_ASSIGN, ACT_NONE)
+            elif cls in (CH_SYMBOL, CH_EQUAL):
+                entry = (START, ACT_SYMBOL)
+            elif cls == CH_DIGIT:
+                entry = (IN_NUM, ACT_BEGIN)
+            elif cls == CH_LETTER:
+                entry = (IN_ID, ACT_BEGIN)
+            elif cls in (CH_SPACE, CH_EOL):
+                entry = (START, ACT_NONE)
+            else:
+                entry = (START, ACT_INVALID)
+            row.append(entry)
+        table.append(tuple(row))
+    return tuple(table)
 
-            except ParserError as e:
-                # Handle any unexpected termination of parsing
-                print(f"Parsing failed: {e}")
-                # Display the error message using the drawer
-                drawer = SyntaxTreeDrawer(self.graphicsView, None)  # Pass `None` for the tree
-                drawer.display_message(f"Error: {str(e)}")
 
-# List of keywords used in the language
-keywords = ['read', 'if', 'then', 'repeat', 'until', 'write', 'end']
+TRANSITIONS = _build_transition_table()  # Built once at import
+
+
+def _split_chunks(text, count):
+    """Cuts text into at most `count` pieces of similar size, each ending just after a '\n'."""
+    chunks = []
+    size = len(text) // count + 1
+    start = 0
+    while start < len(text):
+        end = text.find('\n', start + size)
+        end = len(text) if end == -1 else end + 1
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+def _scan_chunk(chunk, first_line):
+    """Worker for Scanner.scan_parallel(): scans one chunk as if it started outside a comment."""
+    scanner = Scanner()
+    scanner._scan_lines(chunk.splitlines(), first_line)
+    end_state = scanner.in_comment_block, scanner.comment_line
+    return scanner.tokens, scanner.errors, scanner.line_states, scanner.stopped_at, end_state
+
+
+# An edit for Scanner.update(): lines first_line..last_line (1-based, inclusive) are replaced by
+# the lines of `text`; last_line = first_line - 1 inserts before first_line
+LineEdit = namedtuple('LineEdit', ['first_line', 'last_line', 'text'])
 
-global_tokens_list = []  # Initialize a global list for tokens
 
 # Define the Scanner class for lexical analysis
 class Scanner:
-    # Define scanner states
-    STATES = {
-        'START': False,
-        'IN_COMMENT': False,
-        'IN_ID': False,
-        'IN_NUM': False,
-        'IN_ASSIGN': False,
-        'DONE': False,
-        'OTHER': False
-    }
-
     def __init__(self):
-        self.set_state('START')  # Set the initial state to START
+        self.state = START  # Current DFA state
         self.tokens = []  # List to store tokens
         self.errors = []  # List to store errors
         self.in_comment_block = False  # Track if inside a multiline comment
-
-    def set_state(self, state):
-        """Sets the current state of the scanner."""
-        for key in self.STATES:
-            self.STATES[key] = False  # Reset all states to False
-        self.STATES[state] = True  # Set the specified state to True
-
-    def get_state(self, state):
-        """Gets the value of a specific state."""
-        return self.STATES[state]
-
-    def scan(self, input_text):
-        """Performs lexical analysis on the input text."""
-        global comment_line
+        self.comment_line = None  # Line where the last comment block was opened
+        # Kept by scan() for update(): the source lines, the lexer state at the start of every
+        # scanned line (plus one past the last line when scanning finished) and the error line
+        self.lines = None
+        self.line_states = []
+        self.stopped_at = None
+
+    def scan(self, input_text, progress=None):
+        """
+        Performs lexical analysis on the input text. An optional progress(done, total)
+        callback is called every PROGRESS_INTERVAL lines; an exception raised by it
+        abandons the scan.
+        """
         lines = input_text.splitlines()  # Split the input text into lines
-        stop_parsing = False  # Flag to indicate parsing should stop
-
-        for line_number, line in enumerate(lines, start=1):
-            if stop_parsing:
-                break  # Stop parsing if the flag is set
-
-            if not self.in_comment_block:
-                self.set_state('START')  # Reset to START state at the beginning of each line if not in a comment
-
-            token = ''  # Initialize an empty token
-            i = 0  # Character index
-            while i < len(line):
-                if stop_parsing:
-                    break  # Stop parsing if the flag is set
-
-                c = line[i]  # Current character
+        self.lines = lines
+        self.line_states = []
+        self.stopped_at = None
+        if self._scan_lines(lines, 1, progress):
+            self.line_states.append(self._line_state(len(lines) + 1))
+            self._finish()
+
+    def _scan_lines(self, lines, first_line, progress=None):
+        """
+        Scans `lines`, numbered from first_line, recording the state at the start of each;
+        returns False if an error stopped scanning.
+        """
+        states = self.line_states
+        for line_number, line in enumerate(lines, start=first_line):
+            if progress is not None and line_number % PROGRESS_INTERVAL == 0:
+                progress(line_number - first_line, len(lines))
+            states.append(self._line_state(line_number))
+            if not self._scan_line(line, line_number, self.tokens):
+                self.stopped_at = line_number
+                return False  # The first error stops scanning
+        return True
+
+    def scan_parallel(self, input_text, workers=None):
+        """
+        Scans the input text in a process pool: it is cut at line boundaries into one chunk
+        per worker and each chunk is scanned as if it started outside a comment. Chunks that
+        actually start inside a comment are rescanned here only until their lexer state
+        matches the worker's checkpoints. Tokens, errors, line numbers and checkpoints are
+        the same as scan() produces.
+        """
+        from concurrent.futures import ProcessPoolExecutor  # Imported here: it costs more than the lexer itself
+
+        workers = workers or os.cpu_count() or 1
+        chunks = _split_chunks(input_text, workers)
+        if len(chunks) < 2:
+            self.scan(input_text)
+            return
 
+        first_lines = []
+        line_counts = []
+        self.lines = []
+        for chunk in chunks:
+            chunk_lines = chunk.splitlines()
+            first_lines.append(len(self.lines) + 1)
+            line_counts.append(len(chunk_lines))
+            self.lines.extend(chunk_lines)
+        self.line_states = []
+        self.stopped_at = None
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_scan_chunk, chunks, first_lines)
+            for first_line, line_count, result in zip(first_lines, line_counts, results):
+                if not self._merge_chunk(first_line, line_count, *result):
+                    return  # The first error stops scanning
+        self.line_states.append(self._line_state(len(self.lines) + 1))
+        self._finish()
+
+    def _merge_chunk(self, first_line, line_count, tokens, errors, states, stopped_at, end_state):
+        """Appends one worker's results after the chunks before it; returns False if scanning stopped."""
+        if self.in_comment_block:
+            # The worker assumed the chunk started outside a comment; redo lines until it agrees
+            for offset, worker_state in enumerate(states):
+                line_number = first_line + offset
+                state = self._line_state(line_number)
+                if state == worker_state:
+                    break
+                self.line_states.append(state)
+                if not self._scan_line(self.lines[line_number - 1], line_number, self.tokens):
+                    self.stopped_at = line_number
+                    return False  # The first error stops scanning
+            else:
+                # No checkpoint matched: scan the lines the worker never reached, if any
+                line_number = first_line + len(states)
+                return self._scan_lines(self.lines[line_number - 1:first_line - 1 + line_count], line_number)
+            tokens = tokens[bisect_left(tokens, (line_number,)):]
+            states = states[offset:]
+
+        self.tokens.extend(tokens)
+        self.line_states.extend(states)
+        self.in_comment_block, self.comment_line = end_state
+        if stopped_at is not None:
+            self.errors.extend(errors)
+            self.stopped_at = stopped_at
+            return False
+        return True
+
+    def _line_state(self, line_number):
+        """
+        Returns the lexer state at the start of a line: None outside comments, otherwise how
+        many lines above the comment was opened (relative, so it survives lines shifting).
+        """
+        return line_number - self.comment_line if self.in_comment_block else None
+
+    def update(self, edit):
+        """
+        Applies a LineEdit to the text of the last scan() and rescans only from the first
+        changed line until the lexer state matches the old checkpoint of a line again, then
+        splices the new tokens into self.tokens. Tokens, errors and checkpoints end up as a
+        fresh scan() of the edited text would leave them.
+
+        Returns the first line (in the new numbering) whose tokens were kept from before the
+        edit, or None when everything from the edit on was rescanned or scanning stopped.
+        """
+        if self.lines is None:
+            raise ValueError("update() needs the checkpoints of a previous scan()")
+        first_line, last_line, text = edit
+        lines = self.lines
+        old_states = self.line_states
+        tokens = self.tokens
+        new_lines = text.splitlines()
+        edited_end = first_line + len(new_lines)  # First line after the inserted lines
+        delta = len(new_lines) - (last_line - first_line + 1)  # Change in the number of lines
+        lines[first_line - 1:last_line] = new_lines
+        if self.stopped_at is not None and self.stopped_at < first_line:
+            return None  # Scanning stopped before the edit and still does
+
+        old_error = self.errors[0] if self.stopped_at is not None else None
+        old_final_state = self.in_comment_block, self.comment_line
+        self.errors = []
+        distance = old_states[first_line - 1]  # Lines before the edit are unchanged
+        self.in_comment_block = distance is not None
+        if self.in_comment_block:
+            self.comment_line = first_line - distance
+
+        new_tokens = []
+        new_states = []
+        line_number = first_line
+        converged = False
+        while line_number <= len(lines):
+            state = self._line_state(line_number)
+            if line_number >= edited_end:
+                old_line = line_number - delta
+                if old_line <= len(old_states) and old_states[old_line - 1] == state:
+                    converged = True  # From here on the old tokens are still right, only shifted
+                    break
+            new_states.append(state)
+            if not self._scan_line(lines[line_number - 1], line_number, new_tokens):
+                break  # The first error stops scanning
+            line_number += 1
+
+        first_index = bisect_left(tokens, (first_line,))
+        if converged:
+            tail_index = bisect_left(tokens, (old_line,))
+            if delta:
+                tail = [(number + delta, token, token_type) for number, token, token_type in tokens[tail_index:]]
+                tokens[first_index:] = new_tokens + tail
+            else:
+                tokens[first_index:tail_index] = new_tokens
+            old_states[first_line - 1:old_line - 1] = new_states
+            if old_error is not None:
+                # The old error is still reached; so is the state scanning stopped in
+                self.stopped_at += delta
+                self.errors.append((old_error[0] + delta, old_error[1]))
+                self.in_comment_block, self.comment_line = old_final_state
                 if self.in_comment_block:
-                    # Handle multiline comments
-                    if c == '}':
-                        self.in_comment_block = False  # End of comment block
-                    elif c == '{':
-                        # Nested comments are not allowed
-                        self.errors.append((line_number, f"NOT ALLOWED NESTED COMMENT"))
-                        stop_parsing = True  # Set the flag to stop parsing
-                        break  # Break out of the current loop
-                    i += 1  # Move to the next character
-                    continue  # Continue to the next iteration
-
-                # Start state
-                if self.get_state('START'):
-                    if c == '{':
-                        # Start of a comment block
-                        comment_line = line_number
-                        self.in_comment_block = True
-                    elif c == ':':
-                        # Possible assignment operator
-                        if i + 1 == len(line):
-                            # ':' at the end of the line is invalid
-                            self.errors.append((line_number, f"Invalid token: {c}"))
-                            stop_parsing = True  # Set the flag to stop parsing
-                            break  # Break out of the current loop
-                        self.set_state('IN_ASSIGN')  # Transition to IN_ASSIGN state
-                    elif self.is_symbol(c):
-                        # Single-character symbol (operator)
-                        self.classify(c, line_number)
-                    elif self.is_num(c):
-                        # Start of a number
-                        self.set_state('IN_NUM')
-                        token = c  # Initialize the token with the digit
-                    elif self.is_str(c):
-                        # Start of an identifier
-                        self.set_state('IN_ID')
-                        token = c  # Initialize the token with the character
-                    elif c == ' ':
-                        # Ignore spaces
-                        pass
-                    else:
-                        # Invalid character/token
-                        self.errors.append((line_number, f"Invalid token: {c}"))
-                        stop_parsing = True  # Set the flag to stop parsing
-                        break  # Break out of the current loop
-
-                # IN_ASSIGN state
-                elif self.get_state('IN_ASSIGN'):
-                    if c == '=':
-                        # Valid assignment operator ':='
-                        self.classify(":=", line_number)
-                    else:
-                        # Invalid token; standalone ':' is not allowed
-                        self.errors.append((line_number, "Invalid token: ':'"))
-                        stop_parsing = True  # Set the flag to stop parsing
-                        break  # Break out of the current loop
-                    self.set_state('START')  # Return to START state
-
-                # IN_NUM state
-                elif self.get_state('IN_NUM'):
-                    if self.is_num(c):
-                        token += c  # Append the digit to the token
-                    else:
-                        # End of the number token
-                        self.classify(token, line_number)  # Classify the number token
-                        token = ''  # Reset the token
-                        self.set_state('START')  # Return to START state
-                        i -= 1  # Decrement `i` to reprocess this character in the next loop
-
-                # IN_ID state
-                elif self.get_state('IN_ID'):
-                    if self.is_str(c):
-                        token += c  # Append the character to the token
+                    self.comment_line += delta  # The comment's start moved with the converged tail
+        else:
+            tokens[first_index:] = new_tokens
+            if self.errors:
+                self.stopped_at = line_number
+            else:
+                self.stopped_at = None
+                new_states.append(self._line_state(line_number))
+            old_states[first_line - 1:] = new_states
+
+        if self.stopped_at is None:
+            # Restore the state after the last line and report an unclosed comment
+            end_distance = old_states[-1]
+            self.in_comment_block = end_distance is not None
+            if self.in_comment_block:
+                self.comment_line = len(lines) + 1 - end_distance
+            self._finish()
+        return line_number if converged else None
+
+    def iter_tokens(self, source):
+        """
+        Lazily yields (line_number, token, token_type) tuples from a file object or any
+        iterable of lines. Tokens are not kept in self.tokens; errors are still recorded in
+        self.errors and the first one ends the stream.
+        """
+        lookup = self._token_type_lookup()
+        tokens = []  # Tokens of the current line only
+        line_number = 0
+        for chunk in source:
+            # A chunk normally holds one line; other line boundaries split it like splitlines()
+            for line in chunk.splitlines() or ['']:
+                line_number += 1
+                if not self._match_line(line, line_number, tokens, lookup):
+                    if not self._scan_line(line, line_number, tokens):
+                        yield from tokens
+                        return  # The first error stops scanning
+                if tokens:
+                    yield from tokens
+                    tokens.clear()
+        self._finish()
+
+    def _scan_line(self, line, line_number, tokens, spans=None):
+        """
+        Runs the DFA over one line, appending to `tokens` (and each token's (start, end)
+        columns to `spans` when given); returns False if an error stopped scanning.
+        """
+        classes = CHAR_CLASSES
+        transitions = TRANSITIONS
+        keyword_types = self.KEYWORD_TYPES
+        operators = self.OPERATORS
+        state = IN_COMMENT if self.in_comment_block else START  # Reset to START unless inside a comment
+
+        token_start = 0  # Index where the current identifier/number began
+        length = len(line)
+        i = 0  # Character index
+        error = None
+        while i <= length:
+            if i < length:
+                c = line[i]  # Current character
+                cls = classes.get(c)
+                if cls is None:
+                    cls = classes[c] = char_class(c)
+            else:
+                c = ''
+                cls = CH_EOL  # Flush whatever is pending at the end of the line
+
+            state, action = transitions[state][cls]
+
+            if action == ACT_NONE:
+                pass
+            elif action == ACT_BEGIN:
+                token_start = i
+            elif action == ACT_EMIT_ID:
+                token = line[token_start:i]
+                tokens.append((line_number, token, keyword_types.get(token, 'IDENTIFIER')))
+                if spans is not None:
+                    spans.append((token_start, i))
+                continue  # Reprocess this character in the START state
+            elif action == ACT_EMIT_NUM:
+                tokens.append((line_number, line[token_start:i], 'NUMBER'))
+                if spans is not None:
+                    spans.append((token_start, i))
+                continue  # Reprocess this character in the START state
+            elif action == ACT_SYMBOL:
+                tokens.append((line_number, c, operators[c]))
+                if spans is not None:
+                    spans.append((i, i + 1))
+            elif action == ACT_ASSIGN:
+                tokens.append((line_number, ':=', 'ASSIGN'))
+                if spans is not None:
+                    spans.append((i - 1, i + 1))
+            elif action == ACT_OPEN_COMMENT:
+                self.comment_line = line_number  # Remember where the comment started
+            elif action == ACT_CLOSE_COMMENT:
+                pass
+            elif action == ACT_BAD_ASSIGN:
+                # Invalid token; standalone ':' is not allowed
+                error = "Invalid token: ':'"
+                break
+            elif action == ACT_DANGLING_COLON:
+                # ':' at the end of the line is invalid
+                error = "Invalid token: :"
+                break
+            elif action == ACT_NESTED_COMMENT:
+                # Nested comments are not allowed
+                error = "NOT ALLOWED NESTED COMMENT"
+                break
+            else:
+                # Invalid character/token
+                error = f"Invalid token: {c}"
+                break
+            i += 1  # Move to the next character
+
+        self.state = state
+        self.in_comment_block = state == IN_COMMENT
+        if error is not None:
+            self.errors.append((line_number, error))
+            return False
+        return True
+
+    def _finish(self):
+        """Reports a comment block still open at the end of the input."""
+        if self.in_comment_block:
+            # Handle unclosed comment blocks
+            self.errors.append((self.comment_line, "UNCLOSED COMMENT"))
+
+    def scan_fast(self, input_text, progress=None):
+        """
+        Performs lexical analysis with the master regular expression, producing the same
+        tokens and errors as scan(). Lines the expression does not fully accept (errors,
+        non-ASCII letters, comments spanning lines) are handed to the DFA instead. The
+        optional progress callback works as in scan().
+        """
+        lookup = self._token_type_lookup()
+        tokens = self.tokens
+
+        pieces = input_text.split('\n')
+        last = len(pieces) - 1
+        line_number = 0
+        for index, piece in enumerate(pieces):
+            line_number += 1
+            if progress is not None and index % PROGRESS_INTERVAL == 0:
+                progress(index, len(pieces))
+            if self._match_line(piece, line_number, tokens, lookup):
+                continue
+
+            # Fall back to the DFA for this line; other line boundaries than '\n' split it further
+            lines = (piece if index == last else piece + '\n').splitlines()
+            for offset, line in enumerate(lines):
+                if not self._scan_line(line, line_number + offset, tokens):
+                    return  # The first error stops scanning
+            if lines:
+                line_number += len(lines) - 1
+        self._finish()
+
+    def _token_type_lookup(self):
+        """Returns a function mapping any valid ASCII lexeme to its token type."""
+        token_types = _TokenTypes(self.KEYWORD_TYPES)
+        token_types.update(self.OPERATORS)
+        return token_types.__getitem__
+
+    def _match_line(self, line, line_number, tokens, lookup):
+        """
+        Tokenizes a line with the master regular expression, appending to `tokens`.
+        Returns False, without touching anything, if the line needs the DFA.
+        """
+        if self.in_comment_block:
+            # The whole line is inside a comment
+            return COMMENT_LINE_PATTERN.fullmatch(line) is not None
+        if not (SIMPLE_LINE_PATTERN.fullmatch(line) or VALID_LINE_PATTERN.fullmatch(line)):
+            return False
+        lexemes = MASTER_PATTERN.findall(line)
+        if '{' in line:
+            lexemes = [lexeme for lexeme in lexemes if lexeme]  # Drop the comments
+        tokens.extend(zip(repeat(line_number), lexemes, map(lookup, lexemes)))
+        return True
+
+    def scan_compact(self, input_text):
+        """
+        Scans the input text into a TokenBuffer: self.tokens keeps only a kind code, the
+        start/end offsets into `input_text` and the line of every token, and still reads
+        like the usual list of (line_number, token, token_type) tuples.
+        """
+        self.tokens = TokenBuffer(input_text)
+        self._scan_spans(self.tokens, TEXT_SPAN_PATTERN)
+        return self.tokens
+
+    def scan_mapped(self, path, encoding='utf-8'):
+        """
+        Scans a file through a read-only memory map without decoding it as a whole.
+        ASCII lines are matched as bytes and only token offsets are stored in a
+        TokenBuffer, which decodes each lexeme when it is read.
+        """
+        self.tokens = TokenBuffer.open(path, encoding)
+        self._scan_spans(self.tokens, BYTE_SPAN_PATTERN)
+        return self.tokens
+
+    def _scan_spans(self, tokens, pattern):
+        """
+        Fills a TokenBuffer by matching `pattern` over its whole buffer. Lines the pattern
+        rejects (errors, non-ASCII text, line boundaries other than '\n') are rescanned by
+        the DFA, so tokens, errors and line numbers match scan() on the same text.
+        """
+        buffer = tokens.buffer
+        length = len(buffer)
+        add_line, add_start, add_end, add_kind = (tokens.line_numbers.append, tokens.starts.append,
+                                                  tokens.ends.append, tokens.kinds.append)
+        group_kinds = SPAN_GROUP_KINDS
+        newline = '\n' if isinstance(buffer, str) else b'\n'
+        pos = 0  # Where the pattern resumes matching
+        line_number = 1
+        restart = 0  # Offset on the current line where the DFA can take over in the START state
+        restart_count = 0  # Number of tokens before `restart`
+
+        if self.in_comment_block:
+            # Still inside a comment from a previous call: let the DFA find its end first
+            resumed = self._scan_spans_fallback(tokens, 0, 1)
+            if resumed is None:
+                return
+            pos, line_number = resumed
+            restart = pos
+            restart_count = len(tokens)
+
+        while pos < length:
+            for match in pattern.finditer(buffer, pos):
+                index = match.lastindex
+                kind = group_kinds[index]
+                if kind is not None:
+                    start, end = match.span()
+                    add_line(line_number)
+                    add_start(start)
+                    add_end(end)
+                    add_kind(kind)
+                elif index == SPAN_NEWLINE_GROUP:
+                    line_number += 1
+                    restart = match.end()
+                    restart_count = len(tokens)
+                elif index == SPAN_COMMENT_GROUP:
+                    newlines = match.group().count(newline)
+                    if newlines:
+                        line_number += newlines
+                        restart = match.end()
+                        restart_count = len(tokens)
+                elif index == SPAN_MISMATCH_GROUP:
+                    # Rescan the line from the last safe point with the DFA
+                    tokens.truncate(restart_count)
+                    resumed = self._scan_spans_fallback(tokens, restart, line_number)
+                    if resumed is None:
+                        return  # The first error stops scanning
+                    pos, line_number = resumed
+                    restart = pos
+                    restart_count = len(tokens)
+                    break
+            else:
+                break  # Every remaining character was matched
+
+        self._finish()
+
+    def _scan_spans_fallback(self, tokens, start, line_number):
+        """
+        Scans the rest of the line at offset `start` (and following lines while a comment
+        is open) with the DFA, storing offsets in `tokens`; byte buffers are decoded one
+        line at a time. Returns (next offset, next line number), or None if an error
+        stopped scanning.
+        """
+        buffer = tokens.buffer
+        length = len(buffer)
+        is_text = isinstance(buffer, str)
+        while True:
+            end = buffer.find('\n' if is_text else b'\n', start)
+            at_end = end == -1
+            if at_end:
+                end = next_start = length
+            else:
+                next_start = end + 1
+            segment = buffer[start:end]
+            if not is_text:
+                segment = segment.decode(tokens.encoding, 'replace')
+            if not at_end and segment.endswith('\r'):
+                segment = segment[:-1]  # '\r\n' is a single line boundary
+            same_offsets = is_text or segment.isascii()  # Columns are buffer offsets
+
+            for column, line in _split_lines(segment, keep_last=not at_end):
+                line_tokens = []
+                spans = []
+                scanned = self._scan_line(line, line_number, line_tokens, spans)
+                for (_, _, token_type), (first, last) in zip(line_tokens, spans):
+                    if same_offsets:
+                        first_offset, last_offset = start + column + first, start + column + last
                     else:
-                        # End of the identifier token
-                        self.classify(token, line_number)  # Classify the identifier token
-                        token = ''  # Reset the token
-                        self.set_state('START')  # Return to START state
-                        i -= 1  # Decrement `i` to reprocess this character in the next loop
+                        first_offset = start + len(segment[:column + first].encode(tokens.encoding))
+                        last_offset = start + len(segment[:column + last].encode(tokens.encoding))
+                    tokens.append(line_number, first_offset, last_offset, KIND_CODES[token_type])
+                if not scanned:
+                    return None
+                line_number += 1
 
-                i += 1  # Move to the next character
-
-            # Finalize tokens at the end of the line
-            if token and not stop_parsing:
-                self.classify(token, line_number)  # Classify any remaining token
-
-        if self.in_comment_block and not stop_parsing:
-            # Handle unclosed comment blocks
-            self.errors.append((comment_line, f"UNCLOSED COMMENT"))
+            if not self.in_comment_block or next_start >= length:
+                return next_start, line_number
+            start = next_start
 
     # Define keywords used in the language
     KEYWORDS = ['else', 'end', 'if', 'repeat', 'then', 'until', 'read', 'write']
@@ -431,6 +637,9 @@ class Scanner:
         ')': 'CLOSEDBRACKET'
     }
 
+    # Token type of every keyword
+    KEYWORD_TYPES = {keyword: keyword.upper() for keyword in KEYWORDS}
+
     def classify(self, token, line_number):
         """Classifies a token and adds it to the tokens list or records an error."""
         if not token:
@@ -475,10 +684,174 @@ class Scanner:
                 for line_number, error in self.errors:
                     file.write(f"Line {line_number}: {error}\n")
 
+
+# Token kinds stored by TokenBuffer: type name and fixed lexeme (None for identifiers and numbers) of every code
+TOKEN_KINDS = ('IDENTIFIER', 'NUMBER') + tuple(Scanner.KEYWORD_TYPES.values()) + tuple(Scanner.OPERATORS.values())
+KIND_LEXEMES = (None, None) + tuple(Scanner.KEYWORD_TYPES) + tuple(Scanner.OPERATORS)
+KIND_CODES = {token_type: code for code, token_type in enumerate(TOKEN_KINDS)}
+
+
+class _TokenTypes(dict):
+    """Maps lexemes to token types, filling in identifiers and numbers on first sight."""
+
+    def __missing__(self, lexeme):
+        token_type = 'NUMBER' if lexeme[0] in '0123456789' else 'IDENTIFIER'
+        self[lexeme] = token_type
+        return token_type
+
+
+class TokenBuffer:
+    """
+    Columnar token store: a kind code, start/end offsets into the source buffer and the
+    line number of every token, each kept in an array. Reads like the usual list of
+    (line_number, token, token_type) tuples; lexemes are sliced (and interned) only when
+    they are read, and keywords and operators are never sliced at all.
+    """
+
+    def __init__(self, buffer, encoding='utf-8'):
+        self.buffer = buffer  # str, bytes or mmap holding the source
+        self.encoding = encoding  # Used to decode lexemes of byte buffers
+        self.kinds = array('B')  # Index into TOKEN_KINDS
+        self.starts = array('q')
+        self.ends = array('q')
+        self.line_numbers = array('I')
+
+    @classmethod
+    def open(cls, path, encoding='utf-8'):
+        """Maps the file at `path` read-only."""
+        with open(path, 'rb') as file:
+            try:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                buffer = b''  # Empty files cannot be mapped
+        return cls(buffer, encoding)
+
+    def close(self):
+        """Releases the memory map, if any."""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def append(self, line_number, start, end, kind):
+        """Adds a token of kind code `kind` covering buffer[start:end]."""
+        self.line_numbers.append(line_number)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.kinds.append(kind)
+
+    def truncate(self, count):
+        """Drops every token after the first `count`."""
+        del self.line_numbers[count:], self.starts[count:], self.ends[count:], self.kinds[count:]
+
+    def lexeme(self, index):
+        """Returns the text of one token."""
+        lexeme = KIND_LEXEMES[self.kinds[index]]
+        if lexeme is None:
+            lexeme = self.buffer[self.starts[index]:self.ends[index]]
+            if not isinstance(lexeme, str):
+                lexeme = lexeme.decode(self.encoding)
+            lexeme = sys.intern(lexeme)
+        return lexeme
+
+    def token_type(self, index):
+        """Returns the type name of one token."""
+        return TOKEN_KINDS[self.kinds[index]]
+
+    def nbytes(self):
+        """Returns the size of the columns in bytes (the source buffer excluded)."""
+        return sum(column.itemsize * len(column) for column in (self.kinds, self.starts, self.ends, self.line_numbers))
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.line_numbers[index], self.lexeme(index), TOKEN_KINDS[self.kinds[index]]
+
+    def __iter__(self):
+        lexeme = self.lexeme
+        for index, (line_number, kind) in enumerate(zip(self.line_numbers, self.kinds)):
+            yield line_number, lexeme(index), TOKEN_KINDS[kind]
+
+
+def _split_lines(text, keep_last):
+    """
+    Splits text like str.splitlines(), also returning each line's starting column.
+    `keep_last` keeps a trailing empty line, for text that a '\n' follows.
+    """
+    lines = []
+    start = 0
+    for line_break in LINE_BREAK_PATTERN.finditer(text):
+        lines.append((start, text[start:line_break.start()]))
+        start = line_break.end()
+    if start < len(text) or keep_last:
+        lines.append((start, text[start:]))
+    return lines
+
+
+def _build_master_pattern():
+    """Builds the master regular expression used by Scanner.scan_fast()."""
+    operators = '|'.join(re.escape(op) for op in sorted(Scanner.OPERATORS, key=len, reverse=True))
+    # Only the group is returned by findall(): comments yield '' and spaces are never matched
+    return re.compile(rf'\{{[^{{}}]*\}}|([A-Za-z]+|[0-9]+|{operators})')
+
+
+def _build_valid_line_pattern():
+    """Builds the expression accepting exactly the lines scan_fast() can tokenize on its own."""
+    operators = '|'.join(re.escape(op) for op in sorted(Scanner.OPERATORS, key=len, reverse=True))
+    return re.compile(rf'(?:[A-Za-z0-9 ]|{operators}|\{{{COMMENT_TEXT}\}})*')
+
+
+def _build_span_pattern(as_bytes):
+    """
+    Builds the expression used by Scanner._scan_spans(), with one group per keyword and
+    operator so a token's kind is known from the matching group alone. Comments may only
+    hold ASCII (bytes) or text without line boundaries other than '\n' (str).
+    """
+    parts = [rf'({keyword}(?![A-Za-z]))' for keyword in sorted(Scanner.KEYWORDS, key=len, reverse=True)]
+    parts += [rf'({re.escape(op)})' for op in sorted(Scanner.OPERATORS, key=len, reverse=True)]
+    comment_text = r'[^{}\r\x0b\x0c\x1c-\x1e\x80-\xff]*' if as_bytes else COMMENT_TEXT
+    # Whitespace, newlines and comments produce no token; anything else is a mismatch
+    parts += [r'([A-Za-z]+)', r'([0-9]+)', r'( +)', r'(\n)', rf'(\{{{comment_text}\}})', r'(.)']
+    pattern = '|'.join(parts)
+    return re.compile(pattern.encode('latin-1') if as_bytes else pattern, re.DOTALL)
+
+
+def _build_span_group_kinds():
+    """Returns the kind code of every group of the span patterns (None for non-tokens)."""
+    kinds = [None]  # Group numbers start at 1
+    kinds += [KIND_CODES[Scanner.KEYWORD_TYPES[keyword]] for keyword in sorted(Scanner.KEYWORDS, key=len, reverse=True)]
+    kinds += [KIND_CODES[Scanner.OPERATORS[op]] for op in sorted(Scanner.OPERATORS, key=len, reverse=True)]
+    kinds += [KIND_CODES['IDENTIFIER'], KIND_CODES['NUMBER'], None, None, None, None]
+    return tuple(kinds)
+
+
+# Comment text that neither closes nor nests a comment, nor hides a line boundary other than '\n'
+COMMENT_TEXT = '[^{}\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]*'
+
+# Line boundaries as recognised by str.splitlines()
+LINE_BREAK_PATTERN = re.compile('\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+
+# Patterns compiled once at import
+MASTER_PATTERN = _build_master_pattern()
+VALID_LINE_PATTERN = _build_valid_line_pattern()
+SIMPLE_LINE_PATTERN = re.compile('[A-Za-z0-9 %s]*' % re.escape(SYMBOL_CHARS))  # Cheap pre-check: no ':' or comments
+COMMENT_LINE_PATTERN = re.compile(COMMENT_TEXT)
+TEXT_SPAN_PATTERN = _build_span_pattern(as_bytes=False)
+BYTE_SPAN_PATTERN = _build_span_pattern(as_bytes=True)
+SPAN_GROUP_KINDS = _build_span_group_kinds()
+SPAN_NEWLINE_GROUP, SPAN_COMMENT_GROUP, SPAN_MISMATCH_GROUP = range(len(SPAN_GROUP_KINDS) - 3, len(SPAN_GROUP_KINDS))
+
+
+def __getattr__(name):
+    """Loads the GUI classes that used to live here (and Qt with them) on first use."""
+    if name in ('SyntaxTreeDrawer', 'Back_End_Class'):
+        import app
+        return getattr(app, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # Entry point of the application
 if __name__ == "__main__":
-    app = QtWidgets.QApplication(sys.argv)  # Create the main application
-    MainWindow = QtWidgets.QMainWindow()  # Create the main window
-    ui = Back_End_Class()  # Initialize the backend class which also sets up the UI
-    MainWindow.show()  # Show the main window
-    sys.exit(app.exec_())  # Start the event loop
\ No newline at end of file
+    from app import main
+    main()
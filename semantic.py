@@ -0,0 +1,177 @@
+"""
+Semantic analysis of TINY programs: the symbol table and a cross-reference index.
+
+analyze() makes one pass over the syntax tree in execution order. Every variable gets
+a dense integer slot (0, 1, 2, ... in order of first appearance) in a hashed name table,
+and the table records the nodes defining it (assign and read statements) and using it
+(id nodes), along with their lines. node_slots maps every tree node to the slot of the
+variable it names, so later stages can go from a node to its variable, and from a
+variable to all its sites, in O(1) without walking the tree or parsing node labels.
+
+TINY variables start out as 0, so the analysis only warns: about uses of a variable
+that is not assigned on every path reaching them, and about variables that are
+assigned but never used.
+"""
+from array import array
+
+from parser import ASSIGN_NODE, ID_NODE, IF_NODE, NO_NODE, READ_NODE, REPEAT_NODE, WRITE_NODE
+
+
+class SymbolTable:
+    """Variables of one program, by name and by slot, with their definition and use sites."""
+
+    def __init__(self, tree=None):
+        self.tree = tree
+        self.slots = {}  # Name -> slot
+        self.names = []  # Slot -> name
+        self.definitions = []  # Slot -> array of the assign/read nodes defining the variable
+        self.uses = []  # Slot -> array of the id nodes using the variable
+        self.definition_lines = []  # Slot -> array of the lines of those definitions
+        self.use_lines = []  # Slot -> array of the lines of those uses
+        # Node -> slot of the variable it names, -1 for nodes naming none
+        self.node_slots = array('i', [-1]) * (len(tree) if tree is not None else 0)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.slots
+
+    def insert(self, name):
+        """Returns the slot of a variable, adding it if it is new."""
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+            self.definitions.append(array('i'))
+            self.uses.append(array('i'))
+            self.definition_lines.append(array('I'))
+            self.use_lines.append(array('I'))
+        return slot
+
+    def lookup(self, name):
+        """Returns the slot of a variable, or None if the program never mentions it."""
+        return self.slots.get(name)
+
+    def define(self, name, node, line):
+        """Records an assign or read node as a definition of `name`."""
+        slot = self.insert(name)
+        self.definitions[slot].append(node)
+        self.definition_lines[slot].append(line)
+        self.node_slots[node] = slot
+        return slot
+
+    def use(self, name, node, line):
+        """Records an id node as a use of `name`."""
+        slot = self.insert(name)
+        self.uses[slot].append(node)
+        self.use_lines[slot].append(line)
+        self.node_slots[node] = slot
+        return slot
+
+    def slot_of(self, node):
+        """Returns the slot of the variable a node names, or None."""
+        slot = self.node_slots[node]
+        return slot if slot >= 0 else None
+
+    def listing(self):
+        """Returns the cross-reference table: every variable, its slot and the lines it appears on."""
+        rows = ["Variable Name  Location   Line Numbers",
+                "-------------  --------   ------------"]
+        for slot, name in enumerate(self.names):
+            lines = sorted(set(self.definition_lines[slot]) | set(self.use_lines[slot]))
+            rows.append(f"{name:<14} {slot:<8}   " + " ".join(f"{line:3d}" for line in lines))
+        return "\n".join(rows) + "\n"
+
+
+def analyze(root):
+    """
+    Builds the SymbolTable of the NodeView returned by Parser.program() (or None) and
+    returns it with the list of semantic warnings, in line order.
+    """
+    if root is None:
+        return SymbolTable(), []
+    tree = root.tree
+    kinds, lines, first_child, next_child, sibling = tree.kinds, tree.lines, tree.first_child, tree.next_child, tree.sibling
+    table = SymbolTable(tree)
+    warnings = []  # (line, message)
+    unassigned_uses = []  # (node, slot) of uses not assigned on every path reaching them
+    assigned = 0  # Bit set of the slots assigned on every path to the current point
+
+    def uses(expression):
+        # Records the variables an expression reads, in source order
+        stack = [expression]
+        while stack:
+            node = stack.pop()
+            kind = kinds[node]
+            if kind == ID_NODE:
+                slot = table.use(tree.value(node), node, lines[node])
+                if not assigned >> slot & 1:
+                    unassigned_uses.append((node, slot))
+            elif first_child[node] != NO_NODE:
+                left = first_child[node]
+                stack.append(next_child[left])
+                stack.append(left)
+
+    # Work items, done in order: ('chain', statement) analyzes a statement and its siblings and
+    # ('test', expression) an if/repeat condition. The branches of an if start from the same
+    # assigned set: ('else', cell, before) keeps the then part's set in the cell and restarts
+    # from `before`, ('merge', cell) keeps what both branches assigned and ('restore', before)
+    # ends an if without an else, after which only `before` is certain
+    work = [('chain', root.index)]
+    while work:
+        item = work.pop()
+        action = item[0]
+        if action == 'chain':
+            node = item[1]
+            if node == NO_NODE:
+                continue
+            work.append(('chain', sibling[node]))
+            kind = kinds[node]
+            if kind == ASSIGN_NODE:
+                uses(first_child[node])
+                assigned |= 1 << table.define(tree.value(node), node, lines[node])
+            elif kind == READ_NODE:
+                assigned |= 1 << table.define(tree.value(node), node, lines[node])
+            elif kind == WRITE_NODE:
+                uses(first_child[node])
+            elif kind == IF_NODE:
+                test = first_child[node]
+                then_part = next_child[test]
+                else_part = next_child[then_part] if then_part != NO_NODE else NO_NODE
+                uses(test)
+                if else_part != NO_NODE:
+                    cell = [0]
+                    work.append(('merge', cell))
+                    work.append(('chain', else_part))
+                    work.append(('else', cell, assigned))
+                else:
+                    work.append(('restore', assigned))
+                work.append(('chain', then_part))
+            elif kind == REPEAT_NODE:
+                # The body runs at least once, so what it assigns is certain at the test and after
+                body = first_child[node]
+                work.append(('test', next_child[body]))
+                work.append(('chain', body))
+        elif action == 'test':
+            uses(item[1])
+        elif action == 'else':
+            item[1][0] = assigned
+            assigned = item[2]
+        elif action == 'merge':
+            assigned &= item[1][0]
+        else:  # 'restore'
+            assigned = item[1]
+
+    for node, slot in unassigned_uses:
+        name = table.names[slot]
+        if table.definitions[slot]:
+            message = f"variable '{name}' may be used before it is assigned"
+        else:
+            message = f"variable '{name}' is never assigned"
+        warnings.append((lines[node], message))
+    for slot, name in enumerate(table.names):
+        if not table.uses[slot]:
+            warnings.append((table.definition_lines[slot][0], f"variable '{name}' is assigned but never used"))
+    warnings.sort(key=lambda warning: warning[0])
+    return table, [f"Semantic Warning at line {line}: {message}" for line, message in warnings]
@@ -0,0 +1,62 @@
+"""
+Measures the cold import time of the Qt-free compiler core in fresh interpreters.
+
+Usage:
+    python startup_time.py [-n RUNS] [MODULE ...]
+
+Every run starts a new Python process that imports the modules (scanner and parser by
+default) and reports how long the import took and whether PyQt5 got loaded with them.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CORE_MODULES = ['scanner', 'parser']  # The importable, GUI-free core
+
+# Code run in each child interpreter
+PROBE = (
+    "import sys, time, json\n"
+    "started = time.perf_counter()\n"
+    "{imports}\n"
+    "print(json.dumps({{'seconds': time.perf_counter() - started, 'qt_loaded': 'PyQt5' in sys.modules}}))\n"
+)
+
+
+def measure(modules, runs):
+    """Returns the import time of each run in seconds and whether any run loaded Qt."""
+    probe = PROBE.format(imports="\n".join(f"import {module}" for module in modules))
+    here = os.path.dirname(os.path.abspath(__file__))
+    # One untimed run first so every timed run finds up-to-date bytecode caches
+    subprocess.run([sys.executable, "-c", probe], cwd=here, check=True, capture_output=True)
+    timings = []
+    qt_loaded = False
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, "-c", probe], cwd=here, check=True,
+                                   capture_output=True, text=True)
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        qt_loaded = qt_loaded or result['qt_loaded']
+    return timings, qt_loaded
+
+
+def main(argv=None):
+    """Prints the import-time statistics; exits with 1 if the core pulled in Qt."""
+    arg_parser = argparse.ArgumentParser(description="Measure the cold import time of the compiler core.")
+    arg_parser.add_argument('modules', nargs='*', default=CORE_MODULES, help="modules to import")
+    arg_parser.add_argument('-n', '--runs', type=int, default=20, help="number of fresh interpreters")
+    args = arg_parser.parse_args(argv)
+
+    timings, qt_loaded = measure(args.modules, args.runs)
+    print(f"import {', '.join(args.modules)}: "
+          f"min {min(timings) * 1000:.1f} ms, "
+          f"median {statistics.median(timings) * 1000:.1f} ms, "
+          f"max {max(timings) * 1000:.1f} ms over {len(timings)} runs")
+    print(f"PyQt5 loaded: {'yes' if qt_loaded else 'no'}")
+    return 1 if qt_loaded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
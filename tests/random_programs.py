@@ -0,0 +1,105 @@
+"""Seeded random inputs for the differential tests."""
+from parser import Parser
+from scanner import Scanner
+
+# Fragments of valid and invalid TINY text, including comments, stray characters, non-ASCII
+# letters and digits, and line breaks, including the ones only str.splitlines() knows
+TEXT_FRAGMENTS = list("abcxyz019 ;:=+-*/<()\t{}{}$\n\n  ") + [
+    'if ', 'then ', 'end', 'read ', 'repeat ', 'until ', 'write ', ':=', 'else ', '{ab\ncd}', '\r\n',
+    '\u00e9', '\u00b2', '\r', '\x0c']
+
+
+def random_text(random, size=80):
+    """Returns up to `size` random fragments: anything the scanner may meet, valid or not."""
+    return ''.join(random.choice(TEXT_FRAGMENTS) for _ in range(random.randint(0, size)))
+
+
+def random_expression(random, depth=0):
+    """Returns a random expression, parenthesized in places."""
+    choice = random.random()
+    if depth > 3 or choice < 0.3:
+        choice = random.random()
+        if choice < 0.5:
+            return random.choice('xyz')
+        if choice < 0.8:
+            return str(random.randint(0, 9))
+        return f"({random_expression(random, depth + 1)})"
+    return f"{random_expression(random, depth + 1)} {random.choice('+-*/<=')} {random_expression(random, depth + 1)}"
+
+
+def random_statements(random, depth=0):
+    """
+    Returns a random statement sequence. It mostly parses (chained comparisons such as
+    x < y = z do not) and need not terminate when run.
+    """
+    statements = []
+    for _ in range(random.randint(1, 3)):
+        choice = random.random()
+        if depth < 3 and choice < 0.15:
+            statement = f"if {random_expression(random)} then {random_statements(random, depth + 1)}"
+            if random.random() < 0.5:
+                statement += f" else {random_statements(random, depth + 1)}"
+            statements.append(statement + " end")
+        elif depth < 3 and choice < 0.3:
+            statements.append(f"repeat {random_statements(random, depth + 1)} until {random_expression(random)}")
+        elif choice < 0.6:
+            statements.append(f"{random.choice('xyz')} := {random_expression(random)}")
+        elif choice < 0.8:
+            statements.append(f"read {random.choice('xyz')}")
+        else:
+            statements.append(f"write {random_expression(random)}")
+    return '; '.join(statements)
+
+
+def break_lines(random, text, chance=0.3):
+    """Puts a line break instead of a space between words of `text` with the given chance."""
+    return ''.join(word + ("\n" if random.random() < chance else " ") for word in text.split(' '))
+
+
+
+def parse(text, recover=False):
+    """Scans and parses text; returns the Parser and the root NodeView."""
+    scanner = Scanner()
+    scanner.scan(text)
+    assert not scanner.errors, scanner.errors
+    parser = Parser(scanner.tokens, recover=recover)
+    return parser, parser.program()
+
+
+def random_program(random):
+    """
+    Returns a random program that always terminates: every repeat loop counts its own
+    variable (la, lb, ...) up to a small bound. It may still divide by zero or read more
+    input than it gets.
+    """
+    loops = []
+
+    def expression(depth=0, comparison=True):
+        if depth > 3 or random.random() < 0.35:
+            return random.choice('abcde') if random.random() < 0.55 else str(random.randint(0, 12))
+        operator = random.choice('++--**/<=' if comparison else '++--**/')  # Fewer divisions, which often hit 0
+        text = f"{expression(depth + 1, False)} {operator} {expression(depth + 1, False)}"
+        return f"({text})" if random.random() < 0.3 else text
+
+    def statements(depth):
+        return ';\n'.join(statement(depth) for _ in range(random.randint(1, 4)))
+
+    def statement(depth):
+        choice = random.random()
+        if depth < 3 and choice < 0.18:
+            text = f"if {expression()} then\n{statements(depth + 1)}"
+            if random.random() < 0.5:
+                text += f"\nelse\n{statements(depth + 1)}"
+            return text + "\nend"
+        if depth < 3 and choice < 0.3:
+            counter = 'l' + 'abcdefghijklmnop'[len(loops) % 16] * (1 + len(loops) // 16)
+            loops.append(counter)
+            return (f"{counter} := 0;\nrepeat\n{statements(depth + 1)};\n{counter} := {counter} + 1\n"
+                    f"until {counter} = {random.randint(1, 4)}")
+        if choice < 0.75:
+            return f"{random.choice('abcde')} := {expression()}"
+        if choice < 0.85:
+            return f"read {random.choice('abcde')}"
+        return f"write {expression()}"
+
+    return statements(0)
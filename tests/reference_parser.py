@@ -0,0 +1,167 @@
+"""
+A plain recursive-descent parser for TINY, one method per grammar rule, as the parser
+was before it moved to explicit stacks. The differential tests hold Parser to it: same
+tree, same line numbers and the same first syntax error.
+"""
+
+BLOCK_END = ('end', 'else', 'until')
+
+
+class ReferenceParserError(Exception):
+    """The first syntax error, worded as Parser words it."""
+    pass
+
+
+class ReferenceParser:
+    """Parses a list of (line_number, token, token_type) tuples into nested (label, line, children) nodes."""
+
+    def __init__(self, tokens):
+        self.tokens = list(tokens)
+        self.position = 0
+
+    @property
+    def current(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][1:]
+        return None
+
+    def error(self, message):
+        if self.tokens:
+            # The line of the current token, or of the last one at the end of input
+            line = self.tokens[min(self.position, len(self.tokens) - 1)][0]
+            raise ReferenceParserError(f"Syntax Error at line {line}: {message}")
+        raise ReferenceParserError(f"Syntax Error: {message}")
+
+    def line(self):
+        return self.tokens[self.position][0]
+
+    def match(self, expected):
+        token = self.current
+        if token and expected in token:
+            self.position += 1
+            return token[0]
+        self.error(f"Expected {expected}, found {token}")
+
+    def program(self):
+        statements = self.stmt_sequence()
+        if self.current:
+            self.error("Unexpected token after program. Found: " + str(self.current))
+        return statements
+
+    def stmt_sequence(self):
+        statements = [self.statement()]
+        while self.current:
+            if self.current[0] == ';':
+                self.match(';')
+                statements.append(self.statement())
+            elif self.current[0] in BLOCK_END:
+                break
+            else:
+                self.error(f"Syntax error, unexpected token: {self.current}")
+        return statements
+
+    def statement(self):
+        token_type = self.current[1] if self.current else None
+        if token_type == 'IF':
+            return self.if_stmt()
+        if token_type == 'REPEAT':
+            return self.repeat_stmt()
+        if token_type == 'IDENTIFIER':
+            return self.assign_stmt()
+        if token_type == 'READ':
+            return self.read_stmt()
+        if token_type == 'WRITE':
+            return self.write_stmt()
+        self.error("Invalid statement type or missing keyword")
+
+    def if_stmt(self):
+        line = self.line()
+        self.match('IF')
+        children = [self.exp()]
+        self.match('THEN')
+        children.append(self.stmt_sequence())
+        if self.current and self.current[0] == 'else':
+            self.match('ELSE')
+            children.append(self.stmt_sequence())
+        if self.current and self.current[0] != 'end':
+            self.error("Expected 'END' after 'if' statement.")
+        self.match('END')
+        return 'if', line, children
+
+    def repeat_stmt(self):
+        line = self.line()
+        self.match('REPEAT')
+        body = self.stmt_sequence()
+        if self.current and self.current[0] != 'until':
+            self.error("Expected 'UNTIL' after repeat statement.")
+        self.match('UNTIL')
+        return 'repeat', line, [body, self.exp()]
+
+    def assign_stmt(self):
+        line = self.line()
+        name = self.match('IDENTIFIER')
+        self.match(':=')
+        return f"assign(id({name}))", line, [self.exp()]
+
+    def read_stmt(self):
+        line = self.line()
+        self.match('READ')
+        return f"read(id({self.match('IDENTIFIER')}))", line, []
+
+    def write_stmt(self):
+        line = self.line()
+        self.match('WRITE')
+        return 'write', line, [self.exp()]
+
+    def exp(self):
+        return self._binary(self.simple_exp, ('<', '='), once=True)
+
+    def simple_exp(self):
+        return self._binary(self.term, ('+', '-'))
+
+    def term(self):
+        return self._binary(self.factor, ('*', '/'))
+
+    def _binary(self, operand, operators, once=False):
+        """operand {operator operand}, left-associative; with once, at most one operator."""
+        left = operand()
+        while self.current and self.current[0] in operators:
+            line = self.line()
+            operator = self.match(self.current[0])
+            left = f"op({operator})", line, [left, operand()]
+            if once:
+                break
+        return left
+
+    def factor(self):
+        token = self.current
+        if token and token[1] in ('NUMBER', 'IDENTIFIER'):
+            line = self.line()
+            self.position += 1
+            return ('const' if token[1] == 'NUMBER' else 'id') + f"({token[0]})", line, []
+        if token and token[0] == '(':
+            self.match('(')
+            node = self.exp()
+            self.match(')')
+            return node
+        self.error("Invalid factor")
+
+
+def reference_parse(tokens):
+    """Returns (rows, error): the tree as (depth, label, line) rows in print order, or the error message."""
+    try:
+        statements = ReferenceParser(tokens).program()
+    except ReferenceParserError as e:
+        return None, str(e)
+    rows = []
+    stack = [(statement, 0) for statement in reversed(statements)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, list):
+            # A statement sequence: its statements sit at the depth of the sequence
+            stack.extend((statement, depth) for statement in reversed(node))
+            continue
+        label, line, children = node
+        rows.append((depth, label, line))
+        stack.extend((child, depth + 1) for child in reversed(children))
+    return rows, None
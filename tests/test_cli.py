@@ -0,0 +1,50 @@
+import json
+
+import cli
+
+PROGRAMS = {
+    'd1/p.txt': "read x;\nwrite x\n",
+    'd1/p.tiny': "read y;\nwrite y + 1\n",
+    'd2/p.txt': "x := 2;\nwrite x * x\n",
+}
+
+
+def _write_programs(directory):
+    for name, text in PROGRAMS.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def _compile(tmp_path, *paths):
+    output = tmp_path / 'out'
+    assert cli.main(['-j', '1', '-o', str(output)] + [str(path) for path in paths]) == cli.EXIT_OK
+    with open(output / 'summary.json') as file:
+        results = json.load(file)['results']
+    return output, {result['file']: result['output'] for result in results}
+
+
+def _tree(output_base):
+    with open(output_base + '.tree.txt') as file:
+        return file.read()
+
+
+def test_extensions_keep_programs_in_one_directory_apart(tmp_path):
+    _write_programs(tmp_path)
+    output, outputs = _compile(tmp_path, tmp_path / 'd1')
+    assert sorted(path.name for path in output.glob('*.tree.txt')) == ['p.tiny.tree.txt', 'p.txt.tree.txt']
+    assert 'y' in _tree(outputs[str(tmp_path / 'd1' / 'p.tiny')])
+    assert 'y' not in _tree(outputs[str(tmp_path / 'd1' / 'p.txt')])
+
+
+def test_same_names_from_different_arguments_get_their_own_outputs(tmp_path):
+    _write_programs(tmp_path)
+    files = [tmp_path / 'd1' / 'p.txt', tmp_path / 'd2' / 'p.txt']
+    output, outputs = _compile(tmp_path, *files)
+    assert sorted(path.name for path in output.glob('*.tree.txt')) == ['p.txt.2.tree.txt', 'p.txt.tree.txt']
+    assert '*' not in _tree(outputs[str(files[0])])
+    assert '*' in _tree(outputs[str(files[1])])
+
+    # Directory arguments that mirror to the same layout collide the same way
+    output, outputs = _compile(tmp_path, tmp_path / 'd1', tmp_path / 'd2')
+    assert len(set(outputs.values())) == 3
@@ -0,0 +1,41 @@
+import ast
+import os
+
+import compile_cache
+from compile_cache import CompileCache, compile_source
+
+REPOSITORY = os.path.dirname(os.path.abspath(compile_cache.__file__))
+
+
+def _local_imports(path):
+    """Returns the repository modules a source file imports at module level."""
+    with open(path) as file:
+        body = ast.parse(file.read()).body
+    names = set()
+    for statement in body:
+        if isinstance(statement, ast.Import):
+            names.update(alias.name for alias in statement.names)
+        elif isinstance(statement, ast.ImportFrom) and statement.module:
+            names.add(statement.module)
+    return {os.path.join(REPOSITORY, name + '.py') for name in names
+            if os.path.exists(os.path.join(REPOSITORY, name + '.py'))}
+
+
+def test_fingerprint_covers_the_modules_the_parser_imports():
+    # Whatever the scanner and parser import from the repository shapes their results
+    sources = {os.path.abspath(path) for path in compile_cache.COMPILER_SOURCES}
+    pending = [os.path.join(REPOSITORY, 'scanner.py'), os.path.join(REPOSITORY, 'parser.py')]
+    while pending:
+        path = pending.pop()
+        assert path in sources
+        pending.extend(_local_imports(path) - {path})
+
+
+def test_cache_hit_matches_a_fresh_compile(tmp_path):
+    source = "read x;\nif x < 1 then write x else repeat x := x - 1 until x = 0 end\n"
+    cache = CompileCache(str(tmp_path))
+    first = compile_source(source, cache)
+    second = compile_source(source, cache)
+    assert not first.cached and second.cached
+    assert second.tokens == first.tokens
+    assert str(second.root) == str(first.root)
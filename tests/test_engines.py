@@ -0,0 +1,139 @@
+import io
+import random
+
+import pytest
+
+import pycompiler
+import vm
+from codegen import assembly, generate_code
+from engine_benchmark import walk
+from optimizer import optimize
+from tm import TM, TMError, parse_assembly
+from random_programs import parse, random_program
+
+
+def reference(root, input):
+    """Runs the tree walk; returns its output, final variables and error ('division', 'input' or None)."""
+    output = io.StringIO()
+    try:
+        variables = walk(root, input, output)
+    except ZeroDivisionError:
+        return output.getvalue(), None, 'division'
+    except StopIteration:
+        return output.getvalue(), None, 'input'
+    return output.getvalue(), variables, None
+
+
+def error_kind(message):
+    message = message.lower()
+    if 'division by zero' in message:
+        return 'division'
+    assert 'no more input' in message, message
+    return 'input'
+
+
+def run_vm(root, input):
+    output = io.StringIO()
+    machine = vm.VM(vm.compile_program(root), input, output)
+    try:
+        machine.run()
+    except vm.VMError as e:
+        return output.getvalue(), None, error_kind(str(e))
+    return output.getvalue(), dict(zip(machine.program.names, machine.memory)), None
+
+
+def run_tm(root, input):
+    code = generate_code(root)
+    output = io.StringIO()
+    machine = TM(code.instructions, code.data_size)
+    try:
+        machine.run(input, output)
+    except TMError as e:
+        return output.getvalue(), None, error_kind(str(e))
+    return output.getvalue(), dict(zip(code.names, machine.memory)), None
+
+
+def run_python(root, input, budget=None):
+    output = io.StringIO()
+    try:
+        variables = pycompiler.run(root, input, output, budget)
+    except vm.VMError as e:
+        return output.getvalue(), None, error_kind(str(e))
+    return output.getvalue(), variables, None
+
+
+def run_counted_python(root, input):
+    # The budget check compiles into every loop, which must not change the results
+    return run_python(root, input, budget=10 ** 6)
+
+
+ENGINES = {'vm': run_vm, 'tm': run_tm, 'python': run_python, 'counted python': run_counted_python}
+
+
+def cases(seed, count):
+    generator = random.Random(seed)
+    for _ in range(count):
+        text = random_program(generator)
+        input = [generator.randint(-20, 20) for _ in range(generator.randint(0, 30))]
+        yield text, input
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+@pytest.mark.parametrize('seed', range(3))
+def test_engine_matches_the_tree_walk(engine, seed):
+    for text, input in cases(seed, 300):
+        _, root = parse(text)
+        expected_output, expected_variables, expected_error = reference(root, input)
+        output, variables, error = ENGINES[engine](root, list(input))
+        assert (output, error) == (expected_output, expected_error), text
+        if expected_variables is not None:
+            # The walk only knows the variables it assigned; the others are still 0
+            assert {name: variables.get(name, 0) for name in expected_variables} == expected_variables, text
+
+
+def test_budgets_stop_a_runaway_loop():
+    _, root = parse("x := 0; repeat x := x + 1 until x < 0")
+    machine = vm.VM(vm.compile_program(root), [], io.StringIO())
+    with pytest.raises(vm.VMError, match="budget of 1000 exhausted"):
+        machine.run(1000)
+    assert machine.steps == 1000
+    with pytest.raises(vm.VMError, match="Repeat budget of 1000 exhausted at line 1"):
+        pycompiler.run(root, [], io.StringIO(), budget=1000)
+
+
+def test_assembly_text_loads_back():
+    for text, _ in cases(0, 50):
+        _, root = parse(text)
+        assert parse_assembly(assembly(root)) == generate_code(root).instructions
+
+
+def test_python_errors_repeat_the_vm_messages():
+    checked = 0
+    for text, input in cases(1, 200):
+        _, root = parse(text)
+        messages = []
+        for run in (vm.run, pycompiler.run):
+            try:
+                run(root, list(input), io.StringIO())
+                messages.append(None)
+            except vm.VMError as e:
+                messages.append(str(e))
+        assert messages[0] == messages[1], text
+        checked += messages[0] is not None
+    assert checked > 0
+
+
+def test_optimized_programs_behave_like_the_originals():
+    changed = 0
+    for text, input in cases(2, 300):
+        _, root = parse(text)
+        expected_output, expected_variables, expected_error = reference(root, input)
+        _, root = parse(text)
+        optimized, report = optimize(root)
+        changed += any(report.values())
+        output, variables, error = run_vm(optimized, list(input)) if optimized is not None else ('', {}, None)
+        assert (output, error) == (expected_output, expected_error), text
+        if expected_variables is not None:
+            # Variables the optimized program no longer mentions are 0
+            assert {name: variables.get(name, 0) for name in expected_variables} == expected_variables, text
+    assert changed > 0
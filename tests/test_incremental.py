@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from incremental import IncrementalParser, line_edit
+from parser import NO_NODE, Parser
+from scanner import LineEdit, Scanner
+from random_programs import break_lines, random_statements
+
+# Replacement lines that open or close blocks and comments, so edits also break programs
+FRAGMENTS = ['x := 1;', 'end', 'if x then', '{ c', '}', '', ';', 'until 1', 'repeat']
+
+
+def outline(tree, root):
+    """Every node reachable from the root, in order, with its label and line."""
+    if root is None:
+        return None
+    nodes = []
+    stack = [root.index]
+    while stack:
+        node = stack.pop()
+        nodes.append((tree.label(node), tree.lines[node]))
+        if tree.sibling[node] != NO_NODE:
+            stack.append(tree.sibling[node])
+        stack.extend(reversed(tree.children(node)))
+    return nodes
+
+
+def full_parse(text):
+    scanner = Scanner()
+    scanner.scan(text)
+    if scanner.errors:
+        return 'scanner errors'
+    parser = Parser(scanner.tokens, recover=True)
+    return outline(parser.tree, parser.program()), parser.errors
+
+
+def random_edit(generator, lines):
+    """Returns (first, last, new lines) of a random edit of `lines`."""
+    first = generator.randint(1, len(lines) + 1)
+    last = generator.randint(first - 1, min(len(lines), first + 2))
+    choice = generator.random()
+    if choice < 0.3:
+        new = break_lines(generator, random_statements(generator, 1)).splitlines()
+    elif choice < 0.5:
+        new = []
+    elif choice < 0.6:
+        new = [generator.choice(FRAGMENTS)]
+    else:
+        # Rename variables, which keeps the shape of the program
+        new = [line.replace(generator.choice('xyz'), generator.choice('xyz')) for line in lines[first - 1:last]] or ['']
+    return first, last, new
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_edits_match_a_full_parse(seed):
+    generator = random.Random(seed)
+    incremental_updates = 0
+    for _ in range(150):
+        text = break_lines(generator, random_statements(generator) + '; ' + random_statements(generator))
+        parser = IncrementalParser(text)
+        lines = text.splitlines()
+        for _ in range(6):
+            first, last, new = random_edit(generator, lines)
+            lines = lines[:first - 1] + new + lines[last:]
+            text = "\n".join(lines)
+            if generator.random() < 0.5:
+                parser.update(LineEdit(first, last, "".join(line + "\n" for line in new)))
+            else:
+                parser.set_text(text)
+            if parser.scanner.errors:
+                assert full_parse(text) == 'scanner errors'
+            else:
+                assert (outline(parser.tree, parser.program()), parser.errors) == full_parse(text), text
+            lines = list(parser.scanner.lines)
+            if parser.parsed_tokens < len(parser.scanner.tokens):
+                incremental_updates += 1
+    assert incremental_updates > 30  # Edits keeping the program valid must not fall back to a full parse
+
+
+def test_one_line_edit_parses_only_its_statement():
+    text = "".join(f"x := {number};\n" for number in range(2000)) + "write x\n"
+    parser = IncrementalParser(text)
+    lines = text.splitlines()
+    new_lines = lines[:1000] + ["y := x * 2;"] + lines[1001:]
+    parser.update(line_edit(lines, new_lines))
+    assert parser.parsed_tokens < 20
+    assert (outline(parser.tree, parser.program()), parser.errors) == full_parse("\n".join(new_lines))
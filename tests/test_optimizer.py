@@ -0,0 +1,29 @@
+import optimizer
+from optimizer import optimize
+from random_programs import parse
+
+
+def test_a_sequence_that_must_stay_reports_nothing(monkeypatch):
+    # The inner if vanishes, which would empty the repeat body, so the tree has to stay as it is
+    _, root = parse("repeat if x then if 0 then y := 1 end end until x")
+    before = str(root)
+    rounds = []
+    eliminate_dead_code = optimizer.eliminate_dead_code
+
+    def counted(root):
+        rounds.append(root)
+        return eliminate_dead_code(root)
+
+    counted.__name__ = 'eliminate_dead_code'
+    root, report = optimize(root, passes=(optimizer.fold_constants, optimizer.simplify_algebra, counted))
+    assert report == {'fold_constants': [], 'simplify_algebra': [], 'eliminate_dead_code': []}
+    assert len(rounds) == 1
+    assert str(root) == before
+
+
+def test_an_emptied_if_is_reported_with_its_contents_when_dropped():
+    _, root = parse("x := 1;\nif x then\n  if 0 then y := 1 end\nend;\nwrite x")
+    root, report = optimize(root)
+    assert report['eliminate_dead_code'] == ["line 2: removed an if without statements",
+                                             "line 3: removed an if whose condition is always false"]
+    assert str(root).split() == ['assign(id(x))', 'const(1)', 'write', 'id(x)']
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from parser import NO_NODE, Parser, ParserError
+from scanner import Scanner
+from tracing import Tracer
+from random_programs import random_program
+from reference_parser import reference_parse
+
+
+def scan(text):
+    scanner = Scanner()
+    scanner.scan(text)
+    assert not scanner.errors, scanner.errors
+    return list(scanner.tokens)
+
+
+def rows(tree, root):
+    """The tree below root as (depth, label, line) rows in print order, like reference_parse."""
+    result = []
+    stack = [(root.index, 0)] if root is not None else []
+    while stack:
+        node, depth = stack.pop()
+        result.append((depth, tree.label(node), tree.lines[node]))
+        if tree.sibling[node] != NO_NODE:
+            stack.append((tree.sibling[node], depth))
+        stack.extend((child, depth + 1) for child in reversed(tree.children(node)))
+    return result
+
+
+def fail_fast(tokens):
+    """Parses without recovering; returns (rows, error) like reference_parse."""
+    parser = Parser(tokens)
+    try:
+        root = parser.program()
+    except ParserError as e:
+        assert parser.errors == [str(e)]
+        return None, str(e)
+    assert parser.errors == []
+    return rows(parser.tree, root), None
+
+
+def mutate(generator, tokens, pool):
+    """Deletes, inserts or replaces a few tokens; the inserted ones keep the line of their position."""
+    tokens = list(tokens)
+    for _ in range(generator.randint(1, 3)):
+        position = generator.randrange(len(tokens) + 1)
+        line = tokens[min(position, len(tokens) - 1)][0] if tokens else 1
+        choice = generator.random()
+        if choice < 0.4 and tokens:
+            del tokens[min(position, len(tokens) - 1)]
+        elif choice < 0.7 or not tokens:
+            tokens.insert(position, (line,) + generator.choice(pool)[1:])
+        else:
+            tokens[min(position, len(tokens) - 1)] = (line,) + generator.choice(pool)[1:]
+    return tokens
+
+
+def token_streams(seed, count):
+    """Yields the tokens of `count` random programs, each as generated and then mutated."""
+    generator = random.Random(seed)
+    pool = [token for _ in range(20) for token in scan(random_program(generator))]
+    for _ in range(count):
+        tokens = scan(random_program(generator))
+        yield tokens
+        yield mutate(generator, tokens, pool)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_parser_matches_the_recursive_descent_reference(seed):
+    valid = invalid = 0
+    for tokens in token_streams(seed, 300):
+        expected = reference_parse(tokens)
+        assert fail_fast(tokens) == expected, tokens
+        valid += expected[1] is None
+        invalid += expected[1] is not None
+    assert valid > 300 and invalid > 250  # Mutations mostly break programs, but not always
+
+
+def test_reference_sees_empty_and_truncated_input():
+    assert fail_fast([]) == reference_parse([]) == (None, "Syntax Error: Invalid statement type or missing keyword")
+    tokens = scan("if x then\nrepeat y := 1")
+    assert fail_fast(tokens) == reference_parse(tokens) == (None, "Syntax Error at line 2: Expected UNTIL, found None")
+
+
+class StepBudget:
+    """Trace sink that fails a parse taking more steps than a budget, so a recovery loop cannot hang the test."""
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def __call__(self, event):
+        self.steps -= 1
+        if self.steps < 0:
+            raise AssertionError("the parser did not finish within its step budget")
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_recovery_terminates_and_agrees_with_fail_fast(seed):
+    for tokens in token_streams(seed, 300):
+        expected_rows, expected_error = fail_fast(tokens)
+        # Every token pulled, match tried and rule entered or left is one trace event
+        parser = Parser(tokens, tracer=Tracer(StepBudget(100 * (len(tokens) + 1))), recover=True)
+        root = parser.program()  # Recovering never raises
+        if expected_error is None:
+            assert parser.errors == []
+            assert rows(parser.tree, root) == expected_rows
+        else:
+            assert parser.errors[0] == expected_error
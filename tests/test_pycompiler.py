@@ -0,0 +1,39 @@
+import io
+
+import pytest
+
+import pycompiler
+from parser import Parser
+from scanner import Scanner
+
+
+def parse(text):
+    scanner = Scanner()
+    scanner.scan(text)
+    return Parser(scanner.tokens).program()
+
+
+def nested_ifs(count, inner="write 1"):
+    return "if 0 < 1 then " * count + inner + " end" * count
+
+
+def nested_repeats(count, inner="x := x + 1"):
+    return "repeat " * count + inner + " until 0 < 1" * count
+
+
+@pytest.mark.parametrize('counted', [False, True])
+def test_deepest_translatable_ifs_run(counted):
+    output = io.StringIO()
+    pycompiler.compile_program(parse(nested_ifs(98)), counted).run([], output, 10 if counted else None)
+    assert output.getvalue() == "1\n"
+
+
+@pytest.mark.parametrize('text', [nested_ifs(99), nested_ifs(97, nested_repeats(1)), nested_repeats(21)])
+def test_too_deep_nesting_raises_translation_error(text):
+    with pytest.raises(pycompiler.TranslationError, match="Line 1"):
+        pycompiler.translate(parse(text))
+
+
+def test_deepest_translatable_repeats_run():
+    variables = pycompiler.run(parse(nested_repeats(20) + "; write x"), [], io.StringIO())
+    assert variables['x'] == 1
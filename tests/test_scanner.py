@@ -0,0 +1,133 @@
+import io
+import os
+import random
+import tempfile
+
+import pytest
+
+from scanner import LineEdit, Scanner, _split_chunks
+from random_programs import break_lines, random_statements, random_text
+
+
+def scanner_state(scanner):
+    """What update() has to leave exactly as a fresh scan() would."""
+    comment_line = scanner.comment_line if scanner.in_comment_block else None
+    return (list(scanner.tokens), scanner.errors, list(scanner.line_states), scanner.stopped_at,
+            scanner.in_comment_block, comment_line)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_update_matches_a_full_scan(seed):
+    generator = random.Random(seed)
+    for _ in range(500):
+        scanner = Scanner()
+        scanner.scan("\n".join(random_text(generator) for _ in range(3)))
+        for _ in range(3):
+            count = len(scanner.lines)
+            first = generator.randint(1, count + 1)
+            last = generator.randint(first - 1, min(count, first + 2))
+            text = random_text(generator) if generator.random() < 0.7 else ''
+            scanner.update(LineEdit(first, last, text))
+            reference = Scanner()
+            reference.scan("\n".join(scanner.lines))
+            if reference.lines != scanner.lines:
+                continue  # The edit left a line break (such as a lone \r) that splits differently when rejoined
+            assert scanner_state(scanner) == scanner_state(reference), (first, last, text)
+
+
+def scan_fast(text):
+    scanner = Scanner()
+    scanner.scan_fast(text)
+    return scanner.tokens, scanner.errors
+
+
+def iter_tokens(text):
+    scanner = Scanner()
+    tokens = list(scanner.iter_tokens(io.StringIO(text)))  # Read line by line, as from a file
+    return tokens, scanner.errors
+
+
+def scan_mapped(text):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.txt')
+        with open(path, 'wb') as file:
+            file.write(text.encode('utf-8'))  # Bytes, so no line breaks are translated
+        scanner = Scanner()
+        tokens = scanner.scan_mapped(path)
+        try:
+            return list(tokens), scanner.errors
+        finally:
+            tokens.close()
+
+
+def scan_compact(text):
+    scanner = Scanner()
+    tokens = scanner.scan_compact(text)
+    assert tokens is scanner.tokens and len(tokens) == len(list(tokens))
+    return tokens[:], scanner.errors  # Read back through slicing, which TokenBuffer implements itself
+
+
+# Other ways to scan a text; each returns (tokens, errors) and must agree with scan()
+SCAN_MODES = {
+    'scan_fast': scan_fast,
+    'iter_tokens': iter_tokens,
+    'scan_mapped': scan_mapped,
+    'scan_compact': scan_compact,
+}
+
+
+@pytest.mark.parametrize('mode', SCAN_MODES)
+def test_scan_mode_matches_scan(mode):
+    generator = random.Random(mode)
+    for _ in range(2000):
+        text = "\n".join(random_text(generator) for _ in range(generator.randint(1, 4)))
+        reference = Scanner()
+        reference.scan(text)
+        tokens, errors = SCAN_MODES[mode](text)
+        assert (list(tokens), errors) == (reference.tokens, reference.errors), text
+
+
+def test_update_rescans_only_up_to_the_next_checkpoint():
+    scanner = Scanner()
+    scanner.scan("".join(f"x{number} := {number};\n" for number in range(1000)))
+    kept = scanner.update(LineEdit(500, 500, "{ a comment\nover two lines } y := 1;\n"))
+    assert kept == 502  # Scanning caught up with the old checkpoints right after the edit
+    reference = Scanner()
+    reference.scan("\n".join(scanner.lines))
+    assert scanner_state(scanner) == scanner_state(reference)
+
+
+def commented_text(generator):
+    """Random statements with comments over several lines between them, and now and then broken text."""
+    pieces = []
+    for _ in range(40):
+        choice = generator.random()
+        if choice < 0.5:
+            lines = (random_text(generator, 20).replace('{', '').replace('}', '') for _ in range(generator.randint(2, 8)))
+            pieces.append('{' + '\n'.join(lines) + '}')
+        elif choice < 0.97:
+            pieces.append(break_lines(generator, random_statements(generator)))
+        else:
+            pieces.append(random_text(generator, 10))
+    return '\n'.join(pieces)
+
+
+def test_scan_parallel_matches_scan():
+    generator = random.Random(7)
+    boundaries_in_comments = 0
+    for _ in range(30):
+        text = commented_text(generator)
+        workers = generator.randint(2, 8)
+        scanner = Scanner()
+        scanner.scan_parallel(text, workers)
+        reference = Scanner()
+        reference.scan(text)
+        assert scanner_state(scanner) == scanner_state(reference), text
+
+        # Count the chunks that start inside a comment, which the workers cannot know about
+        first_line = 1
+        for chunk in _split_chunks(text, workers)[:-1]:
+            first_line += len(chunk.splitlines())
+            if first_line <= len(reference.line_states) and reference.line_states[first_line - 1] is not None:
+                boundaries_in_comments += 1
+    assert boundaries_in_comments > 10
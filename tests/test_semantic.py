@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from codegen import generate_code
+from semantic import analyze
+from vm import compile_program
+from random_programs import parse, random_program
+
+
+def warnings(text):
+    return analyze(parse(text)[1])[1]
+
+
+@pytest.mark.parametrize('text', [
+    "read x;\nif x then y := 1 else y := 2 end;\nwrite y",
+    "read x;\nif x then y := 1 else if x < 2 then y := 2 else read y end end;\nwrite y",
+    "repeat\n  read x\nuntil x = 0;\nwrite x",
+    "read n;\nrepeat\n  s := n;\n  n := n - 1\nuntil n = s;\nwrite s",
+    "read x;\nif x then write x end;\nx := 2;\nwrite x",
+])
+def test_variables_assigned_on_every_path_are_not_reported(text):
+    assert warnings(text) == []
+
+
+def test_uses_not_assigned_on_every_path_are_reported():
+    # Only one branch assigns y
+    assert warnings("read x;\nif x then y := 1 end;\nwrite y") == [
+        "Semantic Warning at line 3: variable 'y' may be used before it is assigned"]
+    assert warnings("read x;\nif x then write x else y := 2 end;\nwrite y") == [
+        "Semantic Warning at line 3: variable 'y' may be used before it is assigned"]
+    # The first iteration reads s before the body assigns it
+    assert warnings("read n;\nrepeat\n  s := s + n;\n  n := n - 1\nuntil n = 0;\nwrite s") == [
+        "Semantic Warning at line 3: variable 's' may be used before it is assigned"]
+    # What a repeat body assigns only after a branch is still uncertain at the until
+    assert warnings("read x;\nrepeat\n  if x then y := 1 end\nuntil y") == [
+        "Semantic Warning at line 4: variable 'y' may be used before it is assigned"]
+    assert warnings("write z") == ["Semantic Warning at line 1: variable 'z' is never assigned"]
+
+
+def test_unused_variables_are_reported_at_their_first_assignment():
+    assert warnings("x := 1;\ny := 2;\nread y;\nwrite x") == [
+        "Semantic Warning at line 2: variable 'y' is assigned but never used"]
+    assert warnings("read x;\nx := x + 1") == []  # Used by its own assignment
+
+
+def test_slots_number_variables_as_the_vm_and_code_generator_do():
+    generator = random.Random(0)
+    for _ in range(300):
+        _, root = parse(random_program(generator))
+        table, _ = analyze(root)
+        # Both back ends number variables by first appearance; their slots are the table's
+        assert table.names == compile_program(root).names == generate_code(root).names
+        assert [table.lookup(name) for name in table.names] == list(range(len(table)))
+        tree = root.tree
+        for slot, name in enumerate(table.names):
+            for node in list(table.definitions[slot]) + list(table.uses[slot]):
+                assert table.slot_of(node) == slot and tree.value(node) == name
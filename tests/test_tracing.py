@@ -0,0 +1,109 @@
+import pytest
+
+from parser import Parser, ParserError
+from scanner import Scanner
+from tracing import ERRORS, RULES, TOKENS, RingBufferSink, Tracer
+
+
+def trace(text, level=RULES, recover=False):
+    """Parses text with a tracer at `level`; returns the events and the parser."""
+    scanner = Scanner()
+    scanner.scan(text)
+    events = []
+    parser = Parser(scanner.tokens, tracer=Tracer(events.append, level), recover=recover)
+    parser.program()
+    return events, parser
+
+
+def rules(events):
+    return [(event.kind, event.rule) for event in events if event.kind in ('enter', 'exit')]
+
+
+@pytest.mark.parametrize('level', [RULES, TOKENS])
+def test_program_traces_at_rule_level(level):
+    events, parser = trace("read x; x := x + 1; write x", level)
+    assert parser.errors == []
+    assert rules(events)[:2] == [('enter', 'program'), ('enter', 'stmt_sequence')]
+    assert rules(events)[-2:] == [('exit', 'stmt_sequence'), ('exit', 'program')]
+    assert ('enter', 'assign_stmt') in rules(events)
+    assert events[-1].depth == 0
+
+
+def test_token_level_reports_every_token_matched_inside_expressions():
+    events, _ = trace("x := (a + 1) * b < 3", TOKENS)
+    matches = [event.detail for event in events if event.kind == 'match']
+    assert matches == ['IDENTIFIER', ':=', '(', 'IDENTIFIER', '+', 'NUMBER', ')', '*', 'IDENTIFIER', '<', 'NUMBER']
+    # Each match is followed by the advance past its token
+    kinds = [event.kind for event in events if event.kind in ('match', 'advance')]
+    assert kinds == ['advance'] + ['match', 'advance'] * len(matches)
+
+
+def test_error_level_records_only_errors():
+    scanner = Scanner()
+    scanner.scan("x := ;")
+    events = []
+    with pytest.raises(ParserError):
+        Parser(scanner.tokens, tracer=Tracer(events.append, ERRORS)).program()
+    assert [event.kind for event in events] == ['error']
+
+
+def test_failing_rules_exit_with_error():
+    scanner = Scanner()
+    scanner.scan("write (1 +")
+    sink = RingBufferSink(5)
+    with pytest.raises(ParserError):
+        Parser(scanner.tokens, tracer=Tracer(sink, RULES)).program()
+    assert [(event.rule, event.detail) for event in sink.events()][-2:] == [
+        ('stmt_sequence', 'error'), ('program', 'error')]
+
+
+def test_blocks_keep_their_rule_structure():
+    events, _ = trace("read x; if x < 1 then repeat x := x + 1 until x = 3 else write x end")
+    shape = [("> " if kind == 'enter' else "< ") + rule for kind, rule in rules(events)]
+    assert shape == [
+        "> program", "> stmt_sequence", "> read_stmt", "< read_stmt",
+        "> if_stmt", "> exp", "< exp",
+        "> stmt_sequence", "> repeat_stmt",
+        "> stmt_sequence", "> assign_stmt", "> exp", "< exp", "< assign_stmt", "< stmt_sequence",
+        "> exp", "< exp", "< repeat_stmt", "< stmt_sequence",
+        "> stmt_sequence", "> write_stmt", "> exp", "< exp", "< write_stmt", "< stmt_sequence",
+        "< if_stmt", "< stmt_sequence", "< program",
+    ]
+    depths = [event.depth for event in events if event.kind == 'enter']
+    assert max(depths) == 7  # program, three sequences, if, repeat, assign, exp
+
+
+def test_open_blocks_exit_with_error():
+    scanner = Scanner()
+    scanner.scan("if 1 < 2 then repeat x := 1 end")
+    events = []
+    with pytest.raises(ParserError):
+        Parser(scanner.tokens, tracer=Tracer(events.append, RULES)).program()
+    exits = [(event.rule, event.detail) for event in events if event.kind == 'exit'][-7:]
+    assert exits == [('assign_stmt', None), ('stmt_sequence', 'error'), ('repeat_stmt', 'error'),
+                     ('stmt_sequence', 'error'), ('if_stmt', 'error'), ('stmt_sequence', 'error'),
+                     ('program', 'error')]
+    assert events[-1].depth == 0
+
+
+def test_recovered_blocks_stay_balanced():
+    events, parser = trace("if 1 < 2 then repeat x := 1 end; write x", recover=True)
+    assert len(parser.errors) == 1
+    assert sum(1 if event.kind == 'enter' else -1 for event in events if event.kind in ('enter', 'exit')) == 0
+    assert events[-1].depth == 0
+
+
+def test_block_with_a_broken_condition_stays_balanced():
+    events, parser = trace("if x < then y := 1 end; write y", recover=True)
+    assert parser.errors
+    entered = [event.rule for event in events if event.kind == 'enter']
+    exited = [event.rule for event in events if event.kind == 'exit']
+    assert sorted(entered) == sorted(exited)
+    assert events[-1].depth == 0
+
+
+def test_failed_until_condition_exits_the_repeat():
+    events, parser = trace("repeat x := 1 until (x < ; write x", recover=True)
+    assert parser.errors
+    assert ('repeat_stmt', 'error') in [(event.rule, event.detail) for event in events if event.kind == 'exit']
+    assert events[-1].depth == 0
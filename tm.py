@@ -0,0 +1,205 @@
+"""
+The Tiny Machine (TM), the target machine of the TINY compiler, as an in-process simulator.
+
+TM has eight registers (register 7 is the program counter), an instruction memory and a
+data memory of integers whose location 0 initially holds the highest data address.
+Register-only (RO) instructions are written "OP r,s,t" and register-memory (RM)
+instructions "OP r,d(s)", where the address is d + reg[s]:
+
+    HALT          stop                        LD   r,d(s)  reg[r] = dMem[d + reg[s]]
+    IN   r        reg[r] = next input value   LDA  r,d(s)  reg[r] = d + reg[s]
+    OUT  r        write reg[r]                LDC  r,d(s)  reg[r] = d
+    ADD  r,s,t    reg[r] = reg[s] + reg[t]    ST   r,d(s)  dMem[d + reg[s]] = reg[r]
+    SUB, MUL, DIV likewise                    JLT  r,d(s)  if reg[r] < 0: reg[7] = d + reg[s]
+                                              JLE, JGE, JGT, JEQ, JNE likewise
+
+Division truncates toward zero. Values are unbounded Python integers.
+"""
+import re
+import sys
+from collections import namedtuple
+
+from vm import divide
+
+# Opcodes, register-only ones first, as in the classic TM
+OPCODES = ('HALT', 'IN', 'OUT', 'ADD', 'SUB', 'MUL', 'DIV',
+           'LD', 'ST', 'LDA', 'LDC', 'JLT', 'JLE', 'JGE', 'JGT', 'JEQ', 'JNE')
+HALT, IN, OUT, ADD, SUB, MUL, DIV, LD, ST, LDA, LDC, JLT, JLE, JGE, JGT, JEQ, JNE = range(len(OPCODES))
+OPCODE_NUMBERS = {name: number for number, name in enumerate(OPCODES)}
+RM_OPCODES = frozenset(OPCODES[LD:])  # Written "OP r,d(s)"
+
+PC = 7  # The program counter register
+DADDR_SIZE = 1024  # Default data memory size, as in the classic TM
+
+# Simple cost model for the cycle counter: memory accesses and multiplication take longer
+CYCLES = {HALT: 1, IN: 1, OUT: 1, ADD: 1, SUB: 1, MUL: 3, DIV: 10, LD: 2, ST: 2, LDA: 1, LDC: 1,
+          JLT: 1, JLE: 1, JGE: 1, JGT: 1, JEQ: 1, JNE: 1}
+
+# opcode is the name, e.g. 'LDC'; t is the displacement d of RM instructions
+Instruction = namedtuple('Instruction', ['opcode', 'r', 's', 't', 'comment'])
+
+
+class TMError(Exception):
+    """Raised when a program faults: bad instruction or data address, division by zero, no input."""
+    pass
+
+
+_INSTRUCTION = re.compile(r"\s*(\d+)\s*:\s*([A-Za-z]+)\s+(-?\d+)\s*,\s*(-?\d+)\s*(?:,\s*(-?\d+)|\(\s*(-?\d+)\s*\))\s*(.*)")
+
+
+def parse_assembly(text):
+    """Reads TM assembly text ("loc: OP r,s,t" and "loc: OP r,d(s)" lines, '*' comments) into instructions."""
+    located = {}
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line.strip() or line.lstrip().startswith('*'):
+            continue
+        match = _INSTRUCTION.match(line)
+        if match is None or match.group(2).upper() not in OPCODE_NUMBERS:
+            raise TMError(f"Bad instruction at line {number}: {line.strip()}")
+        location, opcode, r, s_or_d, t, s, comment = match.groups()
+        opcode = opcode.upper()
+        if (t is None) != (opcode in RM_OPCODES):
+            raise TMError(f"Bad operands for {opcode} at line {number}: {line.strip()}")
+        if t is not None:
+            instruction = Instruction(opcode, int(r), int(s_or_d), int(t), comment.strip())
+        else:
+            instruction = Instruction(opcode, int(r), int(s), int(s_or_d), comment.strip())
+        located[int(location)] = instruction
+    # Locations may come in any order (code generators backpatch); gaps hold HALT
+    size = max(located) + 1 if located else 0
+    return [located.get(location, Instruction('HALT', 0, 0, 0, '')) for location in range(size)]
+
+
+def format_instruction(location, instruction):
+    """Formats one instruction like the classic code generator does."""
+    opcode, r, s, t, comment = instruction
+    if opcode in RM_OPCODES:
+        text = f"{location:3d}:  {opcode:>5s}  {r},{t}({s}) "
+    else:
+        text = f"{location:3d}:  {opcode:>5s}  {r},{s},{t} "
+    return f"{text}\t{comment}" if comment else text
+
+
+def format_assembly(instructions, title=None):
+    """Formats a whole program as TM assembly text."""
+    lines = [f"* {title}"] if title else []
+    lines.extend(format_instruction(location, instruction) for location, instruction in enumerate(instructions))
+    return "\n".join(lines) + "\n"
+
+
+class TM:
+    """
+    Simulates the Tiny Machine. After run(), steps holds the number of instructions
+    executed, hits the number of executions of each instruction and cycles the cost
+    of the run under the CYCLES model.
+    """
+
+    def __init__(self, instructions, data_size=DADDR_SIZE):
+        self.instructions = list(instructions)
+        self.data_size = data_size
+        self.registers = [0] * 8
+        self.memory = [0] * data_size
+        self.steps = 0
+        self.cycles = 0
+        self.hits = [0] * len(self.instructions)
+
+    def run(self, input=None, output=None, budget=None):
+        """
+        Runs the program from location 0 with cleared registers and memory; reads come
+        from the iterable `input` (stdin by default) and writes go to the file-like
+        `output`. Returns the number of instructions executed. With a budget, a
+        program still running after that many instructions raises TMError.
+        """
+        instructions = self.instructions
+        size = len(instructions)
+        # Decoded columns: lists index much faster than namedtuples unpack
+        opcodes = [OPCODE_NUMBERS[instruction.opcode] for instruction in instructions]
+        rs = [instruction.r for instruction in instructions]
+        ss = [instruction.s for instruction in instructions]
+        ts = [instruction.t for instruction in instructions]
+        hits = self.hits = [0] * size
+        registers = self.registers = [0] * 8
+        data_size = self.data_size
+        memory = self.memory = [0] * data_size
+        memory[0] = data_size - 1
+        next_input = iter(input if input is not None else sys.stdin).__next__
+        write = (output if output is not None else sys.stdout).write
+
+        steps = range(budget) if budget is not None else range(sys.maxsize)
+        step = -1
+        pc = 0
+        try:
+            for step in steps:
+                pc = registers[PC]
+                if not 0 <= pc < size:
+                    raise TMError(f"Instruction memory fault at location {pc}")
+                registers[PC] = pc + 1
+                hits[pc] += 1
+                opcode = opcodes[pc]
+                if opcode >= LD:
+                    # Register-memory instruction
+                    r = rs[pc]
+                    address = ts[pc] + registers[ss[pc]]
+                    if opcode == LD:
+                        if not 0 <= address < data_size:
+                            raise TMError(f"Data memory fault at location {pc}: address {address}")
+                        registers[r] = memory[address]
+                    elif opcode == ST:
+                        if not 0 <= address < data_size:
+                            raise TMError(f"Data memory fault at location {pc}: address {address}")
+                        memory[address] = registers[r]
+                    elif opcode == LDA:
+                        registers[r] = address
+                    elif opcode == LDC:
+                        registers[r] = ts[pc]
+                    elif opcode == JEQ:
+                        if registers[r] == 0:
+                            registers[PC] = address
+                    elif opcode == JNE:
+                        if registers[r] != 0:
+                            registers[PC] = address
+                    elif opcode == JLT:
+                        if registers[r] < 0:
+                            registers[PC] = address
+                    elif opcode == JGE:
+                        if registers[r] >= 0:
+                            registers[PC] = address
+                    elif opcode == JGT:
+                        if registers[r] > 0:
+                            registers[PC] = address
+                    elif registers[r] <= 0:  # JLE
+                        registers[PC] = address
+                elif opcode == ADD:
+                    registers[rs[pc]] = registers[ss[pc]] + registers[ts[pc]]
+                elif opcode == SUB:
+                    registers[rs[pc]] = registers[ss[pc]] - registers[ts[pc]]
+                elif opcode == MUL:
+                    registers[rs[pc]] = registers[ss[pc]] * registers[ts[pc]]
+                elif opcode == DIV:
+                    divisor = registers[ts[pc]]
+                    if divisor == 0:
+                        raise TMError(f"Division by zero at location {pc}")
+                    registers[rs[pc]] = divide(registers[ss[pc]], divisor)
+                elif opcode == IN:
+                    try:
+                        registers[rs[pc]] = int(next_input())
+                    except StopIteration:
+                        raise TMError(f"No more input at location {pc}") from None
+                    except ValueError as e:
+                        raise TMError(f"Invalid input at location {pc}: {e}") from None
+                elif opcode == OUT:
+                    write(f"{registers[rs[pc]]}\n")
+                else:  # HALT
+                    break
+            else:
+                raise TMError(f"Instruction budget of {budget} exhausted at location {registers[PC]}")
+        finally:
+            self.steps = step + 1
+            self.cycles = sum(count * CYCLES[opcode] for count, opcode in zip(hits, opcodes) if count)
+        return self.steps
+
+    def profile(self, limit=10):
+        """Returns the `limit` most executed (location, instruction, executions) of the last run."""
+        hottest = sorted(range(len(self.hits)), key=self.hits.__getitem__, reverse=True)[:limit]
+        return [(location, self.instructions[location], self.hits[location])
+                for location in hottest if self.hits[location]]
@@ -0,0 +1,121 @@
+"""
+Structured tracing for the parser.
+
+A Tracer sends TraceEvent records to a sink (any callable). Parsing is instrumented
+only when a tracer is given: the parser's grammar methods, advance() and match() are
+wrapped on that one instance, so an untraced parser runs with no hooks at all.
+"""
+from collections import deque, namedtuple
+import sys
+
+# Trace levels: each includes the ones below it
+OFF = 0  # Nothing is recorded
+ERRORS = 1  # Syntax errors
+RULES = 2  # Grammar rules entered and exited
+TOKENS = 3  # Tokens advanced over and match attempts
+
+# kind is one of 'enter', 'exit', 'advance', 'match' or 'error'; rule is the grammar rule
+# (enter/exit), token the current token, depth the rule nesting and detail the expected
+# value of a match, 'error' for a rule left by an exception, or an error message
+TraceEvent = namedtuple('TraceEvent', ['kind', 'rule', 'token', 'depth', 'detail'])
+
+
+class Tracer:
+    """Filters events by level and hands them to a sink."""
+
+    def __init__(self, sink, level=TOKENS):
+        self.sink = sink  # Callable receiving each TraceEvent
+        self.level = level
+        self.depth = 0  # Current rule nesting
+
+    def emit(self, kind, rule=None, token=None, detail=None):
+        """Sends one event to the sink."""
+        self.sink(TraceEvent(kind, rule, token, self.depth, detail))
+
+
+class RingBufferSink:
+    """Keeps only the most recent events, for post-mortem debugging."""
+
+    def __init__(self, capacity=1000):
+        self.buffer = deque(maxlen=capacity)
+
+    def __call__(self, event):
+        self.buffer.append(event)
+
+    def events(self):
+        """Returns the recorded events, oldest first."""
+        return list(self.buffer)
+
+    def dump(self, file=None):
+        """Writes the recorded events, one per line."""
+        file = file or sys.stdout
+        for event in self.buffer:
+            file.write(format_event(event) + "\n")
+
+
+def print_sink(event):
+    """Prints each event as it happens."""
+    print(format_event(event))
+
+
+def format_event(event):
+    """Formats an event as an indented line of text."""
+    indent = "  " * event.depth
+    if event.kind == 'enter':
+        return f"{indent}> {event.rule}  at {event.token}"
+    if event.kind == 'exit':
+        suffix = f"  ({event.detail})" if event.detail else ""
+        return f"{indent}< {event.rule}{suffix}"
+    if event.kind == 'advance':
+        return f"{indent}  advanced to {event.token}"
+    if event.kind == 'match':
+        return f"{indent}  match {event.detail!r} against {event.token}"
+    return f"{indent}! {event.detail}"
+
+
+def instrument_parser(parser, tracer):
+    """Wraps the grammar methods, advance() and match() of one parser instance."""
+    if tracer.level >= RULES:
+        for rule in parser.TRACED_RULES:
+            setattr(parser, rule, _traced_rule(parser, rule, getattr(parser, rule), tracer))
+    if tracer.level >= TOKENS:
+        parser.advance = _traced_advance(parser, parser.advance, tracer)
+        parser.match = _traced_match(parser, parser.match, tracer)
+
+
+def _traced_rule(parser, rule, method, tracer):
+    """Returns `method` emitting 'enter' and 'exit' events around each call."""
+    emit = tracer.emit
+
+    def traced(*args, **kwargs):
+        emit('enter', rule, parser.current_token)
+        tracer.depth += 1
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            tracer.depth -= 1
+            emit('exit', rule, parser.current_token, 'error')
+            raise
+        tracer.depth -= 1
+        emit('exit', rule, parser.current_token)
+        return result
+
+    return traced
+
+
+def _traced_advance(parser, method, tracer):
+    """Returns `method` emitting an 'advance' event after each call."""
+    def traced():
+        method()
+        tracer.emit('advance', token=parser.current_token)
+
+    return traced
+
+
+def _traced_match(parser, method, tracer):
+    """Returns `method` emitting a 'match' event before each attempt."""
+    def traced(expected):
+        tracer.emit('match', token=parser.current_token, detail=expected)
+        return method(expected)
+
+    return traced
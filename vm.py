@@ -0,0 +1,269 @@
+"""
+Bytecode compiler and stack virtual machine for TINY programs.
+
+compile_program() turns a parsed program into a Bytecode: a flat array of
+(opcode, argument) word pairs in which variables are integer slots and numbers
+are indexes into a constant table, so running it needs no name lookups or string
+parsing. VM runs a Bytecode with one tight dispatch loop, reading from any
+iterable of values and writing to any file-like object.
+
+TINY values are integers. Uninitialized variables hold 0, comparisons give 1 or 0,
+a condition holds when its value is not 0 and division truncates toward zero.
+"""
+import sys
+from array import array
+from collections import namedtuple
+from itertools import count
+
+from parser import ASSIGN_NODE, CONST_NODE, ID_NODE, IF_NODE, NO_NODE, READ_NODE, REPEAT_NODE, WRITE_NODE
+
+# Opcodes, roughly in order of how often loop-heavy programs execute them
+OPCODES = ('LOAD', 'CONST', 'STORE', 'ADD', 'SUB', 'MUL', 'DIV', 'LT', 'EQ',
+           'JUMP_IF_FALSE', 'JUMP', 'READ', 'WRITE', 'HALT')
+LOAD, CONST, STORE, ADD, SUB, MUL, DIV, LT, EQ, JUMP_IF_FALSE, JUMP, READ, WRITE, HALT = range(len(OPCODES))
+OPERATOR_CODES = {'+': ADD, '-': SUB, '*': MUL, '/': DIV, '<': LT, '=': EQ}
+
+# code holds (opcode, argument) pairs; lines holds the source line of each pair, for errors
+Bytecode = namedtuple('Bytecode', ['code', 'constants', 'names', 'lines'])
+
+
+class VMError(Exception):
+    """Raised for runtime errors: division by zero, exhausted input or instruction budget."""
+    pass
+
+
+def divide(dividend, divisor):
+    """TINY integer division, truncating toward zero like the Tiny Machine's DIV."""
+    quotient = dividend // divisor
+    if quotient < 0 and quotient * divisor != dividend:
+        quotient += 1  # Floor division rounded a negative quotient down
+    return quotient
+
+
+def compile_program(root):
+    """
+    Compiles the NodeView returned by Parser.program() into a Bytecode. Like the
+    parser, the compiler keeps its work on an explicit stack instead of recursing.
+    """
+    code = array('i')
+    lines = array('I')
+    constants = []
+    constant_slots = {}
+    names = []
+    slots = {}
+    if root is None:
+        code.extend((HALT, 0))
+        lines.append(0)
+        return Bytecode(code, constants, names, lines)
+    tree = root.tree
+    kinds, first_child, next_child, sibling = tree.kinds, tree.first_child, tree.next_child, tree.sibling
+
+    def slot(name):
+        number = slots.get(name)
+        if number is None:
+            number = slots[name] = len(names)
+            names.append(name)
+        return number
+
+    def emit(opcode, argument, line):
+        code.append(opcode)
+        code.append(argument)
+        lines.append(line)
+        return len(code) - 1  # Position of the argument, for patching jumps
+
+    # Work items, done in order: ('chain', statement) compiles a statement and its siblings,
+    # ('exp', node) an expression; ('op', node), ('store', node) and ('write', node) emit the
+    # instruction finishing one. Jump targets travel in one-element lists: ('emit', opcode,
+    # cell, line) emits a jump to be patched and keeps its position in the cell, ('patch', cell)
+    # points that jump here, ('label', cell) records the current position and ('loop', cell,
+    # line) jumps back to it while the repeat condition is false
+    work = [('chain', root.index)]
+    while work:
+        item = work.pop()
+        action = item[0]
+        if action == 'exp':
+            node = item[1]
+            kind = kinds[node]
+            if kind == ID_NODE:
+                emit(LOAD, slot(tree.value(node)), tree.lines[node])
+            elif kind == CONST_NODE:
+                value = int(tree.value(node))
+                number = constant_slots.get(value)
+                if number is None:
+                    number = constant_slots[value] = len(constants)
+                    constants.append(value)
+                emit(CONST, number, tree.lines[node])
+            else:
+                left = first_child[node]
+                work.append(('op', node))
+                work.append(('exp', next_child[left]))
+                work.append(('exp', left))
+        elif action == 'op':
+            node = item[1]
+            emit(OPERATOR_CODES[tree.value(node)], 0, tree.lines[node])
+        elif action == 'chain':
+            node = item[1]
+            if node == NO_NODE:
+                continue
+            work.append(('chain', sibling[node]))
+            kind = kinds[node]
+            line = tree.lines[node]
+            if kind == ASSIGN_NODE:
+                work.append(('store', node))
+                work.append(('exp', first_child[node]))
+            elif kind == READ_NODE:
+                emit(READ, slot(tree.value(node)), line)
+            elif kind == WRITE_NODE:
+                work.append(('write', node))
+                work.append(('exp', first_child[node]))
+            elif kind == IF_NODE:
+                condition = first_child[node]
+                then_part = next_child[condition]
+                else_part = next_child[then_part] if then_part != NO_NODE else NO_NODE
+                to_else, to_end = [None], [None]
+                if else_part != NO_NODE:
+                    work.append(('patch', to_end))
+                    work.append(('chain', else_part))
+                    work.append(('patch', to_else))
+                    work.append(('emit', JUMP, to_end, line))
+                else:
+                    work.append(('patch', to_else))
+                work.append(('chain', then_part))
+                work.append(('emit', JUMP_IF_FALSE, to_else, line))
+                work.append(('exp', condition))
+            elif kind == REPEAT_NODE:
+                body = first_child[node]
+                start = [None]
+                work.append(('loop', start, line))
+                work.append(('exp', next_child[body]))
+                work.append(('chain', body))
+                work.append(('label', start))
+        elif action == 'store':
+            emit(STORE, slot(tree.value(item[1])), tree.lines[item[1]])
+        elif action == 'write':
+            emit(WRITE, 0, tree.lines[item[1]])
+        elif action == 'emit':
+            item[2][0] = emit(item[1], 0, item[3])
+        elif action == 'patch':
+            code[item[1][0]] = len(code)
+        elif action == 'label':
+            item[1][0] = len(code)
+        else:  # 'loop'
+            emit(JUMP_IF_FALSE, item[1][0], item[2])
+    emit(HALT, 0, 0)
+    return Bytecode(code, constants, names, lines)
+
+
+def disassemble(program):
+    """Returns a listing of a Bytecode, one instruction per line."""
+    listing = []
+    code = program.code
+    for position in range(0, len(code), 2):
+        opcode, argument = code[position], code[position + 1]
+        if opcode in (LOAD, STORE, READ):
+            operand = program.names[argument]
+        elif opcode == CONST:
+            operand = program.constants[argument]
+        elif opcode in (JUMP, JUMP_IF_FALSE):
+            operand = argument
+        else:
+            operand = ''
+        listing.append(f"{position:>6}  {OPCODES[opcode]:<14}{operand}")
+    return "\n".join(listing)
+
+
+class VM:
+    """Runs a Bytecode; reads come from `input` and writes go to `output`."""
+
+    def __init__(self, program, input=None, output=None):
+        self.program = program
+        self.input = iter(input if input is not None else sys.stdin)  # Values (or lines) for read
+        self.output = output if output is not None else sys.stdout  # File-like object for write
+        self.memory = [0] * len(program.names)  # Variable slots
+        self.steps = 0  # Instructions executed by the last run()
+
+    def value(self, name):
+        """Returns the current value of a variable."""
+        return self.memory[self.program.names.index(name)]
+
+    def run(self, budget=None):
+        """
+        Executes the program from the start and returns the number of instructions
+        executed. With a budget, a program still running after that many instructions
+        raises VMError.
+        """
+        program = self.program
+        code = program.code.tolist()  # Lists index faster than arrays
+        constants = program.constants
+        memory = self.memory
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        next_input = self.input.__next__
+        write = self.output.write
+        pc = 0
+        # The loop's own iterator counts the instructions, so the budget costs nothing per step
+        steps = range(budget) if budget is not None else count()
+        step = -1
+        try:
+            for step in steps:
+                opcode = code[pc]
+                argument = code[pc + 1]
+                pc += 2
+                if opcode == LOAD:
+                    push(memory[argument])
+                elif opcode == CONST:
+                    push(constants[argument])
+                elif opcode == STORE:
+                    memory[argument] = pop()
+                elif opcode == ADD:
+                    right = pop()
+                    stack[-1] += right
+                elif opcode == SUB:
+                    right = pop()
+                    stack[-1] -= right
+                elif opcode == MUL:
+                    right = pop()
+                    stack[-1] *= right
+                elif opcode == DIV:
+                    right = pop()
+                    stack[-1] = divide(stack[-1], right)
+                elif opcode == LT:
+                    right = pop()
+                    stack[-1] = 1 if stack[-1] < right else 0
+                elif opcode == EQ:
+                    right = pop()
+                    stack[-1] = 1 if stack[-1] == right else 0
+                elif opcode == JUMP_IF_FALSE:
+                    if not pop():
+                        pc = argument
+                elif opcode == JUMP:
+                    pc = argument
+                elif opcode == READ:
+                    memory[argument] = int(next_input())
+                elif opcode == WRITE:
+                    write(f"{pop()}\n")
+                else:  # HALT
+                    break
+            else:
+                raise VMError(f"Instruction budget of {budget} exhausted at line {program.lines[pc // 2]}")
+        except ZeroDivisionError:
+            raise VMError(f"Runtime Error at line {self._line(pc)}: division by zero") from None
+        except StopIteration:
+            raise VMError(f"Runtime Error at line {self._line(pc)}: no more input for read") from None
+        except ValueError as e:
+            raise VMError(f"Runtime Error at line {self._line(pc)}: invalid input: {e}") from None
+        finally:
+            self.steps = step + 1
+        return self.steps
+
+    def _line(self, pc):
+        # pc has already moved past the failing instruction
+        return self.program.lines[pc // 2 - 1]
+
+
+def run(root, input=None, output=None, budget=None):
+    """Compiles and runs a parsed program; returns the VM, holding the final variable values."""
+    vm = VM(compile_program(root), input, output)
+    vm.run(budget)
+    return vm